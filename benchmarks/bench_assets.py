@@ -0,0 +1,113 @@
+"""
+Bytes and requests per page view for the static assets, before and after 'flask build-assets'.
+A simulated browser loads a page and every stylesheet/script/image it references, keeping what it
+received like a browser cache does:
+
+  plain static files (no build): assets are sent uncompressed with Cache-Control: no-cache, so every
+      repeat view revalidates each one (If-None-Match / If-Modified-Since -> 304)
+  built assets: fingerprinted names, br/gzip, Cache-Control: immutable, so a repeat view requests
+      only the HTML
+
+Bytes are response status line + headers + body, as sent by the app (no TLS/TCP overhead).
+
+Usage (from the project root):
+    python benchmarks/bench_assets.py
+    python benchmarks/bench_assets.py --pages / /login /register --encoding gzip
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+import app as app_module
+from database import upgrade_database, seed_defaults
+from utils import assets
+from utils.page_cache import bump_content_version
+
+ASSET_REFERENCE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+def response_bytes(response):
+    head = f"HTTP/1.1 {response.status}\r\n" + ''.join(f"{key}: {value}\r\n" for key, value in response.headers.items()) + "\r\n"
+    return len(head.encode('latin-1')) + len(response.data)
+
+def is_fresh(response):
+    """Whether a browser may reuse the stored response without asking the server again."""
+    cache_control = response.cache_control
+    return bool(cache_control.immutable or (cache_control.max_age and not cache_control.no_cache))
+
+class Browser:
+    def __init__(self, client, accept_encoding):
+        self.client = client
+        self.accept_encoding = accept_encoding
+        self.cache = {} # url -> stored response
+
+    def get(self, url):
+        headers = {'Accept-Encoding': self.accept_encoding}
+        stored = self.cache.get(url)
+        if stored is not None:
+            if is_fresh(stored):
+                return 0, 0
+            if stored.headers.get('ETag'):
+                headers['If-None-Match'] = stored.headers['ETag']
+            if stored.headers.get('Last-Modified'):
+                headers['If-Modified-Since'] = stored.headers['Last-Modified']
+        response = self.client.get(url, headers=headers)
+        if response.status_code == 200:
+            self.cache[url] = response
+        return 1, response_bytes(response)
+
+    def view(self, page):
+        """Loads a page and its assets; returns (asset requests, asset bytes, total bytes)."""
+        page_response = self.client.get(page, headers={'Accept-Encoding': self.accept_encoding})
+        requests, asset_bytes = 0, 0
+        for url in ASSET_REFERENCE.findall(page_response.get_data(as_text=True)):
+            sent, size = self.get(url)
+            requests += sent
+            asset_bytes += size
+        return requests, asset_bytes, asset_bytes + response_bytes(page_response)
+
+def measure(application, pages, accept_encoding):
+    browser = Browser(application.test_client(), accept_encoding)
+    first = [browser.view(page) for page in pages]
+    repeat = [browser.view(page) for page in pages]
+    return first, repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', nargs='+', default=['/', '/login'])
+    parser.add_argument('--encoding', default='br, gzip', help='Accept-Encoding sent by the simulated browser')
+    args = parser.parse_args()
+
+    # Build into a scratch copy of static/ so the checkout's static/dist is left alone
+    static_copy = os.path.join(tempfile.mkdtemp(), 'static')
+    shutil.copytree(os.path.join(os.path.dirname(app_module.__file__), 'static'), static_copy,
+                    ignore=shutil.ignore_patterns('dist', 'uploads'))
+
+    application = app_module.create_app()
+    application.static_folder = static_copy
+    with application.app_context():
+        upgrade_database()
+        seed_defaults()
+
+    print(f"Accept-Encoding: {args.encoding}; pages {' '.join(args.pages)}")
+    print(f"{'':<22} {'view':<7} {'asset reqs':>10} {'asset bytes':>12} {'total bytes':>12}")
+    for label in ('plain static files', 'built assets'):
+        if label == 'built assets':
+            assets.build_assets(static_copy)
+        assets._manifest = assets.load_manifest(static_copy)
+        with application.app_context():
+            bump_content_version() # Cached pages still carry the previous asset URLs (a deploy starts fresh workers)
+        first, repeat = measure(application, args.pages, args.encoding)
+        for view, results in (('first', first), ('repeat', repeat)):
+            print(f"{label:<22} {view:<7} {sum(r[0] for r in results):>10} {sum(r[1] for r in results):>12} "
+                  f"{sum(r[2] for r in results):>12}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares the old JSON-text answer sheets ({"version", "answers": {"id": option}}) with the packed
+binary format in utils.attempt_codec: stored bytes per attempt and time to decode a sheet back
+into {question_id: option} for rendering.
+
+Usage (from the project root):
+    python benchmarks/bench_attempt_codec.py                   # 10k attempts, 25/50/100 questions
+    python benchmarks/bench_attempt_codec.py --attempts 50000 --questions 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.attempt_codec import decode_answer_sheet, encode_answer_sheet
+
+SET_VERSION = '0123456789abcdef'
+
+def make_sheets(attempts, questions, rng):
+    """Question ids in a realistic range; each sheet answers ~80% of the chapter."""
+    first_id = 120_000
+    return [
+        {first_id + i: rng.randint(1, 4) for i in range(questions) if rng.random() < 0.8}
+        for _ in range(attempts)
+    ]
+
+def json_encode(answers):
+    return json.dumps({'version': SET_VERSION, 'answers': {str(k): v for k, v in answers.items()}})
+
+def json_decode(text):
+    data = json.loads(text)
+    return {int(question_id): option for question_id, option in data['answers'].items()}
+
+def timed(func, items):
+    started = time.perf_counter()
+    results = [func(item) for item in items]
+    return results, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attempts', type=int, default=10_000)
+    parser.add_argument('--questions', type=int, nargs='+', default=[25, 50, 100])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'questions':>9} {'json B/attempt':>15} {'binary B/attempt':>17} {'json decode':>12} {'binary decode':>14} {'decode speedup':>15}")
+    for questions in args.questions:
+        sheets = make_sheets(args.attempts, questions, rng)
+        json_blobs = [json_encode(sheet).encode('utf-8') for sheet in sheets]
+        binary_blobs = [encode_answer_sheet(sheet, SET_VERSION) for sheet in sheets]
+
+        json_decoded, json_seconds = timed(lambda blob: json_decode(blob.decode('utf-8')), json_blobs)
+        binary_decoded, binary_seconds = timed(lambda blob: decode_answer_sheet(blob).as_dict(), binary_blobs)
+        assert json_decoded == binary_decoded == sheets
+
+        json_bytes = sum(map(len, json_blobs)) / args.attempts
+        binary_bytes = sum(map(len, binary_blobs)) / args.attempts
+        print(f"{questions:>9} {json_bytes:>15.0f} {binary_bytes:>17.0f} "
+              f"{json_seconds / args.attempts * 1e6:>10.1f}us {binary_seconds / args.attempts * 1e6:>12.1f}us "
+              f"{json_seconds / binary_seconds:>14.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares the old row-by-row (iterrows) question sheet parser with the columnar one in
+utils.excel_parser on synthetic question banks.
+
+Usage (from the project root):
+    python benchmarks/bench_excel_parser.py                # 10k and 100k rows
+    python benchmarks/bench_excel_parser.py --rows 5000 --format csv
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from utils.excel_parser import REQUIRED_COLUMNS, MEDIA_COLUMN, parse_quiz_dataframe, read_quiz_file
+
+def legacy_parse_dataframe(df):
+    """The previous parse_quiz_excel body: one dict per row, header re-checked on every row."""
+    questions_data = []
+    for index, row in df.iterrows():
+        required_cols = REQUIRED_COLUMNS
+        if not all(col in df.columns for col in required_cols):
+            raise ValueError("Missing one or more required columns in the Excel sheet.")
+        media_url_val = row.get(MEDIA_COLUMN)
+        media_url_val = None if pd.isna(media_url_val) else str(media_url_val).strip()
+        question = {
+            'quiz_number': int(row['কুইজ নাম্বার']),
+            'question_text': str(row['প্রশ্ন']),
+            'option1': str(row['অপশন ১']),
+            'option2': str(row['অপশন ২']),
+            'option3': str(row['অপশন ৩']),
+            'option4': str(row['অপশন ৪']),
+            'correct_option_number': int(row['সঠিক অপশন নাম্বার']),
+            'point_value': float(row['পয়েন্ট']),
+            'negative_mark': float(row['নেগেটিভ মার্ক']),
+            'media_url': media_url_val,
+        }
+        if not (1 <= question['correct_option_number'] <= 4):
+            raise ValueError(f"Invalid correct option number in row {index + 2}.")
+        questions_data.append(question)
+    return questions_data
+
+def make_question_bank(rows):
+    return pd.DataFrame({
+        'কুইজ নাম্বার': range(1, rows + 1),
+        'প্রশ্ন': [f"নমুনা প্রশ্ন নং {i} — কোনটি সঠিক?" for i in range(rows)],
+        'অপশন ১': [f"উত্তর ক {i}" for i in range(rows)],
+        'অপশন ২': [f"উত্তর খ {i}" for i in range(rows)],
+        'অপশন ৩': [f"উত্তর গ {i}" for i in range(rows)],
+        'অপশন ৪': [f"উত্তর ঘ {i}" for i in range(rows)],
+        'সঠিক অপশন নাম্বার': [(i % 4) + 1 for i in range(rows)],
+        'নেগেটিভ মার্ক': [0.25] * rows,
+        'পয়েন্ট': [1.0] * rows,
+        MEDIA_COLUMN: [f"https://example.com/{i}.png" if i % 10 == 0 else None for i in range(rows)],
+    })
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'read':>9} {'legacy parse':>13} {'columnar parse':>15} {'speedup':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"bank.{args.format}")
+            bank = make_question_bank(rows)
+            if args.format == 'csv':
+                bank.to_csv(path, index=False)
+            else:
+                bank.to_excel(path, index=False)
+
+            # Reading the file is shared by both parsers, so it is timed separately
+            df, read_seconds = timed(read_quiz_file, path)
+            legacy, legacy_seconds = timed(legacy_parse_dataframe, df)
+            columnar, columnar_seconds = timed(parse_quiz_dataframe, df)
+            assert len(legacy) == len(columnar) == rows
+
+            print(f"{rows:>8} {read_seconds:>8.2f}s {legacy_seconds:>12.2f}s {columnar_seconds:>14.3f}s {legacy_seconds / columnar_seconds:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
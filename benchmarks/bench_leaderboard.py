@@ -0,0 +1,63 @@
+"""
+Compares leaderboard reads done in SQL over the user table (ORDER BY total_points LIMIT n for the
+top, COUNT(*) of higher totals for "my rank") with the in-process Leaderboard in utils.leaderboard.
+
+Usage (from the project root):
+    python benchmarks/bench_leaderboard.py                     # 100k users
+    python benchmarks/bench_leaderboard.py --users 1000000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.leaderboard import Leaderboard
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    points = [(user_id, round(rng.uniform(0, 5000), 2)) for user_id in range(1, args.users + 1)]
+    lookup_ids = [rng.randint(1, args.users) for _ in range(args.lookups)]
+
+    # Same shape as the user table's ranking columns, without an index on total_points
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE user (id INTEGER PRIMARY KEY, selected_class TEXT, total_points REAL)")
+    conn.executemany("INSERT INTO user VALUES (?, 'Class 9', ?)", points)
+    sql_top = timed(lambda: conn.execute(
+        "SELECT id, total_points FROM user WHERE selected_class = 'Class 9' ORDER BY total_points DESC LIMIT ?", (args.top,)).fetchall(), 20)
+    lookups = iter(lookup_ids * 2)
+    sql_rank = timed(lambda: conn.execute(
+        "SELECT COUNT(*) + 1 FROM user WHERE selected_class = 'Class 9' AND total_points > "
+        "(SELECT total_points FROM user WHERE id = ?)", (next(lookups),)).fetchone(), args.lookups)
+
+    started = time.perf_counter()
+    board = Leaderboard(points)
+    build_seconds = time.perf_counter() - started
+    board_top = timed(lambda: board.top(args.top), 200)
+    lookups = iter(lookup_ids * 2)
+    board_rank = timed(lambda: board.rank(next(lookups)), args.lookups)
+    updates = iter(lookup_ids * 2)
+    board_update = timed(lambda: board.add(next(updates), 1.5), args.lookups)
+
+    print(f"{args.users} users (leaderboard build: {build_seconds:.2f}s)")
+    print(f"  top {args.top}:    SQL {sql_top * 1e3:8.2f} ms   leaderboard {board_top * 1e3:8.3f} ms")
+    print(f"  my rank:   SQL {sql_rank * 1e3:8.2f} ms   leaderboard {board_rank * 1e3:8.3f} ms")
+    print(f"  add score: {'':>15}   leaderboard {board_update * 1e3:8.3f} ms")
+
+if __name__ == '__main__':
+    main()
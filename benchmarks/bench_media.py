@@ -0,0 +1,78 @@
+"""
+Bytes a phone downloads for one question image, with and without srcset. A photo-like test image
+is stored through the local media backend (MEDIA_BACKEND=local, resized copies written by Pillow);
+for each device the browser's srcset choice is simulated: the smallest candidate at least as wide
+as the rendered width (min(viewport, 1000px) times the device pixel ratio), else the largest.
+
+Usage (from the project root):
+    python benchmarks/bench_media.py
+    python benchmarks/bench_media.py --width 3000 --height 2000 --format PNG
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+import numpy as np
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from app import create_app
+from config import Config
+from database import upgrade_database
+from utils import media
+
+# (label, CSS viewport width, device pixel ratio)
+DEVICES = [('phone 360 @2x', 360, 2), ('phone 390 @3x', 390, 3), ('tablet 768 @2x', 768, 2), ('laptop 1366 @1x', 1366, 1)]
+QUESTION_COLUMN_MAX = 1000 # .container max-width (see QUESTION_IMAGE_SIZES in static/js/quiz_logic.js)
+
+def test_image(width, height, image_format):
+    """Smooth gradients plus noise, so sizes are closer to a photo than a flat test pattern."""
+    y, x = np.mgrid[0:height, 0:width]
+    rng = np.random.default_rng(0)
+    pixels = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    pixels = np.clip(pixels + rng.normal(0, 12, pixels.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=image_format, quality=85)
+    buffer.seek(0)
+    return buffer
+
+def pick_candidate(srcset, needed_width):
+    candidates = sorted((int(size[:-1]), url) for url, size in (entry.split(' ') for entry in srcset.split(', ')))
+    for width, url in candidates:
+        if width >= needed_width:
+            return width, url
+    return candidates[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=2400)
+    parser.add_argument('--height', type=int, default=1600)
+    parser.add_argument('--format', default='JPEG', choices=['JPEG', 'PNG', 'WEBP'])
+    args = parser.parse_args()
+
+    app = create_app(type('BenchConfig', (Config,), dict(MEDIA_BACKEND='local')))
+    # Store into a scratch folder instead of the checkout's static/uploads
+    media._local_backend = media._upload_backend = media.LocalMediaBackend(tempfile.mkdtemp(), '/static/uploads/media', media._widths)
+    extension = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}[args.format]
+    with app.app_context():
+        upgrade_database()
+        stored = media.save_media(FileStorage(test_image(args.width, args.height, args.format), filename=f"bench.{extension}"), 'bench')
+    srcset = media.media_srcset(stored.url, stored.width)
+    original_bytes = os.path.getsize(media._local_backend._path(stored.url))
+
+    print(f"Original {stored.width}x{stored.height} {args.format}: {original_bytes} bytes")
+    print(f"{'device':<18} {'needs px':>8} {'served':>8} {'bytes':>10} {'vs original':>12}")
+    for label, viewport, ratio in DEVICES:
+        needed = min(viewport, QUESTION_COLUMN_MAX) * ratio
+        width, url = pick_candidate(srcset, needed)
+        size = os.path.getsize(media._local_backend._path(url))
+        print(f"{label:<18} {needed:>8} {width:>8} {size:>10} {size / original_bytes:>11.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Media storage through the local backend (MEDIA_BACKEND=local, no network needed):
+
+  memory: peak Python memory while storing one large upload, read whole (what a plain
+      cloudinary.uploader.upload(file) does) vs. streamed in STREAM_CHUNK_SIZE chunks (save_media)
+  dedup: time and disk bytes when the same file is uploaded again and again (content-addressed:
+      stored once, later uploads only hash the stream and reuse the URL)
+
+Usage (from the project root):
+    python benchmarks/bench_media_storage.py
+    python benchmarks/bench_media_storage.py --size-mb 200 --repeats 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from werkzeug.datastructures import FileStorage
+from app import create_app
+from config import Config
+from database import db, upgrade_database
+from utils import media
+
+def make_upload(size_mb):
+    """A file of random bytes on disk (werkzeug spools large request bodies to disk the same way)."""
+    fd, path = tempfile.mkstemp(suffix='.mp4')
+    with os.fdopen(fd, 'wb') as upload:
+        for _ in range(size_mb):
+            upload.write(os.urandom(1024 * 1024))
+    return path
+
+def peak_memory_mb(store):
+    tracemalloc.start()
+    store()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+def disk_bytes(folder):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app(type('BenchConfig', (Config,), dict(MEDIA_BACKEND='local')))
+    # Store into a scratch folder instead of the checkout's static/uploads
+    media_root = tempfile.mkdtemp()
+    media._local_backend = media._upload_backend = media.LocalMediaBackend(media_root, '/static/uploads/media', media._widths)
+    upload_path = make_upload(args.size_mb)
+
+    with app.app_context():
+        upgrade_database()
+
+        def read_whole():
+            with open(upload_path, 'rb') as upload:
+                data = upload.read()
+            with open(os.path.join(media_root, 'whole.mp4'), 'wb') as stored:
+                stored.write(data)
+        def streamed():
+            with open(upload_path, 'rb') as upload:
+                media.save_media(FileStorage(upload, filename='video.mp4'), 'bench')
+            db.session.commit()
+        print(f"Upload of {args.size_mb} MB, peak Python memory while storing:")
+        print(f"  read whole  {peak_memory_mb(read_whole):>8.1f} MB")
+        print(f"  streamed    {peak_memory_mb(streamed):>8.1f} MB")
+        os.remove(os.path.join(media_root, 'whole.mp4'))
+
+        print(f"Same file uploaded {args.repeats} more times:")
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            streamed()
+            timings.append(time.perf_counter() - started)
+        print(f"  repeat upload {sum(timings) / len(timings) * 1000:>8.1f} ms each (spool + hash + lookup, spooled copy discarded)")
+        print(f"  on disk       {disk_bytes(media_root) / 1024 / 1024:>8.1f} MB for {args.repeats + 1} uploads")
+    os.remove(upload_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Compares the import-time near-duplicate check (MinHash LSH buckets in question_similarity_bucket,
+utils.near_duplicates) with a naive pairwise comparison of every new row against every question
+in the bank, on a synthetic Bengali bank in a temporary SQLite database built from the app's
+migrations. Reports time per upload and how many of the naive matches LSH finds (recall).
+
+Usage (from the project root):
+    python benchmarks/bench_near_duplicates.py                  # 20k bank questions, 500 new rows
+    python benchmarks/bench_near_duplicates.py --bank 100000 --rows 1000 --naive-rows 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONSONANTS = 'কখগঘচছজঝটঠডঢতথদধনপফবভমযরলশষসহ'
+VOWEL_SIGNS = ['', 'া', 'ি', 'ী', 'ু', 'ূ', 'ে', 'ো']
+VOCABULARY_SIZE = 5000
+
+def make_vocabulary(rng):
+    """Pseudo-words of 2-4 syllables; real banks use a few thousand distinct words, a few of them very often."""
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choice(CONSONANTS) + rng.choice(VOWEL_SIGNS) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words, [1 / rank for rank in range(1, len(words) + 1)] # Zipf word frequencies
+
+ENDINGS = ['?', ' ?', '।', '']
+
+def make_question(vocabulary, rng):
+    words, weights = vocabulary
+    return ' '.join(rng.choices(words, weights, k=rng.randint(6, 12))) + rng.choice(ENDINGS)
+
+def make_variant(text, vocabulary, rng):
+    """The kind of copy that piles up in a bank: spacing/punctuation changes, sometimes one word swapped."""
+    words = text.rstrip('?। ').split()
+    if rng.random() < 0.5:
+        words[rng.randrange(len(words))] = rng.choice(vocabulary[0])
+    return ('  ' if rng.random() < 0.5 else ' ').join(words) + rng.choice(ENDINGS)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bank', type=int, default=20_000, help='Questions already in the bank')
+    parser.add_argument('--rows', type=int, default=500, help='Rows in the simulated upload (a third are variants)')
+    parser.add_argument('--naive-rows', type=int, default=None, help='Time the naive check on only this many rows and extrapolate')
+    args = parser.parse_args()
+
+    # The app reads DATABASE_URL at import time, so point it at a scratch file first
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    from sqlalchemy import insert, select
+    from app import create_app
+    from database import db, upgrade_database
+    from models import Subject, Chapter, QuizQuestion
+    from utils.near_duplicates import (find_near_duplicates, index_questions, normalize_question_text,
+                                       shingles, similarity, DEFAULT_THRESHOLD)
+
+    app = create_app()
+    with app.app_context():
+        upgrade_database() # Scratch database; deploys run 'flask init-db' once
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    bank = [make_question(vocabulary, rng) for _ in range(args.bank)]
+    upload = [make_variant(rng.choice(bank), vocabulary, rng) if i % 3 == 0 else make_question(vocabulary, rng)
+              for i in range(args.rows)]
+
+    with app.app_context():
+        subject = Subject(name='Bench')
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name='Bench', subject_id=subject.id, for_class='Class 9')
+        db.session.add(chapter)
+        db.session.commit()
+
+        for start in range(0, len(bank), 10_000):
+            db.session.execute(insert(QuizQuestion), [
+                {'chapter_id': chapter.id, 'question_text': text, 'option1': 'ক', 'option2': 'খ', 'option3': 'গ', 'option4': 'ঘ',
+                 'correct_option_number': 1} for text in bank[start:start + 10_000]])
+        questions = db.session.execute(select(QuizQuestion.id, QuizQuestion.question_text).order_by(QuizQuestion.id)).all()
+        started = time.perf_counter()
+        index_questions(questions)
+        db.session.commit()
+        print(f"Indexed {len(questions)} bank questions in {time.perf_counter() - started:.2f}s")
+
+        # Naive: normalize + shingle the whole bank, then compare every row with every question
+        started = time.perf_counter()
+        bank_shingles = [(question_id, shingles(normalize_question_text(text))) for question_id, text in questions]
+        naive_rows = upload[:args.naive_rows] if args.naive_rows else upload
+        naive = []
+        for text in naive_rows:
+            row_shingles = shingles(normalize_question_text(text))
+            naive.append({question_id for question_id, candidate in bank_shingles
+                          if similarity(row_shingles, candidate) >= DEFAULT_THRESHOLD})
+        naive_seconds = (time.perf_counter() - started) * len(upload) / len(naive_rows)
+
+        started = time.perf_counter()
+        lsh = find_near_duplicates(upload)
+        lsh_seconds = time.perf_counter() - started
+        db.session.rollback()
+
+    naive_pairs = sum(len(ids) for ids in naive)
+    found_pairs = sum(len(ids & {match['question_id'] for match in matches if 'question_id' in match})
+                      for ids, matches in zip(naive, lsh))
+    flagged = sum(1 for matches in lsh if matches)
+    print(f"Upload of {len(upload)} rows against {len(questions)} questions (threshold {DEFAULT_THRESHOLD}):")
+    print(f"  naive pairwise: {naive_seconds:8.2f}s{' (extrapolated)' if args.naive_rows else ''}")
+    print(f"  LSH index:      {lsh_seconds:8.2f}s   ({naive_seconds / lsh_seconds:.0f}x faster)")
+    recall = f" ({found_pairs / naive_pairs:.1%})" if naive_pairs else ''
+    print(f"  rows flagged by LSH: {flagged}; naive matches also found by LSH: {found_pairs}/{naive_pairs}{recall}")
+
+if __name__ == '__main__':
+    main()
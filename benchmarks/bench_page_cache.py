@@ -0,0 +1,64 @@
+"""
+Homepage cost with the versioned page cache (utils/page_cache.py): a full render (cache disabled by
+bumping the content version before every request), a cached copy for an anonymous visitor, and a
+304 revalidation (If-None-Match with the current ETag), for each PAGE_CACHE_BACKEND.
+
+Usage (from the project root):
+    python benchmarks/bench_page_cache.py
+    python benchmarks/bench_page_cache.py --subjects 200 --requests 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from app import create_app
+from config import Config
+from database import db, upgrade_database, seed_defaults
+from models import Subject
+from utils.page_cache import bump_content_version
+
+def per_request_ms(client, requests, headers=None, before=None):
+    started = time.perf_counter()
+    for _ in range(requests):
+        if before:
+            before()
+        client.get('/', headers=headers or {})
+    return (time.perf_counter() - started) / requests * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subjects', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<12} {'render ms':>10} {'cached ms':>10} {'304 ms':>10}")
+    for backend in ('memory', 'filesystem'):
+        config_class = type('BenchConfig', (Config,), dict(PAGE_CACHE_BACKEND=backend, PAGE_CACHE_DIR=tempfile.mkdtemp()))
+        app = create_app(config_class)
+        with app.app_context():
+            upgrade_database()
+            seed_defaults()
+            if not Subject.query.count():
+                db.session.add_all(Subject(name=f"বিষয় {i}") for i in range(args.subjects))
+                db.session.commit()
+        client = app.test_client()
+        client.get('/') # Warm the catalog/settings caches and templates
+
+        def new_version():
+            with app.app_context():
+                bump_content_version()
+        render = per_request_ms(client, args.requests // 5, before=new_version)
+        cached = per_request_ms(client, args.requests)
+        etag = client.get('/').headers['ETag']
+        not_modified = per_request_ms(client, args.requests, headers={'If-None-Match': etag})
+        print(f"{backend:<12} {render:>10.3f} {cached:>10.3f} {not_modified:>10.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Login throughput (password verifications per second) at different PASSWORD_HASH_METHOD costs:
+one thread (= per core), and through the app's bounded PasswordHasher pool with several threads
+calling it at once, which shows whether hashing scales across cores (hashlib releases the GIL).
+
+Usage (from the project root):
+    python benchmarks/bench_password_hash.py
+    python benchmarks/bench_password_hash.py --methods pbkdf2:sha256:600000 scrypt:32768:8:1 --seconds 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+from utils.passwords import PasswordHasher
+
+DEFAULT_METHODS = ['pbkdf2:sha256:100000', 'pbkdf2:sha256:260000', 'pbkdf2:sha256:600000',
+                   'scrypt:16384:8:1', 'scrypt:32768:8:1']
+
+def verifications_per_second(verify, password_hash, seconds, threads=1):
+    done = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def work(index):
+        while time.perf_counter() < deadline:
+            verify(password_hash, 'correct horse')
+            done[index] += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(done) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--seconds', type=float, default=2.0, help='Measuring time per method and mode')
+    parser.add_argument('--pool-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{cores} core(s); pool of {args.pool_workers} hashing thread(s), {args.pool_workers * 4} concurrent callers")
+    print(f"{'method':<24} {'ms/login':>9} {'logins/s/core':>14} {'pool logins/s':>14}")
+    for method in args.methods:
+        password_hash = generate_password_hash('correct horse', method)
+        single = verifications_per_second(check_password_hash, password_hash, args.seconds)
+        hasher = PasswordHasher(method, workers=args.pool_workers, max_pending=args.pool_workers * 4, wait_seconds=60)
+        pooled = verifications_per_second(hasher.verify, password_hash, args.seconds, threads=args.pool_workers * 4)
+        hasher.shutdown()
+        print(f"{method:<24} {1000 / single:>9.1f} {single:>14.1f} {pooled:>14.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Builds a synthetic Bengali question bank on a temporary SQLite database (schema from the app's
+migrations, so the FTS5 index and its triggers are the real ones) and times the admin question
+bank search: first page, a deep page via cursor, and the total count, against a LIKE scan.
+
+Usage (from the project root):
+    python benchmarks/bench_question_search.py                 # 500k questions
+    python benchmarks/bench_question_search.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ('বাংলাদেশের রাজধানী নদী পদ্মা মেঘনা যমুনা স্বাধীনতা যুদ্ধ ভাষা আন্দোলন সংবিধান জাতীয় সংসদ '
+         'সুন্দরবন বঙ্গোপসাগর পাহাড় বৃষ্টি জলবায়ু ফসল ধান পাট চা শিল্প অর্থনীতি জনসংখ্যা শিক্ষা '
+         'বিজ্ঞান পদার্থ রসায়ন জীববিজ্ঞান গণিত সমীকরণ ত্রিভুজ বৃত্ত ক্ষেত্রফল আয়তন বেগ ত্বরণ বল শক্তি '
+         'কোষ উদ্ভিদ প্রাণী রক্ত হৃদপিণ্ড মস্তিষ্ক কম্পিউটার ইন্টারনেট সাহিত্য কবিতা উপন্যাস').split()
+RARE_WORD = 'ইলিশ' # In 1 of every 1000 questions: LIKE has to scan far for a page of these
+SEARCHES = ['পদ্মা', 'সুন্দরবন জলবায়ু', 'ত্রিভুজ ক্ষেত্রফল', 'বাংলাদেশ', RARE_WORD] # 'বাংলাদেশ': prefix of a common word
+
+def make_rows(count, chapter_id, rng):
+    for i in range(count):
+        text = ' '.join(rng.choices(WORDS, k=rng.randint(6, 14))) + f' — প্রশ্ন {i}?'
+        if i % 1000 == 0:
+            text = f'{RARE_WORD} {text}'
+        yield {
+            'chapter_id': chapter_id, 'question_text': text,
+            'option1': rng.choice(WORDS), 'option2': rng.choice(WORDS), 'option3': rng.choice(WORDS), 'option4': rng.choice(WORDS),
+            'correct_option_number': rng.randint(1, 4), 'point_value': 1.0, 'negative_mark': 0.25, 'difficulty': 'সহজ',
+        }
+
+def timed(func, repeat=5):
+    func() # Warm the page cache
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    # The app reads DATABASE_URL at import time, so point it at a scratch file first
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    from sqlalchemy import insert, text
+    from app import create_app
+    from database import db, upgrade_database
+    from models import Subject, Chapter, QuizQuestion
+    from utils.pagination import encode_cursor, keyset_page
+    from utils.question_search import question_listing_query
+
+    app = create_app()
+    with app.app_context():
+        upgrade_database() # Scratch database; deploys run 'flask init-db' once
+
+    rng = random.Random(42)
+    with app.app_context():
+        subject = Subject(name='Bench')
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name='Bench', subject_id=subject.id, for_class='Class 9')
+        db.session.add(chapter)
+        db.session.commit()
+
+        started = time.perf_counter()
+        batch = []
+        for row in make_rows(args.rows, chapter.id, rng):
+            batch.append(row)
+            if len(batch) == 10_000:
+                db.session.execute(insert(QuizQuestion), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(QuizQuestion), batch)
+        db.session.commit()
+        print(f"Inserted {args.rows} questions (FTS kept in sync by triggers) in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'search':<22} {'matches':>8} {'page 1':>9} {'deep page':>10} {'count':>9} {'LIKE page 1':>12} {'LIKE count':>11}")
+        for search in SEARCHES:
+            query, order_columns = question_listing_query(search)
+            first, first_seconds = timed(lambda: keyset_page(query, order_columns, limit=args.page_size))
+            # Jump to ~the middle of the results with a cursor (OFFSET would have to walk there)
+            middle_id = db.session.execute(
+                query.with_only_columns(order_columns[0]).order_by(order_columns[0]).limit(1).offset(args.rows // 20)
+            ).scalar()
+            cursor = encode_cursor([middle_id]) if middle_id is not None else None
+            _, deep_seconds = timed(lambda: keyset_page(query, order_columns, after=cursor, limit=args.page_size))
+            count, count_seconds = timed(lambda: db.session.execute(
+                text("SELECT count(*) FROM quiz_question_fts WHERE quiz_question_fts MATCH :q"),
+                {'q': ' '.join(f'"{term}"*' for term in search.split())}).scalar(), repeat=3)
+
+            like = ' AND '.join(f"question_text LIKE '%{term}%'" for term in search.split())
+            _, like_page_seconds = timed(lambda: db.session.execute(
+                text(f"SELECT id FROM quiz_question WHERE {like} ORDER BY id LIMIT {args.page_size}")).all(), repeat=3)
+            _, like_count_seconds = timed(lambda: db.session.execute(
+                text(f"SELECT count(*) FROM quiz_question WHERE {like}")).scalar(), repeat=1)
+
+            assert len(first.rows) == min(args.page_size, count)
+            print(f"{search:<22} {count:>8} {first_seconds * 1e3:>7.1f}ms {deep_seconds * 1e3:>8.1f}ms {count_seconds * 1e3:>7.1f}ms "
+                  f"{like_page_seconds * 1e3:>10.1f}ms {like_count_seconds * 1e3:>9.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Overhead of the request instrumentation (utils/request_metrics.py): per-request time of a few pages
+with REQUEST_METRICS on and off, plus the Server-Timing breakdown the instrumented app reports.
+
+Usage (from the project root):
+    python benchmarks/bench_request_metrics.py
+    python benchmarks/bench_request_metrics.py --requests 5000 --pages / /login
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from app import create_app
+from config import Config
+from database import upgrade_database, seed_defaults
+
+def per_request_ms(client, page, requests):
+    client.get(page) # Warm caches and templates
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(page)
+    return (time.perf_counter() - started) / requests * 1000, response.headers.get('Server-Timing')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--pages', nargs='+', default=['/', '/login', '/health'])
+    args = parser.parse_args()
+
+    results = {}
+    for enabled in (False, True):
+        app = create_app(type('BenchConfig', (Config,), dict(REQUEST_METRICS=enabled, SLOW_QUERY_MS=10_000)))
+        with app.app_context():
+            upgrade_database()
+            seed_defaults()
+        client = app.test_client()
+        results[enabled] = {page: per_request_ms(client, page, args.requests) for page in args.pages}
+
+    print(f"{'page':<10} {'off ms':>8} {'on ms':>8} {'overhead':>9}  Server-Timing")
+    for page in args.pages:
+        off, _ = results[False][page]
+        on, server_timing = results[True][page]
+        print(f"{page:<10} {off:>8.3f} {on:>8.3f} {(on - off) * 1000:>7.0f}us  {server_timing}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Compares per-question Python scoring with the NumPy answer-key scoring in utils.scoring,
+and the per-submission ORM write (one attempt + one read-modify-write of total_points +
+one commit per sheet) with record_attempts' bulk write, on a temporary SQLite database.
+
+Usage (from the project root):
+    python benchmarks/bench_scoring.py                          # 10k sheets, 50-question chapter
+    python benchmarks/bench_scoring.py --sheets 50000 --questions 100 --no-db
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def legacy_score(questions, answers):
+    """One dict lookup and branch per question, as a straightforward route handler would do it."""
+    score, correct, wrong = 0.0, 0, 0
+    for question in questions:
+        chosen = answers.get(question['id'])
+        if chosen is None:
+            continue
+        if chosen == question['correct_option_number']:
+            score += question['point_value']
+            correct += 1
+        else:
+            score -= question['negative_mark']
+            wrong += 1
+    return {'score': round(score, 2), 'correct': correct, 'wrong': wrong, 'skipped': len(questions) - correct - wrong}
+
+def make_chapter(question_count, rng):
+    return [
+        {'id': 1000 + i, 'correct_option_number': rng.randint(1, 4), 'point_value': 1.0, 'negative_mark': 0.25}
+        for i in range(question_count)
+    ]
+
+def make_sheets(questions, sheet_count, rng):
+    """Each sheet answers ~80% of the questions with a random option."""
+    return [
+        {question['id']: rng.randint(1, 4) for question in questions if rng.random() < 0.8}
+        for _ in range(sheet_count)
+    ]
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def bench_db_write(questions, sheets, user_count, legacy_sheets):
+    # The app reads DATABASE_URL at import time, so point it at a scratch file first
+    tmp_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    from app import create_app
+    from database import db, upgrade_database
+    from models import User, Subject, Chapter, QuizQuestion, UserQuizAttempt
+    from utils.quiz_sets import get_quiz_set
+    from utils.scoring import record_attempts
+    from utils.attempt_codec import encode_answer_sheet
+
+    app = create_app()
+    with app.app_context():
+        upgrade_database() # Scratch database; deploys run 'flask init-db' once
+
+    with app.app_context():
+        subject = Subject(name='Bench')
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name='Bench', subject_id=subject.id, for_class='Class 9')
+        db.session.add(chapter)
+        db.session.flush()
+        db.session.add_all(
+            QuizQuestion(id=q['id'], chapter_id=chapter.id, question_text=f"Q{i}",
+                         option1='a', option2='b', option3='c', option4='d',
+                         correct_option_number=q['correct_option_number'],
+                         point_value=q['point_value'], negative_mark=q['negative_mark'])
+            for i, q in enumerate(questions)
+        )
+        users = [User(username=f"bench{i}", email=f"bench{i}@example.com", password_hash='x', selected_class='Class 9')
+                 for i in range(user_count)]
+        db.session.add_all(users)
+        db.session.commit()
+
+        user_ids = [user.id for user in users]
+        submissions = [(user_ids[i % user_count], sheet) for i, sheet in enumerate(sheets)]
+
+        started = time.perf_counter()
+        for user_id, sheet in submissions[:legacy_sheets]:
+            result = legacy_score(questions, sheet)
+            db.session.add(UserQuizAttempt(user_id=user_id, chapter_id=chapter.id, score=result['score'],
+                                           total_questions=len(questions), answer_sheet=encode_answer_sheet(sheet)))
+            user = db.session.get(User, user_id)
+            user.total_points = (user.total_points or 0.0) + result['score']
+            db.session.commit()
+        legacy_seconds = time.perf_counter() - started
+
+        quiz_set = get_quiz_set(chapter.id)
+        started = time.perf_counter()
+        record_attempts(chapter.id, quiz_set.version, quiz_set.answer_key, submissions)
+        db.session.commit()
+        return legacy_seconds, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sheets', type=int, default=10_000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--users', type=int, default=2_000)
+    parser.add_argument('--legacy-db-sheets', type=int, default=1_000, help="Sheets written one commit at a time (slow, so a sample).")
+    parser.add_argument('--no-db', action='store_true', help="Skip the database write timings.")
+    args = parser.parse_args()
+
+    from utils.scoring import AnswerKey
+
+    rng = random.Random(42)
+    questions = make_chapter(args.questions, rng)
+    sheets = make_sheets(questions, args.sheets, rng)
+
+    legacy, legacy_seconds = timed(lambda: [legacy_score(questions, sheet) for sheet in sheets])
+
+    started = time.perf_counter()
+    key = AnswerKey([q['id'] for q in questions], [q['correct_option_number'] for q in questions],
+                    [q['point_value'] for q in questions], [q['negative_mark'] for q in questions])
+    choices, encode_seconds = timed(key.encode_sheets, sheets)
+    scored, score_seconds = timed(key.score, choices)
+    vectorized_seconds = time.perf_counter() - started
+
+    assert [r['score'] for r in legacy] == scored['score'].tolist()
+    assert [r['correct'] for r in legacy] == scored['correct'].tolist()
+
+    # Encoding walks the submitted dicts once, so it costs about as much as the Python loop;
+    # the win is that scoring (and re-scoring) an encoded matrix is a handful of array ops
+    print(f"{args.sheets} sheets x {args.questions} questions")
+    print(f"  python loop:         {legacy_seconds:8.3f}s")
+    print(f"  numpy encode+score:  {vectorized_seconds:8.3f}s")
+    print(f"    encode sheets:     {encode_seconds:8.3f}s")
+    print(f"    score matrix:      {score_seconds:8.4f}s  ({legacy_seconds / score_seconds:.0f}x vs loop)")
+    if not args.no_db:
+        legacy_sample = min(args.legacy_db_sheets, args.sheets)
+        legacy_write, bulk_write = bench_db_write(questions, sheets, args.users, legacy_sample)
+        per_sheet_legacy = legacy_write / legacy_sample
+        print(f"  per-sheet ORM write: {legacy_write:8.3f}s for {legacy_sample} sheets "
+              f"(~{per_sheet_legacy * args.sheets:.1f}s for {args.sheets})")
+        print(f"  record_attempts:     {bulk_write:8.3f}s for {args.sheets} sheets "
+              f"({per_sheet_legacy * args.sheets / bulk_write:.0f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures what a new gunicorn worker pays before it can serve: importing the app module, building
+the app (create_app(), or nothing for the old import-time app.py), and the first request. Each run
+is a fresh interpreter against an already-initialized database, as in a deploy where
+'flask init-db' ran once. Also works on older checkouts (module-level `app`), for before/after runs.
+
+Usage (from the project root, or any checkout's root):
+    python benchmarks/bench_startup.py                   # 10 cold starts
+    python benchmarks/bench_startup.py --runs 20 --database-url sqlite:////tmp/startup.db
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter; prints the phase timings as JSON
+WORKER_BOOT = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app() if hasattr(app_module, 'create_app') else app_module.app
+built = time.perf_counter()
+status = application.test_client().get('/login').status_code
+served = time.perf_counter()
+print(json.dumps({{'import': imported - started, 'create_app': built - imported,
+                  'first_request': served - built, 'status': status}}))
+'''
+
+# Brings a scratch database to the current schema once (old checkouts did this on import)
+INIT_DATABASE = r'''
+import sys
+sys.path.insert(0, {root!r})
+import app as app_module
+if hasattr(app_module, 'create_app'):
+    from database import upgrade_database, seed_defaults
+    application = app_module.create_app()
+    with application.app_context():
+        upgrade_database()
+        seed_defaults()
+'''
+
+def run(code, env):
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--database-url', default=None, help='Defaults to a scratch SQLite file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, SECRET_KEY=os.environ.get('SECRET_KEY', 'bench'), JOB_WORKERS='0',
+               DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    run(INIT_DATABASE.format(root=ROOT), env)
+
+    samples = [json.loads(run(WORKER_BOOT.format(root=ROOT), env)[-1]) for _ in range(args.runs)]
+    assert all(sample['status'] == 200 for sample in samples)
+    print(f"{args.runs} cold worker starts (median / min, ms):")
+    for phase in ('import', 'create_app', 'first_request'):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"  {phase:<14} {statistics.median(values):8.1f} {min(values):8.1f}")
+    totals = [sum(sample[phase] for phase in ('import', 'create_app', 'first_request')) * 1000 for sample in samples]
+    print(f"  {'total':<14} {statistics.median(totals):8.1f} {min(totals):8.1f}")
+
+if __name__ == '__main__':
+    main()
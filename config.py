@@ -6,11 +6,86 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # --- End of crucial lines ---
+    # Connection pool preset per deployment (utils/db_pool.py): 'web' (gunicorn), 'worker' ('flask run-jobs'),
+    # 'development' or 'pgbouncer'. The DB_* variables below override single values of the preset;
+    # unset ones keep it. Sizes are per process, so workers * (size + overflow) must fit max_connections.
+    DB_PROFILE = os.getenv('DB_PROFILE', 'web')
+    DB_POOL_SIZE = os.getenv('DB_POOL_SIZE')
+    DB_MAX_OVERFLOW = os.getenv('DB_MAX_OVERFLOW')
+    DB_POOL_TIMEOUT = os.getenv('DB_POOL_TIMEOUT') # Seconds a request waits for a free connection
+    DB_POOL_RECYCLE = os.getenv('DB_POOL_RECYCLE') # Seconds before a pooled connection is replaced
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING') # Test connections on checkout ('true'/'false')
+    DB_STATEMENT_TIMEOUT_MS = os.getenv('DB_STATEMENT_TIMEOUT_MS') # Postgres only, 0 = no limit
+    DB_CONNECT_TIMEOUT = os.getenv('DB_CONNECT_TIMEOUT') # Postgres only, seconds
+    # Optional read replica: read-only student pages (utils/db_routing.py replica_reads) query it.
+    # A browser that just wrote (e.g. submitted an attempt) reads the primary for REPLICA_STICKY_SECONDS,
+    # which should exceed the replica's usual lag.
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
 
     UPLOAD_FOLDER = 'static/uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'webm', 'pdf'}
+    ALLOWED_QUIZ_EXTENSIONS = {'xlsx', 'csv'} # Question bank uploads
+    QUIZ_IMPORT_CHUNK_SIZE = int(os.getenv('QUIZ_IMPORT_CHUNK_SIZE', '1000')) # Rows parsed and written per step
+    # Uploaded question sheets wait here for their import job; default <instance path>/imports (never under static/)
+    IMPORT_STAGING_DIR = os.getenv('IMPORT_STAGING_DIR')
 
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
-    CLOUDINARY_UPLOAD_FOLDER = os.getenv('CLOUDINARY_UPLOAD_FOLDER', 'polyquiz_media')
\ No newline at end of file
+    CLOUDINARY_UPLOAD_FOLDER = os.getenv('CLOUDINARY_UPLOAD_FOLDER', 'polyquiz_media')
+    # Where question media uploads go: 'cloudinary', or 'local' (UPLOAD_FOLDER/media, resized copies made
+    # with Pillow at upload). Images are offered in srcset at these widths (px), never above the original.
+    MEDIA_BACKEND = os.getenv('MEDIA_BACKEND', 'cloudinary')
+    MEDIA_WIDTHS = [int(width) for width in os.getenv('MEDIA_WIDTHS', '320,480,768,1024,1536').split(',')]
+
+    # Background jobs (question imports): worker threads per web process, 0 = only 'flask run-jobs' processes
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '1'))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+    # A running job whose worker hasn't renewed its heartbeat for this long is requeued (a worker renews
+    # every JOB_LEASE_SECONDS / 5), and marked failed once it has been claimed JOB_MAX_ATTEMPTS times
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+    # Rendered public pages/fragments, keyed on a content version that admin edits bump (utils/page_cache.py).
+    # 'memory': LRU per worker; 'filesystem': files in PAGE_CACHE_DIR (default instance/page_cache) shared by
+    # the workers on a host, so a bump also refreshes the other workers' catalog/settings caches. Both keep
+    # at most PAGE_CACHE_MAX_ENTRIES entries, dropping the least recently used.
+    PAGE_CACHE_BACKEND = os.getenv('PAGE_CACHE_BACKEND', 'memory')
+    PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR')
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', '300'))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', '512'))
+    # Seconds each worker serves SiteSetting values from memory before re-reading them
+    SETTINGS_CACHE_TTL = int(os.getenv('SETTINGS_CACHE_TTL', '60'))
+    # Seconds each worker keeps the subject/chapter catalog per class (admin edits invalidate it)
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '300'))
+    # Seconds each worker keeps a chapter's pre-serialized quiz set (question edits invalidate it)
+    QUIZ_SET_CACHE_TTL = int(os.getenv('QUIZ_SET_CACHE_TTL', '600'))
+    # Seconds between a worker's leaderboard catch-ups with attempts recorded by other workers
+    LEADERBOARD_SYNC_INTERVAL = float(os.getenv('LEADERBOARD_SYNC_INTERVAL', '5'))
+    LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '20'))
+    # Rows per page on admin listings, and seconds their total counts are cached
+    ADMIN_PAGE_SIZE = int(os.getenv('ADMIN_PAGE_SIZE', '50'))
+    ADMIN_COUNT_CACHE_TTL = int(os.getenv('ADMIN_COUNT_CACHE_TTL', '60'))
+    # Shingle similarity (0-1) above which an imported question is reported as a suspected duplicate
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.7'))
+    # Seconds each worker serves a logged-in account's principal (current_user) without a user query
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', '60'))
+    # Principals each worker keeps at most (least recently used ones are dropped first)
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', '10000'))
+    # Werkzeug hash method for new passwords, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'.
+    # Stored hashes made with another method/cost are rehashed on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    # Per worker process: threads computing hashes, and hashes allowed to run or wait at once
+    # (beyond that, logins/registrations wait PASSWORD_HASH_WAIT seconds, then get a 503)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '8'))
+    PASSWORD_HASH_WAIT = float(os.getenv('PASSWORD_HASH_WAIT', '5'))
+    # Request instrumentation (utils/request_metrics.py): per-endpoint timing histograms, a Server-Timing
+    # header, and a log line (with call site) for each query slower than SLOW_QUERY_MS. /metrics serves
+    # them in Prometheus format to admins, or to scrapers sending 'Authorization: Bearer <METRICS_TOKEN>'.
+    REQUEST_METRICS = os.getenv('REQUEST_METRICS', 'true').lower() == 'true'
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
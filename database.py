@@ -1,9 +1,81 @@
+import os
+import click
+from flask import current_app, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from flask_migrate import Migrate, upgrade
 
-db = SQLAlchemy()
+# Bind key of the optional read replica (DATABASE_REPLICA_URL); models stay on the primary
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """
+    db.session that sends plain SELECTs to the replica bind while the current request allows it
+    (g.db_read_target, set by utils.db_routing.replica_reads). Writes, flushes, SELECT ... FOR UPDATE
+    and anything outside such a request go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        return (has_request_context() and g.get('db_read_target') == REPLICA_BIND and not self._flushing
+                and getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+                and REPLICA_BIND in self._db.engines)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+# render_as_batch lets Alembic ALTER tables on SQLite (copy-and-move) as well as Postgres
+migrate = Migrate(render_as_batch=True)
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Default admin for first access; the password must be changed right after the first login
+DEFAULT_ADMIN_USERNAME = 'admin'
+DEFAULT_ADMIN_PASSWORD = 'QizMaker*001%'
 
 def init_db(app):
+    """
+    Binds SQLAlchemy and Flask-Migrate to the app. No DDL or queries run here, so web workers
+    boot without touching the database; the schema and initial rows are set up once per deploy
+    by 'flask init-db' (or 'flask db upgrade' when only migrations changed).
+    """
     db.init_app(app)
-    with app.app_context():
-        db.create_all()
-        print("Database tables created (if they didn't exist).")
\ No newline at end of file
+    migrate.init_app(app, db, directory=MIGRATIONS_DIRECTORY)
+
+    @app.cli.command('init-db')
+    @click.option('--seed/--no-seed', default=True, help='Also create the default admin and site settings.')
+    def init_db_command(seed):
+        """Upgrades the schema to the latest migration and creates the initial data (idempotent)."""
+        upgrade_database()
+        upload_folder = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+        os.makedirs(upload_folder, exist_ok=True) # Local upload folder for local testing
+        if seed:
+            seed_defaults()
+
+def upgrade_database():
+    """
+    Brings the schema to the latest migration. Works for fresh databases and for ones
+    created by the old db.create_all() (the baseline migration skips existing tables).
+    Needs an app context.
+    """
+    upgrade(directory=MIGRATIONS_DIRECTORY)
+    print("Database schema is up to date.")
+
+def seed_defaults():
+    """Creates the default admin user and the homepage notice / theme settings if they don't exist. Needs an app context."""
+    from models import AdminUser, SiteSetting # models imports db from here
+
+    if not AdminUser.query.filter_by(username=DEFAULT_ADMIN_USERNAME).first():
+        default_admin = AdminUser(username=DEFAULT_ADMIN_USERNAME)
+        default_admin.set_password(DEFAULT_ADMIN_PASSWORD)
+        db.session.add(default_admin)
+        db.session.commit()
+        print(f"Default admin user '{DEFAULT_ADMIN_USERNAME}' created. **CHANGE PASSWORD IMMEDIATELY AFTER FIRST LOGIN!**")
+
+    if not SiteSetting.query.filter_by(setting_key='homepage_notice').first():
+        db.session.add(SiteSetting(setting_key='homepage_notice', setting_value=''))
+    if not SiteSetting.query.filter_by(setting_key='default_theme').first():
+        db.session.add(SiteSetting(setting_key='default_theme', setting_value='default'))
+    db.session.commit()
@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, TextAreaField, IntegerField, SelectField, BooleanField, FloatField
-from wtforms.validators import DataRequired, Email, EqualTo, Length, NumberRange
+from wtforms.validators import DataRequired, InputRequired, Email, EqualTo, Length, NumberRange
 from flask_wtf.file import FileField, FileAllowed # Make sure this is imported
 
 class LoginForm(FlaskForm):
@@ -8,18 +8,21 @@ class LoginForm(FlaskForm):
     password = PasswordField('পাসওয়ার্ড', validators=[DataRequired()])
     submit = SubmitField('লগইন করুন')
 
+# Classes a student can pick / a chapter can target (also used by the admin listing filters)
+CLASS_CHOICES = [
+    ('Class 8', 'অষ্টম শ্রেণি'),
+    ('Class 9', 'নবম শ্রেণি'),
+    ('Class 10', 'দশম শ্রেণি'),
+    ('Class 11', 'একাদশ শ্রেণি'),
+    ('Class 12', 'দ্বাদশ শ্রেণি'),
+]
+
 class RegistrationForm(FlaskForm):
     username = StringField('ইউজারনেম', validators=[DataRequired(), Length(min=2, max=80)])
     email = StringField('ইমেইল', validators=[DataRequired(), Email()]) # Email validator requires 'email_validator' package
     password = PasswordField('পাসওয়ার্ড', validators=[DataRequired()])
     confirm_password = PasswordField('পাসওয়ার্ড নিশ্চিত করুন', validators=[DataRequired(), EqualTo('password')])
-    selected_class = SelectField('ক্লাস নির্বাচন করুন', choices=[
-        ('Class 8', 'অষ্টম শ্রেণি'),
-        ('Class 9', 'নবম শ্রেণি'),
-        ('Class 10', 'দশম শ্রেণি'),
-        ('Class 11', 'একাদশ শ্রেণি'),
-        ('Class 12', 'দ্বাদশ শ্রেণি')
-    ], validators=[DataRequired()])
+    selected_class = SelectField('ক্লাস নির্বাচন করুন', choices=CLASS_CHOICES, validators=[DataRequired()])
     submit = SubmitField('রেজিস্টার করুন')
 
 class SubjectForm(FlaskForm):
@@ -32,22 +35,18 @@ class ChapterForm(FlaskForm):
     subject_id = SelectField('বিষয় নির্বাচন করুন', coerce=int, validators=[DataRequired()])
     for_class = SelectField('ক্লাস নির্বাচন করুন', choices=[
         ('', 'নির্বাচন করুন'), # Empty default option
-        ('Class 8', 'অষ্টম শ্রেণি'),
-        ('Class 9', 'নবম শ্রেণি'),
-        ('Class 10', 'দশম শ্রেণি'),
-        ('Class 11', 'একাদশ শ্রেণি'),
-        ('Class 12', 'দ্বাদশ শ্রেণি')
-    ], validators=[DataRequired()])
+    ] + CLASS_CHOICES, validators=[DataRequired()])
     is_active = BooleanField('সক্রিয় আছে?')
     submit = SubmitField('সেভ করুন')
 
 class QuizUploadForm(FlaskForm):
     subject_id = SelectField('বিষয় নির্বাচন করুন', coerce=int, validators=[DataRequired()])
     chapter_id = SelectField('অধ্যায় নির্বাচন করুন', coerce=int, validators=[DataRequired()])
-    excel_file = FileField('এক্সেল ফাইল আপলোড করুন (.xlsx)', validators=[FileAllowed(['xlsx'])])
+    excel_file = FileField('এক্সেল/CSV ফাইল আপলোড করুন (.xlsx, .csv)', validators=[FileAllowed(['xlsx', 'csv'])])
     submit = SubmitField('আপলোড করুন')
 
 class QuestionForm(FlaskForm):
+    chapter_id = SelectField('অধ্যায় নির্বাচন করুন', coerce=int, validators=[DataRequired()])
     question_text = TextAreaField('প্রশ্ন', validators=[DataRequired()])
     option1 = StringField('অপশন ১', validators=[DataRequired()])
     option2 = StringField('অপশন ২', validators=[DataRequired()])
@@ -57,7 +56,7 @@ class QuestionForm(FlaskForm):
         ('1', 'অপশন ১'), ('2', 'অপশন ২'), ('3', 'অপশন ৩'), ('4', 'অপশন ৪')
     ], validators=[DataRequired()], coerce=int)
     point_value = FloatField('পয়েন্ট ভ্যালু', validators=[DataRequired(), NumberRange(min=0.1)])
-    negative_mark = FloatField('নেগেটিভ মার্ক', validators=[DataRequired(), NumberRange(min=0.0)])
+    negative_mark = FloatField('নেগেটিভ মার্ক', validators=[InputRequired(), NumberRange(min=0.0)]) # 0 is valid, so not DataRequired
     media_file = FileField('ছবি/ভিডিও আপলোড করুন', validators=[FileAllowed(['png', 'jpg', 'jpeg', 'gif', 'mp4', 'webm'])])
     difficulty = SelectField('কঠিনতার স্তর', choices=[
         ('সহজ', 'সহজ'), ('কঠিন', 'কঠিন'), ('অধিক কঠিন', 'অধিক কঠিন')
@@ -0,0 +1,127 @@
+"""Baseline schema (tables as created by db.create_all before migrations were introduced)
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by the old db.create_all() already have some or all of these tables,
+    # so each one is only created when missing.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table('user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('password_hash', sa.String(length=128), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('current_level', sa.Integer(), nullable=True),
+            sa.Column('total_points', sa.Float(), nullable=True),
+            sa.Column('selected_class', sa.String(length=50), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username')
+        )
+    if 'admin_user' not in existing:
+        op.create_table('admin_user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('password_hash', sa.String(length=128), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('username')
+        )
+    if 'subject' not in existing:
+        op.create_table('subject',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name')
+        )
+    if 'site_setting' not in existing:
+        op.create_table('site_setting',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('setting_key', sa.String(length=100), nullable=False),
+            sa.Column('setting_value', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('setting_key')
+        )
+    if 'background_job' not in existing:
+        op.create_table('background_job',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('lock_key', sa.String(length=100), nullable=True),
+            sa.Column('payload', sa.Text(), nullable=True),
+            sa.Column('result', sa.Text(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('progress', sa.Integer(), nullable=True),
+            sa.Column('total', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'chapter' not in existing:
+        op.create_table('chapter',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False),
+            sa.Column('for_class', sa.String(length=50), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['subject_id'], ['subject.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'quiz_question' not in existing:
+        op.create_table('quiz_question',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('chapter_id', sa.Integer(), nullable=False),
+            sa.Column('question_text', sa.Text(), nullable=False),
+            sa.Column('option1', sa.String(length=255), nullable=False),
+            sa.Column('option2', sa.String(length=255), nullable=False),
+            sa.Column('option3', sa.String(length=255), nullable=False),
+            sa.Column('option4', sa.String(length=255), nullable=False),
+            sa.Column('correct_option_number', sa.Integer(), nullable=False),
+            sa.Column('point_value', sa.Float(), nullable=True),
+            sa.Column('negative_mark', sa.Float(), nullable=True),
+            sa.Column('media_url', sa.String(length=500), nullable=True),
+            sa.Column('difficulty', sa.String(length=20), nullable=True),
+            sa.ForeignKeyConstraint(['chapter_id'], ['chapter.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'user_quiz_attempt' not in existing:
+        op.create_table('user_quiz_attempt',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('chapter_id', sa.Integer(), nullable=False),
+            sa.Column('score', sa.Float(), nullable=False),
+            sa.Column('total_questions', sa.Integer(), nullable=False),
+            sa.Column('attempt_date', sa.DateTime(), nullable=True),
+            sa.Column('answered_questions_data', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['chapter_id'], ['chapter.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('user_quiz_attempt')
+    op.drop_table('quiz_question')
+    op.drop_table('chapter')
+    op.drop_table('background_job')
+    op.drop_table('site_setting')
+    op.drop_table('subject')
+    op.drop_table('admin_user')
+    op.drop_table('user')
@@ -0,0 +1,61 @@
+"""Indexes for hot lookup columns and question_text fingerprint
+
+Revision ID: 0002_hot_lookup_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 00:00:00
+
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_lookup_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_question') as batch_op:
+        batch_op.add_column(sa.Column('question_fingerprint', sa.String(length=64), nullable=True))
+
+    # Backfill fingerprints for existing questions in batches
+    bind = op.get_bind()
+    quiz_question = sa.table('quiz_question',
+        sa.column('id', sa.Integer), sa.column('question_text', sa.Text), sa.column('question_fingerprint', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(quiz_question.c.id, quiz_question.c.question_text)
+            .where(quiz_question.c.id > last_id).order_by(quiz_question.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            quiz_question.update().where(quiz_question.c.id == sa.bindparam('row_id'))
+            .values(question_fingerprint=sa.bindparam('fingerprint')),
+            [{'row_id': row.id, 'fingerprint': hashlib.sha256(row.question_text.encode('utf-8')).hexdigest()} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    op.create_index('ix_quiz_question_chapter_fingerprint', 'quiz_question', ['chapter_id', 'question_fingerprint'])
+    op.create_index('ix_chapter_for_class_is_active', 'chapter', ['for_class', 'is_active'])
+    op.create_index('ix_chapter_subject_id', 'chapter', ['subject_id'])
+    op.create_index('ix_user_quiz_attempt_user_chapter', 'user_quiz_attempt', ['user_id', 'chapter_id'])
+    op.create_index('ix_user_quiz_attempt_chapter_id', 'user_quiz_attempt', ['chapter_id'])
+    op.create_index('ix_background_job_status_id', 'background_job', ['status', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_background_job_status_id', table_name='background_job')
+    op.drop_index('ix_user_quiz_attempt_chapter_id', table_name='user_quiz_attempt')
+    op.drop_index('ix_user_quiz_attempt_user_chapter', table_name='user_quiz_attempt')
+    op.drop_index('ix_chapter_subject_id', table_name='chapter')
+    op.drop_index('ix_chapter_for_class_is_active', table_name='chapter')
+    op.drop_index('ix_quiz_question_chapter_fingerprint', table_name='quiz_question')
+    with op.batch_alter_table('quiz_question') as batch_op:
+        batch_op.drop_column('question_fingerprint')
@@ -0,0 +1,120 @@
+"""Store attempt answer sheets as packed binary instead of JSON text
+
+Revision ID: 0003_binary_answer_sheets
+Revises: 0002_hot_lookup_indexes
+Create Date: 2026-10-17 00:00:00
+
+"""
+import json
+import struct
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_binary_answer_sheets'
+down_revision = '0002_hot_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of the format-1 layout from utils/attempt_codec.py, so this migration keeps
+# working if the codec later moves to a new format
+_HEADER = struct.Struct('<B8sI')
+_NO_SET_VERSION = bytes(8)
+
+
+def _pack(answers, set_version):
+    question_ids = sorted(answers)
+    set_bytes = bytes.fromhex(set_version) if set_version else _NO_SET_VERSION
+    return (_HEADER.pack(1, set_bytes, len(question_ids))
+            + struct.pack(f'<{len(question_ids)}I', *question_ids)
+            + struct.pack(f'<{len(question_ids)}B', *(answers[question_id] for question_id in question_ids)))
+
+
+def _unpack(blob):
+    _, set_bytes, count = _HEADER.unpack_from(blob)
+    question_ids = struct.unpack_from(f'<{count}I', blob, _HEADER.size)
+    options = struct.unpack_from(f'<{count}B', blob, _HEADER.size + 4 * count)
+    return (set_bytes.hex() if set_bytes != _NO_SET_VERSION else None), dict(zip(question_ids, options))
+
+
+def _parse_legacy_json(text):
+    """
+    Accepts the {"version", "answers": {id: option}} records written by the quiz routes, and older
+    free-form blobs that are a plain {id: option} map or a list of {"question_id", "chosen_option"}.
+    :return: (set_version, answers) or None if the blob can't be read as an answer sheet.
+    """
+    try:
+        data = json.loads(text)
+        set_version = None
+        if isinstance(data, dict) and 'answers' in data:
+            set_version = data.get('version')
+            data = data['answers']
+        if isinstance(data, list):
+            data = {item['question_id']: item.get('chosen_option', item.get('selected_option')) for item in data}
+        answers = {int(question_id): int(option) for question_id, option in data.items()
+                   if option is not None and 1 <= int(option) <= 4}
+        if not (isinstance(set_version, str) and len(set_version) == 16):
+            set_version = None # Only a 16-hex-char QuizSet.version fits the 8-byte field
+        else:
+            bytes.fromhex(set_version)
+        return set_version, answers
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+
+
+def _convert(source_column, target_column, convert):
+    """Rewrites source_column into target_column in id-ordered batches; returns the unreadable row count."""
+    bind = op.get_bind()
+    attempt = sa.table('user_quiz_attempt', sa.column('id', sa.Integer), source_column, target_column)
+    source, target = attempt.c[source_column.name], attempt.c[target_column.name]
+    last_id, unreadable = 0, 0
+    while True:
+        rows = bind.execute(
+            sa.select(attempt.c.id, source)
+            .where(attempt.c.id > last_id, source.isnot(None)).order_by(attempt.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return unreadable
+        updates = []
+        for row_id, value in rows:
+            converted = convert(value)
+            if converted is None:
+                unreadable += 1
+            else:
+                updates.append({'row_id': row_id, 'value': converted})
+        if updates:
+            bind.execute(attempt.update().where(attempt.c.id == sa.bindparam('row_id')).values({target: sa.bindparam('value')}), updates)
+        last_id = rows[-1].id
+
+
+def upgrade():
+    with op.batch_alter_table('user_quiz_attempt') as batch_op:
+        batch_op.add_column(sa.Column('answer_sheet', sa.LargeBinary(), nullable=True))
+
+    def to_binary(text):
+        parsed = _parse_legacy_json(text)
+        return _pack(parsed[1], parsed[0]) if parsed else None
+
+    unreadable = _convert(sa.column('answered_questions_data', sa.Text), sa.column('answer_sheet', sa.LargeBinary), to_binary)
+    if unreadable:
+        print(f"{unreadable} attempt answer sheet(s) could not be parsed and were dropped (scores are kept).")
+
+    with op.batch_alter_table('user_quiz_attempt') as batch_op:
+        batch_op.drop_column('answered_questions_data')
+
+
+def downgrade():
+    with op.batch_alter_table('user_quiz_attempt') as batch_op:
+        batch_op.add_column(sa.Column('answered_questions_data', sa.Text(), nullable=True))
+
+    def to_json(blob):
+        set_version, answers = _unpack(bytes(blob))
+        return json.dumps({'version': set_version, 'answers': {str(question_id): option for question_id, option in answers.items()}})
+
+    _convert(sa.column('answer_sheet', sa.LargeBinary), sa.column('answered_questions_data', sa.Text), to_json)
+
+    with op.batch_alter_table('user_quiz_attempt') as batch_op:
+        batch_op.drop_column('answer_sheet')
@@ -0,0 +1,31 @@
+"""Leaderboard snapshot table
+
+Revision ID: 0004_leaderboard_snapshot
+Revises: 0003_binary_answer_sheets
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_leaderboard_snapshot'
+down_revision = '0003_binary_answer_sheets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_snapshot',
+        sa.Column('board', sa.String(length=100), nullable=False),
+        sa.Column('through_attempt_id', sa.Integer(), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.Column('entries', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('board')
+    )
+
+
+def downgrade():
+    op.drop_table('leaderboard_snapshot')
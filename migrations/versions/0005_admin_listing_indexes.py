@@ -0,0 +1,29 @@
+"""Indexes for keyset-paginated admin listings
+
+Revision ID: 0005_admin_listing_indexes
+Revises: 0004_leaderboard_snapshot
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_admin_listing_indexes'
+down_revision = '0004_leaderboard_snapshot'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_selected_class_id', 'user', ['selected_class', 'id'])
+    # Covers the old subject_id-only index (same leading column) and the listing's sort order
+    op.create_index('ix_chapter_subject_name_id', 'chapter', ['subject_id', 'name', 'id'])
+    op.drop_index('ix_chapter_subject_id', table_name='chapter')
+
+
+def downgrade():
+    op.create_index('ix_chapter_subject_id', 'chapter', ['subject_id'])
+    op.drop_index('ix_chapter_subject_name_id', table_name='chapter')
+    op.drop_index('ix_user_selected_class_id', table_name='user')
@@ -0,0 +1,72 @@
+"""Full-text search index over question text and options
+
+Revision ID: 0006_question_search_index
+Revises: 0005_admin_listing_indexes
+Create Date: 2026-10-17 00:00:00
+
+SQLite: an external-content FTS5 table kept in sync by triggers (so ORM writes, bulk imports
+and raw SQL are all indexed). Note that batch_alter_table on quiz_question recreates the table
+and drops these triggers; a later migration doing that must call create_sqlite_triggers() again.
+PostgreSQL: a generated tsvector column with a GIN index.
+"""
+import unicodedata
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_question_search_index'
+down_revision = '0005_admin_listing_indexes'
+branch_labels = None
+depends_on = None
+
+INDEXED_COLUMNS = ['question_text', 'option1', 'option2', 'option3', 'option4']
+
+# unicode61 splits words at characters that are not letters/digits, which includes Bengali vowel
+# signs, virama, anusvara etc. (Mn/Mc) - "রাজধানী" would become "র", "জধ", "ন". Declare them
+# (plus ZWNJ/ZWJ used in conjuncts) as token characters so whole Bengali words are indexed.
+BENGALI_TOKEN_CHARS = ''.join(
+    ch for ch in map(chr, range(0x0980, 0x0A00)) if unicodedata.category(ch) in ('Mn', 'Mc')
+) + '\u200c\u200d'
+SQLITE_TOKENIZER = f"unicode61 remove_diacritics 2 tokenchars '{BENGALI_TOKEN_CHARS}'"
+
+
+def create_sqlite_triggers():
+    columns = ', '.join(INDEXED_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in INDEXED_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in INDEXED_COLUMNS)
+    delete_old = f"INSERT INTO quiz_question_fts(quiz_question_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO quiz_question_fts(rowid, {columns}) VALUES (new.id, {new_values});"
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS quiz_question_fts_ai AFTER INSERT ON quiz_question BEGIN {insert_new} END")
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS quiz_question_fts_ad AFTER DELETE ON quiz_question BEGIN {delete_old} END")
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS quiz_question_fts_au AFTER UPDATE OF {columns} ON quiz_question "
+               f"BEGIN {delete_old} {insert_new} END")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE quiz_question_fts USING fts5({', '.join(INDEXED_COLUMNS)}, "
+            f"content='quiz_question', content_rowid='id', tokenize=\"{SQLITE_TOKENIZER}\")"
+        )
+        create_sqlite_triggers()
+        op.execute("INSERT INTO quiz_question_fts(quiz_question_fts) VALUES ('rebuild')") # Index existing rows
+    elif dialect == 'postgresql':
+        # 'simple' config: no stemming or stop words (PostgreSQL ships no Bengali dictionary);
+        # inflected forms are matched with prefix queries instead
+        document = " || ' ' || ".join(f"coalesce({column}, '')" for column in INDEXED_COLUMNS)
+        op.execute(f"ALTER TABLE quiz_question ADD COLUMN search_vector tsvector "
+                   f"GENERATED ALWAYS AS (to_tsvector('simple', {document})) STORED")
+        op.execute("CREATE INDEX ix_quiz_question_search_vector ON quiz_question USING GIN (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('quiz_question_fts_ai', 'quiz_question_fts_ad', 'quiz_question_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS quiz_question_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_quiz_question_search_vector")
+        op.execute("ALTER TABLE quiz_question DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,50 @@
+"""Near-duplicate index (MinHash LSH buckets) for questions
+
+Revision ID: 0007_question_similarity_buckets
+Revises: 0006_question_search_index
+Create Date: 2026-10-17 00:00:00
+
+The buckets are derived data: this migration computes them with the current utils.near_duplicates
+instead of a frozen copy, and 'flask rebuild-duplicate-index' recomputes them whenever the
+shingle/band parameters change.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_question_similarity_buckets'
+down_revision = '0006_question_search_index'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    op.create_table('question_similarity_bucket',
+        sa.Column('bucket', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['quiz_question.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('bucket', 'question_id')
+    )
+    op.create_index('ix_question_similarity_bucket_question_id', 'question_similarity_bucket', ['question_id'])
+
+    # Index the existing bank
+    from utils.near_duplicates import index_questions
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        questions = bind.execute(
+            sa.text("SELECT id, question_text FROM quiz_question WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': BATCH_SIZE},
+        ).all()
+        if not questions:
+            break
+        index_questions([tuple(question) for question in questions], connection=bind)
+        last_id = questions[-1][0]
+
+
+def downgrade():
+    op.drop_index('ix_question_similarity_bucket_question_id', table_name='question_similarity_bucket')
+    op.drop_table('question_similarity_bucket')
@@ -0,0 +1,33 @@
+"""Widen password_hash for scrypt hashes
+
+Revision ID: 0008_wider_password_hash
+Revises: 0007_question_similarity_buckets
+Create Date: 2026-10-17 00:00:00
+
+A Werkzeug scrypt hash ('scrypt:32768:8:1$<salt>$<128 hex>') is ~160 characters, more than
+the old String(128) allows on PostgreSQL.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_wider_password_hash'
+down_revision = '0007_question_similarity_buckets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('user', 'admin_user'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('password_hash', existing_type=sa.String(length=128),
+                                  type_=sa.String(length=255), existing_nullable=False)
+
+
+def downgrade():
+    # Fails on PostgreSQL while any stored hash is longer than 128 characters (switch back to pbkdf2 first)
+    for table in ('user', 'admin_user'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('password_hash', existing_type=sa.String(length=255),
+                                  type_=sa.String(length=128), existing_nullable=False)
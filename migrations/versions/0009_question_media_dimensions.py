@@ -0,0 +1,49 @@
+"""Record question media dimensions
+
+Revision ID: 0009_question_media_dimensions
+Revises: 0008_wider_password_hash
+Create Date: 2026-10-17 00:00:00
+
+Pixel width/height of an uploaded question image, so the quiz page can reserve its space and
+list only resized copies narrower than the original in srcset. NULL for documents, external
+links and media uploaded before this revision ('flask backfill-media-dimensions' fills those).
+
+On SQLite a batch operation that rebuilds quiz_question (drop_column always does) drops the
+table's triggers, including the search index triggers of 0006, so they are created again.
+"""
+import importlib.util
+import os
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_question_media_dimensions'
+down_revision = '0008_wider_password_hash'
+branch_labels = None
+depends_on = None
+
+
+def restore_search_triggers():
+    """Re-creates the SQLite search index triggers of 0006 (no-op where they still exist)."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '0006_question_search_index.py')
+    spec = importlib.util.spec_from_file_location('question_search_index_0006', path)
+    search_index = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(search_index)
+    search_index.create_sqlite_triggers()
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('media_width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('media_height', sa.Integer(), nullable=True))
+    restore_search_triggers() # ADD COLUMN doesn't rebuild today, but a batch move to recreate would
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_question', schema=None) as batch_op:
+        batch_op.drop_column('media_height')
+        batch_op.drop_column('media_width')
+    restore_search_triggers()
@@ -0,0 +1,43 @@
+"""Content-addressed media assets
+
+Revision ID: 0010_media_assets
+Revises: 0009_question_media_dimensions
+Create Date: 2026-10-17 00:00:00
+
+One media_asset row per distinct uploaded file (SHA-256 per storage backend), so uploading the
+same image again reuses the stored copy. Media uploaded before this revision has no row and is
+stored again the next time it is uploaded. The media_url index lets cleanup check whether a
+shared file is still used by another question.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_media_assets'
+down_revision = '0009_question_media_dimensions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_asset',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('backend', sa.String(length=20), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('url', sa.String(length=500), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('backend', 'sha256', name='uq_media_asset_backend_sha256')
+    )
+    op.create_index('ix_media_asset_url', 'media_asset', ['url'])
+    op.create_index('ix_quiz_question_media_url', 'quiz_question', ['media_url'])
+
+
+def downgrade():
+    op.drop_index('ix_quiz_question_media_url', table_name='quiz_question')
+    op.drop_index('ix_media_asset_url', table_name='media_asset')
+    op.drop_table('media_asset')
@@ -0,0 +1,31 @@
+"""Background job lease
+
+Revision ID: 0011_background_job_lease
+Revises: 0010_media_assets
+Create Date: 2026-10-17 00:00:00
+
+A running job's worker renews heartbeat_at while the handler runs; a job whose heartbeat is
+older than JOB_LEASE_SECONDS lost its worker (crash, deploy, killed process) and is queued
+again, or marked failed once it has been claimed JOB_MAX_ATTEMPTS times.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_background_job_lease'
+down_revision = '0010_media_assets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('background_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('background_job', schema=None) as batch_op:
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('heartbeat_at')
@@ -0,0 +1,37 @@
+"""Single-use quiz attempt tokens
+
+Revision ID: 0012_quiz_attempt_token
+Revises: 0011_background_job_lease
+Create Date: 2026-10-17 00:00:00
+
+Opening a quiz stores a token row; submitting deletes it with a conditional DELETE and is scored
+only when that removed the row, so a replayed session cookie or a second post of the same sheet
+can't add points again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_quiz_attempt_token'
+down_revision = '0011_background_job_lease'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_attempt_token',
+        sa.Column('token', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('chapter_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['chapter_id'], ['chapter.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('token')
+    )
+    op.create_index('ix_quiz_attempt_token_user_chapter', 'quiz_attempt_token', ['user_id', 'chapter_id'])
+
+
+def downgrade():
+    op.drop_index('ix_quiz_attempt_token_user_chapter', table_name='quiz_attempt_token')
+    op.drop_table('quiz_attempt_token')
@@ -1,12 +1,20 @@
+import hashlib
+import json
 from datetime import datetime
 from database import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password
+from sqlalchemy import event
+
+
+def fingerprint_question_text(question_text):
+    """SHA-256 hex digest of a question's text, used for indexed dedup lookups."""
+    return hashlib.sha256(question_text.encode('utf-8')).hexdigest()
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False) # scrypt hashes are ~160 characters
     email = db.Column(db.String(120), unique=True, nullable=False)
     current_level = db.Column(db.Integer, default=1)
     total_points = db.Column(db.Float, default=0.0)
@@ -14,11 +22,15 @@ class User(UserMixin, db.Model):
 
     attempts = db.relationship('UserQuizAttempt', backref='user', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_user_selected_class_id', 'selected_class', 'id'), # Admin user listing filtered by class
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        self.password_hash = hash_password(password) # Method/cost from PASSWORD_HASH_METHOD
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f"<User {self.username}>"
@@ -26,13 +38,13 @@ class User(UserMixin, db.Model):
 class AdminUser(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False) # scrypt hashes are ~160 characters
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        self.password_hash = hash_password(password) # Method/cost from PASSWORD_HASH_METHOD
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     @property # ADDED: is_admin property for AdminUser
     def is_admin(self):
@@ -58,6 +70,11 @@ class Chapter(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     questions = db.relationship('QuizQuestion', backref='chapter', lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_chapter_for_class_is_active', 'for_class', 'is_active'), # Dashboard / class catalog
+        db.Index('ix_chapter_subject_name_id', 'subject_id', 'name', 'id'), # Subject lookups + admin listing order
+    )
+
     def __repr__(self):
         return f"<Chapter {self.name} ({self.subject.name})>"
 
@@ -73,11 +90,60 @@ class QuizQuestion(db.Model):
     point_value = db.Column(db.Float, default=1.0)
     negative_mark = db.Column(db.Float, default=0.0)
     media_url = db.Column(db.String(500), nullable=True)
+    # Pixel size of an uploaded image/video: None for external links, and for older uploads until 'flask backfill-media-dimensions'
+    media_width = db.Column(db.Integer, nullable=True)
+    media_height = db.Column(db.Integer, nullable=True)
     difficulty = db.Column(db.String(20), default='সহজ') # সহজ, কঠিন, অধিক কঠিন
+    # SHA-256 of question_text: question_text is unbounded Text, so dedup lookups index this instead
+    question_fingerprint = db.Column(db.String(64), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_quiz_question_chapter_fingerprint', 'chapter_id', 'question_fingerprint'),
+        db.Index('ix_quiz_question_media_url', 'media_url'), # Is a shared media file still used? (media cleanup)
+    )
 
     def __repr__(self):
         return f"<QuizQuestion {self.question_text[:30]}>"
 
+# Keep the fingerprint in sync for questions saved through the ORM (bulk imports set it themselves)
+@event.listens_for(QuizQuestion, 'before_insert')
+@event.listens_for(QuizQuestion, 'before_update')
+def _set_question_fingerprint(mapper, connection, question):
+    if question.question_text is not None:
+        question.question_fingerprint = fingerprint_question_text(question.question_text)
+
+class QuestionSimilarityBucket(db.Model):
+    # LSH buckets of a question's MinHash signature (utils/near_duplicates.py): questions sharing a
+    # bucket are near-duplicate candidates. One row per (bucket, question), BANDS rows per question.
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_question.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_question_similarity_bucket_question_id', 'question_id'), # Re-index/delete of one question
+    )
+
+    def __repr__(self):
+        return f"<QuestionSimilarityBucket {self.bucket} -> {self.question_id}>"
+
+class MediaAsset(db.Model):
+    # One stored file per distinct upload content (utils/media.py); questions that reuse an image share its URL
+    id = db.Column(db.Integer, primary_key=True)
+    backend = db.Column(db.String(20), nullable=False) # 'cloudinary' or 'local'
+    sha256 = db.Column(db.String(64), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('backend', 'sha256', name='uq_media_asset_backend_sha256'), # Upload dedup lookup
+        db.Index('ix_media_asset_url', 'url'),
+    )
+
+    def __repr__(self):
+        return f"<MediaAsset {self.backend}:{self.sha256[:12]}>"
+
 class SiteSetting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     setting_key = db.Column(db.String(100), unique=True, nullable=False)
@@ -93,9 +159,77 @@ class UserQuizAttempt(db.Model):
     score = db.Column(db.Float, nullable=False)
     total_questions = db.Column(db.Integer, nullable=False)
     attempt_date = db.Column(db.DateTime, default=datetime.utcnow)
-    # Store a JSON representation of questions/answers from this attempt for answer sheet
-    # SQLite doesn't natively support JSON type, so store as Text and parse
-    answered_questions_data = db.Column(db.Text, nullable=True)
+    # Answered question ids + chosen options, packed by utils.attempt_codec (see its layout comment)
+    answer_sheet = db.Column(db.LargeBinary, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_user_quiz_attempt_user_chapter', 'user_id', 'chapter_id'),
+        db.Index('ix_user_quiz_attempt_chapter_id', 'chapter_id'),
+    )
+
+    def __repr__(self):
+        return f"<Attempt User:{self.user_id} Chapter:{self.chapter_id} Score:{self.score}>"
+
+class QuizAttemptToken(db.Model):
+    # An opened quiz (routes/user_routes.py): quiz_play stores one per user and chapter, and quiz_submit
+    # scores a sheet only if its conditional DELETE removed the row, so an attempt is credited once
+    token = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_quiz_attempt_token_user_chapter', 'user_id', 'chapter_id'), # Reopening replaces the open attempt
+    )
+
+    def __repr__(self):
+        return f"<QuizAttemptToken User:{self.user_id} Chapter:{self.chapter_id}>"
+
+class LeaderboardSnapshot(db.Model):
+    # One row per leaderboard ('class:Class 9', 'chapter:12'); see utils/leaderboard.py
+    board = db.Column(db.String(100), primary_key=True)
+    through_attempt_id = db.Column(db.Integer, nullable=False, default=0) # Last UserQuizAttempt.id included
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    entries = db.Column(db.LargeBinary, nullable=False) # Packed user ids + points
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<LeaderboardSnapshot {self.board} ({self.entry_count} entries)>"
+
+class BackgroundJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False) # e.g. 'question_import'
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, done, failed
+    lock_key = db.Column(db.String(100), nullable=True) # Jobs sharing a lock_key never run at the same time
+    # JSON text (SQLite has no native JSON type)
+    payload = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    progress = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True) # Renewed by the running worker; stale = lease expired
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Times claimed
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_background_job_status_id', 'status', 'id'), # Queue polling
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
 
     def __repr__(self):
-        return f"<Attempt User:{self.user_id} Chapter:{self.chapter_id} Score:{self.score}>"
\ No newline at end of file
+        return f"<BackgroundJob {self.id} {self.kind} {self.status}>"
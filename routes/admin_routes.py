@@ -1,18 +1,56 @@
 import os
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+import uuid
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_required, current_user
-from models import AdminUser, Subject, Chapter, QuizQuestion, SiteSetting, User # Import User model for management
-from database import db
-from forms import SubjectForm, ChapterForm, QuizUploadForm, QuestionForm, SiteSettingForm
-from utils.excel_parser import parse_quiz_excel
+from models import AdminUser, Subject, Chapter, QuizQuestion, SiteSetting, User, UserQuizAttempt, BackgroundJob # Import User model for management
+from database import db, REPLICA_BIND
+from sqlalchemy import select
+from forms import SubjectForm, ChapterForm, QuizUploadForm, QuestionForm, SiteSettingForm, CLASS_CHOICES
+from utils.job_queue import enqueue_job
+from utils.media_cleanup import MediaCleanup
+import utils.question_importer # Registers the 'question_import' job handler
 from utils import file_upload_handler # Correct way to import the module for allowed_file
+from utils.settings_cache import invalidate_settings_cache, settings_cache_stats
+from utils.class_catalog import invalidate_class_catalog, class_catalog_stats
+from utils.quiz_sets import invalidate_quiz_sets, quiz_set_stats
+from utils.leaderboard import leaderboard_stats
+from utils.pagination import keyset_page, prefix_filter, invalidate_listing_counts, listing_count_stats
+from utils.question_search import question_listing_query, search_terms
+from utils.identity import identity_cache_stats
+from utils.page_cache import bump_content_version, page_cache_stats
+from utils.media import save_media, media_stats
+from utils.request_metrics import endpoint_report, recent_slow_queries
+from utils.db_pool import database_health, pool_stats
+from utils.db_routing import routing_stats
 from werkzeug.utils import secure_filename # Import secure_filename here if used in this file
 
 admin_bp = Blueprint('admin', __name__)
 
+# --- Helper to drop caches derived from subjects/chapters/questions after an admin commit ---
+def content_changed():
+    invalidate_class_catalog()
+    invalidate_quiz_sets()
+    invalidate_listing_counts()
+    bump_content_version() # New ETags for public pages; cached pages/fragments are re-rendered
+
+# --- Helpers for the paginated admin listings (filters come from the query string) ---
+def _page_size():
+    return current_app.config.get('ADMIN_PAGE_SIZE', 50)
+
+def _active_filter():
+    """?active=1 / ?active=0 -> True / False; anything else -> no filter."""
+    return {'1': True, '0': False}.get(request.args.get('active', ''))
+
+def _subject_choices():
+    return db.session.execute(select(Subject.id, Subject.name).order_by(Subject.name)).all()
+
+def _has_attempts(condition):
+    """Whether any UserQuizAttempt matches condition (attempts have no cascade; their chapters must stay)."""
+    return db.session.scalar(select(select(UserQuizAttempt.id).where(condition).exists()))
+
 # --- Helper function to check if current user is admin ---
 def is_admin():
-    return current_user.is_authenticated and isinstance(current_user, AdminUser)
+    return current_user.is_authenticated and current_user.is_admin
 
 # --- Admin Dashboard and Root of Admin Blueprint ---
 # This single route handles both /admin/ and /admin/dashboard
@@ -50,11 +88,20 @@ def manage_subjects():
             new_subject = Subject(name=subject_name, is_active=is_active)
             db.session.add(new_subject)
             db.session.commit()
+            content_changed()
             flash('বিষয় সফলভাবে যোগ করা হয়েছে!', 'success')
             return redirect(url_for('admin.manage_subjects'))
     
-    subjects = Subject.query.all()
-    return render_template('admin/manage_subjects.html', subjects=subjects, form=form)
+    name_prefix = request.args.get('q', '').strip()
+    active = _active_filter()
+    query = select(Subject.id, Subject.name, Subject.is_active)
+    if name_prefix:
+        query = query.where(prefix_filter(Subject.name, name_prefix))
+    if active is not None:
+        query = query.where(Subject.is_active.is_(active))
+    page = keyset_page(query, [Subject.name, Subject.id], after=request.args.get('after'), before=request.args.get('before'),
+                       limit=_page_size(), count_key=('subjects', name_prefix, active))
+    return render_template('admin/manage_subjects.html', page=page, form=form)
 
 @admin_bp.route('/subjects/edit/<int:subject_id>', methods=['GET', 'POST'])
 @login_required
@@ -68,6 +115,7 @@ def edit_subject(subject_id):
         subject.name = form.name.data
         subject.is_active = form.is_active.data
         db.session.commit()
+        content_changed()
         flash('বিষয় সফলভাবে আপডেট করা হয়েছে!', 'success')
         return redirect(url_for('admin.manage_subjects'))
     
@@ -79,8 +127,18 @@ def delete_subject(subject_id):
     if not is_admin(): return redirect(url_for('auth.login'))
     
     subject = Subject.query.get_or_404(subject_id)
+    # Students' attempts (and the points they earned) reference the chapters; keep those, deactivate instead
+    if _has_attempts(UserQuizAttempt.chapter_id.in_(select(Chapter.id).where(Chapter.subject_id == subject.id))):
+        flash('এই বিষয়ের অধ্যায়ে শিক্ষার্থীদের কুইজের ফলাফল আছে, তাই এটি মুছে ফেলা যাবে না। এর বদলে বিষয়টি নিষ্ক্রিয় করুন।', 'danger')
+        return redirect(url_for('admin.manage_subjects'))
+    # Collect media of the questions removed by the cascade; delete it only after the commit
+    media_urls = db.session.execute(
+        select(QuizQuestion.media_url).join(Chapter).where(Chapter.subject_id == subject.id, QuizQuestion.media_url.isnot(None))
+    ).scalars().all()
     db.session.delete(subject)
     db.session.commit()
+    content_changed()
+    MediaCleanup().add_urls(media_urls).schedule()
     flash('বিষয় সফলভাবে মুছে ফেলা হয়েছে!', 'info')
     return redirect(url_for('admin.manage_subjects'))
 
@@ -91,7 +149,8 @@ def manage_chapters():
     if not is_admin(): return redirect(url_for('auth.login'))
     
     form = ChapterForm()
-    form.subject_id.choices = [(s.id, s.name) for s in Subject.query.order_by(Subject.name).all()]
+    subject_choices = _subject_choices()
+    form.subject_id.choices = [(subject_id, name) for subject_id, name in subject_choices]
     form.subject_id.choices.insert(0, (0, 'একটি বিষয় নির্বাচন করুন')) # Add a default placeholder
 
     if form.validate_on_submit():
@@ -107,11 +166,29 @@ def manage_chapters():
             new_chapter = Chapter(name=chapter_name, subject_id=subject_id, for_class=for_class, is_active=is_active)
             db.session.add(new_chapter)
             db.session.commit()
+            content_changed()
             flash('অধ্যায় সফলভাবে যোগ করা হয়েছে!', 'success')
             return redirect(url_for('admin.manage_chapters'))
     
-    chapters = Chapter.query.order_by(Chapter.subject_id, Chapter.name).all()
-    return render_template('admin/manage_chapters.html', chapters=chapters, form=form)
+    name_prefix = request.args.get('q', '').strip()
+    for_class = request.args.get('class', '')
+    subject_id = request.args.get('subject_id', type=int)
+    active = _active_filter()
+    query = select(Chapter.id, Chapter.name, Chapter.subject_id, Chapter.for_class, Chapter.is_active,
+                   Subject.name.label('subject_name')).join(Subject, Subject.id == Chapter.subject_id)
+    if name_prefix:
+        query = query.where(prefix_filter(Chapter.name, name_prefix))
+    if for_class:
+        query = query.where(Chapter.for_class == for_class)
+    if subject_id:
+        query = query.where(Chapter.subject_id == subject_id)
+    if active is not None:
+        query = query.where(Chapter.is_active.is_(active))
+    page = keyset_page(query, [Chapter.subject_id, Chapter.name, Chapter.id], after=request.args.get('after'),
+                       before=request.args.get('before'), limit=_page_size(),
+                       count_key=('chapters', name_prefix, for_class, subject_id, active))
+    return render_template('admin/manage_chapters.html', page=page, form=form, subject_choices=subject_choices,
+                           class_choices=CLASS_CHOICES)
 
 @admin_bp.route('/chapters/edit/<int:chapter_id>', methods=['GET', 'POST'])
 @login_required
@@ -120,7 +197,7 @@ def edit_chapter(chapter_id):
     
     chapter = Chapter.query.get_or_404(chapter_id)
     form = ChapterForm(obj=chapter)
-    form.subject_id.choices = [(s.id, s.name) for s in Subject.query.order_by(Subject.name).all()]
+    form.subject_id.choices = [(subject_id, name) for subject_id, name in _subject_choices()]
     
     if form.validate_on_submit():
         chapter.name = form.name.data
@@ -128,6 +205,7 @@ def edit_chapter(chapter_id):
         chapter.for_class = form.for_class.data
         chapter.is_active = form.is_active.data
         db.session.commit()
+        content_changed()
         flash('অধ্যায় সফলভাবে আপডেট করা হয়েছে!', 'success')
         return redirect(url_for('admin.manage_chapters'))
     
@@ -139,8 +217,17 @@ def delete_chapter(chapter_id):
     if not is_admin(): return redirect(url_for('auth.login'))
     
     chapter = Chapter.query.get_or_404(chapter_id)
+    if _has_attempts(UserQuizAttempt.chapter_id == chapter.id):
+        flash('এই অধ্যায়ে শিক্ষার্থীদের কুইজের ফলাফল আছে, তাই এটি মুছে ফেলা যাবে না। এর বদলে অধ্যায়টি নিষ্ক্রিয় করুন।', 'danger')
+        return redirect(url_for('admin.manage_chapters'))
+    # Collect media of the questions removed by the cascade; delete it only after the commit
+    media_urls = db.session.execute(
+        select(QuizQuestion.media_url).where(QuizQuestion.chapter_id == chapter.id, QuizQuestion.media_url.isnot(None))
+    ).scalars().all()
     db.session.delete(chapter)
     db.session.commit()
+    content_changed()
+    MediaCleanup().add_urls(media_urls).schedule()
     flash('অধ্যায় সফলভাবে মুছে ফেলা হয়েছে!', 'info')
     return redirect(url_for('admin.manage_chapters'))
 
@@ -151,8 +238,8 @@ def upload_quiz():
     if not is_admin(): return redirect(url_for('auth.login'))
     
     form = QuizUploadForm()
-    form.subject_id.choices = [(s.id, s.name) for s in Subject.query.order_by(Subject.name).all()]
-    form.chapter_id.choices = [(c.id, c.name) for c in Chapter.query.order_by(Chapter.name).all()]
+    form.subject_id.choices = [(subject_id, name) for subject_id, name in _subject_choices()]
+    form.chapter_id.choices = [(chapter_id, name) for chapter_id, name in db.session.execute(select(Chapter.id, Chapter.name).order_by(Chapter.name))]
     
     if form.validate_on_submit():
         subject_id = form.subject_id.data
@@ -171,79 +258,35 @@ def upload_quiz():
             return render_template('admin/upload_quiz.html', form=form)
         
         # Corrected: Call allowed_file from file_upload_handler module
-        if not file_upload_handler.allowed_file(excel_file.filename):
-            flash('শুধুমাত্র .xlsx ফাইল অনুমোদিত।', 'danger')
+        if not file_upload_handler.allowed_file(excel_file.filename, 'ALLOWED_QUIZ_EXTENSIONS'):
+            flash('শুধুমাত্র .xlsx অথবা .csv ফাইল অনুমোদিত।', 'danger')
             return render_template('admin/upload_quiz.html', form=form)
 
-        try:
-            # Save locally temporarily to parse
-            from werkzeug.utils import secure_filename # Import secure_filename locally for this function
-            temp_filepath = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'], secure_filename(excel_file.filename))
-            excel_file.save(temp_filepath)
-            
-            # Parse the excel file
-            questions_data = parse_quiz_excel(temp_filepath)
-            
-            # Add questions to DB
-            for q_data in questions_data:
-                # Check if question with same text/quiz_number already exists for this chapter/difficulty
-                # You might need a more robust uniqueness check or allow duplicates
-                existing_question = QuizQuestion.query.filter_by(
-                    chapter_id=chapter.id, 
-                    question_text=q_data['question_text']
-                ).first()
-
-                if existing_question:
-                    # Update existing question
-                    existing_question.option1 = q_data['option1']
-                    existing_question.option2 = q_data['option2']
-                    existing_question.option3 = q_data['option3']
-                    existing_question.option4 = q_data['option4']
-                    existing_question.correct_option_number = q_data['correct_option_number']
-                    existing_question.point_value = q_data['point_value']
-                    existing_question.negative_mark = q_data['negative_mark']
-                    
-                    # Handle media_url update/deletion if question is updated
-                    if existing_question.media_url and q_data['media_url'] is None: # Old media exists, new is none
-                        file_upload_handler.delete_file_from_cloudinary(existing_question.media_url)
-                        existing_question.media_url = None
-                    elif q_data['media_url']: # New media provided or updated
-                        # If old exists and is different, delete old first
-                        if existing_question.media_url and existing_question.media_url != q_data['media_url']:
-                            file_upload_handler.delete_file_from_cloudinary(existing_question.media_url)
-                        existing_question.media_url = q_data['media_url'] # Use provided URL directly
-                else:
-                    new_question = QuizQuestion(
-                        chapter_id=chapter.id,
-                        question_text=q_data['question_text'],
-                        option1=q_data['option1'],
-                        option2=q_data['option2'],
-                        option3=q_data['option3'],
-                        option4=q_data['option4'],
-                        correct_option_number=q_data['correct_option_number'],
-                        point_value=q_data['point_value'],
-                        negative_mark=q_data['negative_mark'],
-                        media_url=q_data['media_url']
-                        # difficulty (from excel or default?) - needs decision if from excel
-                        # Default difficulty as 'সহজ' for new questions
-                        # or you can add a difficulty column to Excel
-                    )
-                    db.session.add(new_question)
-            
-            db.session.commit()
-            flash(f'{len(questions_data)} টি প্রশ্ন সফলভাবে আপলোড করা হয়েছে!', 'success')
-
-        except Exception as e:
-            db.session.rollback() # Rollback changes on error
-            flash(f'প্রশ্ন আপলোডে ত্রুটি: {e}', 'danger')
-        finally:
-            # Clean up temporary local file
-            if os.path.exists(temp_filepath):
-                os.remove(temp_filepath)
-            
-            return redirect(url_for('admin.upload_quiz'))
+        # Save the upload where background workers can read it (not under static/, which is served
+        # publicly); the job deletes it when done
+        import_folder = current_app.config.get('IMPORT_STAGING_DIR') or os.path.join(current_app.instance_path, 'imports')
+        os.makedirs(import_folder, exist_ok=True)
+        saved_filepath = os.path.join(import_folder, f"{uuid.uuid4().hex}_{secure_filename(excel_file.filename)}")
+        excel_file.save(saved_filepath)
+
+        # Parsing and DB writes run in the background so big sheets don't hit the request timeout
+        job = enqueue_job('question_import', {
+            'chapter_id': chapter.id,
+            'file_path': saved_filepath,
+            'chunk_size': current_app.config['QUIZ_IMPORT_CHUNK_SIZE'],
+        }, lock_key=f"chapter:{chapter.id}") # Imports into one chapter must not interleave
+        flash(f'ফাইলটি প্রসেসিং এর জন্য জমা হয়েছে (জব #{job.id})।', 'info')
+        return redirect(url_for('admin.upload_quiz', job_id=job.id))
 
-    return render_template('admin/upload_quiz.html', form=form)
+    return render_template('admin/upload_quiz.html', form=form, job_id=request.args.get('job_id', type=int))
+
+# --- Background Job Status (polled by the upload page) ---
+@admin_bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    if not is_admin(): return redirect(url_for('auth.login'))
+    job = BackgroundJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
 
 # --- Site Settings (Notice & Theme) ---
 @admin_bp.route('/site_settings', methods=['GET', 'POST'])
@@ -277,22 +320,146 @@ def site_settings():
             db.session.add(new_theme_setting)
         
         db.session.commit()
+        invalidate_settings_cache() # Drop this worker's cached copy; other workers refresh within SETTINGS_CACHE_TTL
+        bump_content_version() # Notice/theme are part of every public page
         flash('সাইট সেটিংস সফলভাবে আপডেট করা হয়েছে!', 'success')
         return redirect(url_for('admin.site_settings'))
             
     return render_template('admin/site_settings.html', form=form)
 
+# --- Cache counters for this worker (useful to confirm caching under gunicorn) ---
+@admin_bp.route('/cache_stats')
+@login_required
+def cache_stats():
+    if not is_admin(): return redirect(url_for('auth.login'))
+    return jsonify(settings=settings_cache_stats(), class_catalog=class_catalog_stats(), quiz_sets=quiz_set_stats(),
+                   leaderboards=leaderboard_stats(), listing_counts=listing_count_stats(), identity=identity_cache_stats(),
+                   page_cache=page_cache_stats(), media=media_stats())
+
+# --- Request timings for this worker: latency per endpoint, SQL and template time, slow queries ---
+@admin_bp.route('/metrics')
+@login_required
+def request_metrics():
+    if not is_admin(): return redirect(url_for('auth.login'))
+    return render_template('admin/metrics.html', endpoints=endpoint_report(), slow_queries=recent_slow_queries(),
+                           slow_query_ms=current_app.config.get('SLOW_QUERY_MS'))
+
+# --- Database pool for this worker: checked-out/overflow connections, checkout waits, timeouts ---
+@admin_bp.route('/db_pool')
+@login_required
+def db_pool_stats():
+    if not is_admin(): return redirect(url_for('auth.login'))
+    health, status = database_health()
+    replica = db.engines.get(REPLICA_BIND)
+    return jsonify(health=health, pool=pool_stats(db.engine), replica_pool=pool_stats(replica) if replica else None,
+                   read_routing=routing_stats(), settings=current_app.config.get('DB_POOL_SETTINGS')), status
+
 # --- User Management (Placeholder, similar to subject/chapter) ---
 @admin_bp.route('/users')
 @login_required
 def manage_users():
     if not is_admin(): return redirect(url_for('auth.login'))
-    
-    users = User.query.all()
-    return render_template('admin/manage_users.html', users=users)
-
-# Add routes for add/edit/delete individual questions if needed (not from excel)
-# @admin_bp.route('/questions') ...
-# @admin_bp.route('/questions/add') ...
-# @admin_bp.route('/questions/edit/<int:question_id>') ...
-# @admin_bp.route('/questions/delete/<int:question_id>') ...
\ No newline at end of file
+
+    username_prefix = request.args.get('q', '').strip()
+    selected_class = request.args.get('class', '')
+    query = select(User.id, User.username, User.email, User.current_level, User.total_points, User.selected_class)
+    if username_prefix:
+        query = query.where(prefix_filter(User.username, username_prefix))
+    if selected_class:
+        query = query.where(User.selected_class == selected_class)
+    page = keyset_page(query, [User.id], after=request.args.get('after'), before=request.args.get('before'),
+                       limit=_page_size(), count_key=('users', username_prefix, selected_class))
+    return render_template('admin/manage_users.html', page=page,
+                           class_choices=CLASS_CHOICES)
+
+# --- Question Bank (browse/search + single-question add/edit/delete) ---
+def _chapter_choices():
+    return [(chapter_id, f"{subject_name} — {chapter_name} ({for_class or 'N/A'})") for chapter_id, chapter_name, for_class, subject_name in db.session.execute(
+        select(Chapter.id, Chapter.name, Chapter.for_class, Subject.name).join(Subject).order_by(Subject.name, Chapter.name)
+    )]
+
+def _save_question_form(form, question):
+    """Copies the form into the question and uploads a new media file if one was given. Returns (saved, replaced media URL)."""
+    for field in ('chapter_id', 'question_text', 'option1', 'option2', 'option3', 'option4',
+                  'correct_option_number', 'point_value', 'negative_mark', 'difficulty'):
+        setattr(question, field, getattr(form, field).data)
+    replaced_media_url = None
+    if form.media_file.data:
+        media = save_media(form.media_file.data, folder_name='question_media') # MEDIA_BACKEND, deduplicated, with dimensions
+        if not media:
+            return False, None
+        replaced_media_url, question.media_url = question.media_url, media.url
+        question.media_width, question.media_height = media.width, media.height
+    return True, replaced_media_url
+
+@admin_bp.route('/questions')
+@login_required
+def manage_questions():
+    if not is_admin(): return redirect(url_for('auth.login'))
+
+    search = request.args.get('q', '').strip()
+    chapter_id = request.args.get('chapter_id', type=int)
+    query, order_columns = question_listing_query(search, chapter_id)
+    page = keyset_page(query, order_columns, after=request.args.get('after'), before=request.args.get('before'),
+                       limit=_page_size(), count_key=('questions', tuple(search_terms(search)), chapter_id))
+    return render_template('admin/manage_questions.html', page=page, chapter_choices=_chapter_choices())
+
+@admin_bp.route('/questions/add', methods=['GET', 'POST'])
+@login_required
+def add_question():
+    if not is_admin(): return redirect(url_for('auth.login'))
+
+    form = QuestionForm()
+    form.chapter_id.choices = _chapter_choices()
+    if request.method == 'GET':
+        form.chapter_id.data = request.args.get('chapter_id', type=int)
+    if form.validate_on_submit():
+        question = QuizQuestion()
+        saved, _ = _save_question_form(form, question)
+        if not saved:
+            flash('মিডিয়া ফাইল আপলোড করা যায়নি।', 'danger')
+            return render_template('admin/edit_question.html', form=form, question=None)
+        db.session.add(question)
+        db.session.commit()
+        content_changed()
+        flash('প্রশ্ন সফলভাবে যোগ করা হয়েছে!', 'success')
+        return redirect(url_for('admin.manage_questions', chapter_id=question.chapter_id))
+
+    return render_template('admin/edit_question.html', form=form, question=None)
+
+@admin_bp.route('/questions/edit/<int:question_id>', methods=['GET', 'POST'])
+@login_required
+def edit_question(question_id):
+    if not is_admin(): return redirect(url_for('auth.login'))
+
+    question = QuizQuestion.query.get_or_404(question_id)
+    form = QuestionForm(obj=question)
+    form.chapter_id.choices = _chapter_choices()
+    if form.validate_on_submit():
+        saved, replaced_media_url = _save_question_form(form, question)
+        if not saved:
+            flash('মিডিয়া ফাইল আপলোড করা যায়নি।', 'danger')
+            return render_template('admin/edit_question.html', form=form, question=question)
+        db.session.commit()
+        content_changed()
+        if replaced_media_url:
+            MediaCleanup().add_urls([replaced_media_url]).schedule()
+        flash('প্রশ্ন সফলভাবে আপডেট করা হয়েছে!', 'success')
+        return redirect(url_for('admin.manage_questions', chapter_id=question.chapter_id))
+
+    return render_template('admin/edit_question.html', form=form, question=question)
+
+@admin_bp.route('/questions/delete/<int:question_id>', methods=['POST'])
+@login_required
+def delete_question(question_id):
+    if not is_admin(): return redirect(url_for('auth.login'))
+
+    question = QuizQuestion.query.get_or_404(question_id)
+    chapter_id, media_url = question.chapter_id, question.media_url
+    db.session.delete(question)
+    db.session.commit()
+    content_changed()
+    if media_url:
+        MediaCleanup().add_urls([media_url]).schedule()
+    flash('প্রশ্ন সফলভাবে মুছে ফেলা হয়েছে!', 'info')
+    return redirect(url_for('admin.manage_questions', chapter_id=chapter_id))
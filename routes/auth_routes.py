@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
-from models import User, AdminUser # Ensure these models are correctly imported
+from models import User # Ensure these models are correctly imported
 from forms import LoginForm, RegistrationForm # Ensure these forms are correctly imported
 from database import db # Ensure db instance is correctly imported
-from werkzeug.security import generate_password_hash # Used for hashing password during registration
+from utils.passwords import PasswordHashBusy, hash_password # Hashing runs on a bounded thread pool
+from utils.identity import authenticate, invalidate_principal
 
 from flask_login import login_user, logout_user, login_required, current_user
 
@@ -13,32 +14,28 @@ auth_bp = Blueprint('auth', __name__)
 def login():
     # If user is already authenticated, redirect them based on their role
     if current_user.is_authenticated:
-        # Check if logged in user is admin by type (more robust)
-        if isinstance(current_user, AdminUser):
-            return redirect(url_for('admin.dashboard')) # Assuming admin dashboard route exists
-        # Check if logged in user is regular user by type
-        elif isinstance(current_user, User):
-            return redirect(url_for('user.dashboard')) # Assuming user dashboard route exists
+        return redirect(url_for('admin.dashboard' if current_user.is_admin else 'user.dashboard'))
     
     form = LoginForm() # Create an instance of the login form
     if form.validate_on_submit(): # Process form submission if valid
         username = form.username.data
         password = form.password.data
 
-        # Try logging in as regular user first
-        user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
-            login_user(user) # Log in the user
-            flash('ব্যবহারকারী হিসেবে লগইন সফল!', 'success') # Success message
-            return redirect(url_for('user.dashboard')) # Redirect to user dashboard
-        
-        # If not a regular user, try logging in as an admin
-        admin_user = AdminUser.query.filter_by(username=username).first()
-        if admin_user and admin_user.check_password(password):
-            login_user(admin_user) # Log in the admin
+        # One lookup over users and admins (a user account is tried first)
+        try:
+            principal = authenticate(username, password)
+        except PasswordHashBusy:
+            flash('সার্ভার এখন ব্যস্ত, কিছুক্ষণ পর আবার চেষ্টা করুন।', 'danger')
+            return render_template('auth/login.html', form=form), 503
+        if principal and principal.is_admin:
+            login_user(principal) # Stored as 'admin_<id>' in the session
             flash('অ্যাডমিন হিসেবে লগইন সফল!', 'success') # Success message
             return redirect(url_for('admin.dashboard')) # Redirect to admin dashboard
-        
+        if principal:
+            login_user(principal) # Log in the user
+            flash('ব্যবহারকারী হিসেবে লগইন সফল!', 'success') # Success message
+            return redirect(url_for('user.dashboard')) # Redirect to user dashboard
+
         # If neither user type found or password incorrect
         flash('ভুল ইউজারনেম বা পাসওয়ার্ড।', 'danger') # Error message
     return render_template('auth/login.html', form=form) # Render login page
@@ -60,8 +57,12 @@ def register():
         elif existing_email:
             flash('এই ইমেইলটি ইতিমধ্যে ব্যবহৃত হয়েছে।', 'danger')
         else:
-            # Hash the password before storing
-            hashed_password = generate_password_hash(form.password.data, method='pbkdf2:sha256')
+            # Hash the password before storing (method/cost from PASSWORD_HASH_METHOD)
+            try:
+                hashed_password = hash_password(form.password.data)
+            except PasswordHashBusy:
+                flash('সার্ভার এখন ব্যস্ত, কিছুক্ষণ পর আবার চেষ্টা করুন।', 'danger')
+                return render_template('auth/register.html', form=form), 503
             
             # Create a new User object
             new_user = User(
@@ -79,6 +80,7 @@ def register():
 @auth_bp.route('/logout')
 @login_required # Requires user to be logged in to access this route
 def logout():
+    invalidate_principal(current_user.id, current_user.is_admin) # Don't keep the session's principal around
     logout_user() # Log out the current user
     flash('আপনি লগআউট করেছেন।', 'info') # Info message
     return redirect(url_for('auth.login')) # Redirect to login page
\ No newline at end of file
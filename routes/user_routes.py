@@ -1,35 +1,189 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+import logging
+import secrets
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, abort, current_app
 from flask_login import login_required, current_user
-from models import User, AdminUser, Subject, Chapter # Ensure AdminUser is imported if used in dashboard check
+from models import User, Subject, Chapter, UserQuizAttempt, QuizAttemptToken
 from database import db # Ensure db is imported
+from utils.class_catalog import get_class_catalog
+from utils.quiz_sets import get_quiz_set
+from utils.scoring import record_attempts
+from utils.attempt_codec import AnswerSheetDecodeError, decode_answer_sheet
+from utils.leaderboard import get_leaderboards, sync_leaderboards, class_board, chapter_board
+from utils.db_routing import replica_reads
+from sqlalchemy import delete, select
 
 user_bp = Blueprint('user', __name__)
+logger = logging.getLogger(__name__)
 
 @user_bp.route('/dashboard')
 @login_required # Requires user to be logged in
+@replica_reads # Read-only: the replica, when configured
 def dashboard():
     # If the user is an AdminUser but somehow lands here, redirect to admin dashboard
     # This check ensures that only regular 'User' type can access this specific dashboard.
-    if isinstance(current_user, AdminUser): # Check if it's explicitly an AdminUser object
+    if current_user.is_admin:
         flash('অ্যাডমিন ড্যাশবোর্ডে প্রবেশ করুন।', 'info')
         return redirect(url_for('admin.dashboard')) # Redirect to admin dashboard route
 
-    # Logic for regular user dashboard
-    user_subjects = []
-    user_chapters = [] # Chapters relevant to user's selected class
-
-    if current_user.selected_class:
-        # Get chapters for the user's class that are active
-        user_chapters = Chapter.query.filter_by(for_class=current_user.selected_class, is_active=True).all()
-        
-        # Get unique subjects for these chapters
-        seen_subject_ids = set()
-        for chapter in user_chapters:
-            # Ensure chapter.subject is not None and subject is active before adding
-            if chapter.subject and chapter.subject.is_active and chapter.subject.id not in seen_subject_ids:
-                user_subjects.append(chapter.subject) # Append the Subject object
-                seen_subject_ids.add(chapter.subject.id)
-
-    return render_template('user_dashboard.html', user_subjects=user_subjects, user_chapters=user_chapters)
-
-# Add more user-specific routes here later (e.g., quiz play, results)
\ No newline at end of file
+    # Points, level and class change during play, so they come from the row, not the cached principal
+    account = db.session.get(User, current_user.id)
+    # Subjects -> chapters for the user's class, from the cached catalog (one query per class, not per chapter)
+    user_subjects = get_class_catalog(account.selected_class) if account.selected_class else []
+
+    return render_template('user_dashboard.html', account=account, user_subjects=user_subjects)
+
+# --- Quiz Play ---
+# The quiz page loads its questions from quiz_questions (a cached, pre-serialized set shuffled with a
+# per-attempt seed kept in the session) and posts the whole answer sheet once to quiz_submit.
+# The session also carries the attempt's QuizAttemptToken; the row, not the cookie, makes it single-use.
+
+def _active_chapter_or_404(chapter_id):
+    chapter = Chapter.query.get_or_404(chapter_id)
+    if not chapter.is_active:
+        abort(404)
+    return chapter
+
+def _quiz_session_key(chapter_id):
+    return f"quiz_{chapter_id}"
+
+# Largest question id / option number accepted in a submitted sheet (question ids are 32-bit columns)
+_MAX_ANSWER_VALUE = 2**31 - 1
+
+@user_bp.route('/quiz/<int:chapter_id>')
+@login_required
+@replica_reads
+def quiz_play(chapter_id):
+    if current_user.is_admin:
+        return redirect(url_for('admin.dashboard'))
+    chapter = _active_chapter_or_404(chapter_id)
+    quiz_set = get_quiz_set(chapter_id)
+    if not len(quiz_set):
+        flash('এই অধ্যায়ে এখনো কোনো প্রশ্ন নেই।', 'info')
+        return redirect(url_for('user.dashboard'))
+
+    # New attempt: fresh shuffle seed, remembered until the sheet is submitted. Reopening the quiz
+    # replaces the user's open attempt for this chapter, so at most one of them can be scored.
+    token = secrets.token_hex(16)
+    db.session.execute(delete(QuizAttemptToken).where(QuizAttemptToken.user_id == current_user.id,
+                                                      QuizAttemptToken.chapter_id == chapter_id))
+    db.session.add(QuizAttemptToken(token=token, user_id=current_user.id, chapter_id=chapter_id))
+    db.session.commit()
+    session[_quiz_session_key(chapter_id)] = {'seed': secrets.randbits(32), 'version': quiz_set.version, 'token': token}
+    return render_template('quiz_play.html', chapter=chapter, question_count=len(quiz_set))
+
+@user_bp.route('/quiz/<int:chapter_id>/questions')
+@login_required
+@replica_reads
+def quiz_questions(chapter_id):
+    attempt = session.get(_quiz_session_key(chapter_id))
+    if not attempt:
+        return jsonify(error='No active attempt for this chapter.'), 409
+    quiz_set = get_quiz_set(chapter_id)
+    response = current_app.response_class(quiz_set.to_json(attempt['seed']), mimetype='application/json')
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+@user_bp.route('/quiz/<int:chapter_id>/submit', methods=['POST'])
+@login_required
+def quiz_submit(chapter_id):
+    if current_user.is_admin:
+        return jsonify(error='Admins cannot submit quizzes.'), 403
+    attempt = session.pop(_quiz_session_key(chapter_id), None)
+    if not attempt or not isinstance(attempt.get('token'), str):
+        return jsonify(error='No active attempt for this chapter.'), 409
+    _active_chapter_or_404(chapter_id)
+
+    payload = request.get_json(silent=True) or {}
+    raw_answers = (payload.get('answers') or {}) if isinstance(payload, dict) else None
+    if not isinstance(raw_answers, dict):
+        return jsonify(error='Invalid answer sheet.'), 400
+    try:
+        answers = {int(question_id): int(chosen) for question_id, chosen in raw_answers.items() if chosen is not None}
+    except (TypeError, ValueError):
+        return jsonify(error='Invalid answer sheet.'), 400
+    # Scoring packs ids and choices into fixed-width integers; ids outside the set are dropped there
+    if any(not 0 < question_id <= _MAX_ANSWER_VALUE or abs(chosen) > _MAX_ANSWER_VALUE
+           for question_id, chosen in answers.items()):
+        return jsonify(error='Invalid answer sheet.'), 400
+
+    # Consume the attempt: only the request whose DELETE removes the token row gets scored, so a
+    # replayed cookie or a concurrent second post of the same attempt is rejected
+    consumed = db.session.execute(delete(QuizAttemptToken).where(
+        QuizAttemptToken.token == attempt['token'], QuizAttemptToken.user_id == current_user.id,
+        QuizAttemptToken.chapter_id == chapter_id,
+    )).rowcount
+    if not consumed:
+        db.session.rollback()
+        return jsonify(error='This attempt was already submitted. Please start the quiz again.'), 409
+    quiz_set = get_quiz_set(chapter_id)
+    if attempt.get('version') != quiz_set.version:
+        # The questions changed after the quiz was opened; the sheet can't be scored against the old set
+        db.session.commit() # The attempt is used up either way
+        return jsonify(error='The questions of this chapter changed while you were answering. Please start the quiz again.'), 409
+    result = record_attempts(chapter_id, quiz_set.version, quiz_set.answer_key, [(current_user.id, answers)])[0]
+    db.session.commit()
+    sync_leaderboards() # So the player's new rank shows up immediately on this worker
+
+    return jsonify(result_url=url_for('user.quiz_result', attempt_id=result['attempt_id']), **result)
+
+@user_bp.route('/quiz/result/<int:attempt_id>')
+@login_required
+@replica_reads
+def quiz_result(attempt_id):
+    attempt = UserQuizAttempt.query.get_or_404(attempt_id)
+    if attempt.user_id != current_user.id or current_user.is_admin:
+        abort(404)
+
+    # Answer sheet: the chapter's current questions with this attempt's choices
+    try:
+        sheet = decode_answer_sheet(attempt.answer_sheet) if attempt.answer_sheet else None
+    except AnswerSheetDecodeError:
+        # Shown like a sheet from an older set: score only, no choices
+        logger.warning("Unreadable answer sheet on attempt %s", attempt.id, exc_info=True)
+        sheet = None
+    answers = sheet.as_dict() if sheet else {}
+    quiz_set = get_quiz_set(attempt.chapter_id)
+    answer_sheet = []
+    for question_id in quiz_set.question_ids:
+        question = quiz_set.question(question_id)
+        question['chosen_option'] = answers.get(question_id)
+        answer_sheet.append(question)
+
+    return render_template('quiz_result.html', attempt=attempt, answer_sheet=answer_sheet,
+                           set_changed=sheet is None or sheet.set_version != quiz_set.version)
+
+# --- Leaderboards ---
+# Served from the in-process rankings in utils/leaderboard.py (top-N and "my rank" without
+# ORDER BY over the user table); only the N usernames shown are read from the DB.
+
+def _render_leaderboard(board, title):
+    leaderboards = get_leaderboards()
+    top = leaderboards.top(board, current_app.config.get('LEADERBOARD_SIZE', 20))
+    user_ids = [user_id for _, user_id, _ in top]
+    usernames = dict(db.session.execute(select(User.id, User.username).where(User.id.in_(user_ids))).all()) if user_ids else {}
+    rows = [{'rank': rank, 'user_id': user_id, 'username': usernames.get(user_id, '?'), 'points': points}
+            for rank, user_id, points in top]
+    # Admin accounts live in a separate table, so their ids mean nothing on a user board
+    viewer_is_admin = current_user.is_admin
+    my_rank = None if viewer_is_admin else leaderboards.rank(board, current_user.id)
+    return render_template('leaderboard.html', title=title, rows=rows, my_rank=my_rank,
+                           total_players=leaderboards.size(board), viewer_is_admin=viewer_is_admin)
+
+@user_bp.route('/leaderboard')
+@login_required
+@replica_reads
+def class_leaderboard():
+    selected_class = request.args.get('class')
+    if not selected_class and not current_user.is_admin:
+        selected_class = db.session.scalar(select(User.selected_class).where(User.id == current_user.id))
+    if not selected_class:
+        flash('লিডারবোর্ড দেখতে প্রথমে একটি ক্লাস নির্বাচন করুন।', 'info')
+        return redirect(url_for('user.dashboard'))
+    return _render_leaderboard(class_board(selected_class), f"{selected_class} — মোট পয়েন্ট")
+
+@user_bp.route('/leaderboard/chapter/<int:chapter_id>')
+@login_required
+@replica_reads
+def chapter_leaderboard(chapter_id):
+    chapter = _active_chapter_or_404(chapter_id)
+    return _render_leaderboard(chapter_board(chapter_id), f"{chapter.name} — সেরা স্কোর")
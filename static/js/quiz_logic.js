@@ -0,0 +1,72 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const form = document.getElementById('quiz-form');
+    if (!form) return;
+    const container = document.getElementById('quiz-questions');
+    const submitButton = document.getElementById('quiz-submit');
+
+    const escapeHtml = (text) => String(text)
+        .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+
+    // Questions sit in the 1000px .container (full width on phones); srcset lets the browser pick
+    // the smallest copy that fills it, width/height reserve the space before the image arrives
+    const QUESTION_IMAGE_SIZES = '(max-width: 1000px) 100vw, 1000px';
+    const mediaImageHtml = (question) => {
+        const attributes = [`src="${escapeHtml(question.media_url)}"`];
+        if (question.media_srcset) {
+            attributes.push(`srcset="${escapeHtml(question.media_srcset)}"`, `sizes="${QUESTION_IMAGE_SIZES}"`);
+        }
+        if (question.media_width && question.media_height) {
+            attributes.push(`width="${Number(question.media_width)}"`, `height="${Number(question.media_height)}"`);
+        }
+        return `<p><img ${attributes.join(' ')} alt="" loading="lazy" style="max-width: 100%; height: auto;"></p>`;
+    };
+
+    // Load the (already shuffled) question set for this attempt
+    fetch(form.dataset.questionsUrl, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(data => {
+            container.innerHTML = data.questions.map((question, index) => `
+                <div class="quiz-question">
+                    <p><strong>${index + 1}.</strong> ${escapeHtml(question.question_text)}</p>
+                    ${question.media_url ? mediaImageHtml(question) : ''}
+                    ${question.options.map((option, optionIndex) => `
+                        <label style="display: block;">
+                            <input type="radio" name="q_${question.id}" value="${optionIndex + 1}">
+                            ${escapeHtml(option)}
+                        </label>`).join('')}
+                </div>`).join('');
+            submitButton.disabled = false;
+        })
+        .catch(() => {
+            container.innerHTML = '<p>প্রশ্ন লোড করতে ব্যর্থ। পেজটি আবার লোড করুন।</p>';
+        });
+
+    // Submit the whole answer sheet in one request
+    form.addEventListener('submit', (event) => {
+        event.preventDefault();
+        const answers = {};
+        form.querySelectorAll('input[type="radio"]:checked').forEach(input => {
+            answers[input.name.slice(2)] = Number(input.value);
+        });
+        submitButton.disabled = true;
+        fetch(form.dataset.submitUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answers: answers })
+        })
+            .then(response => response.json())
+            .then(result => {
+                if (result.result_url) {
+                    window.location.href = result.result_url;
+                } else {
+                    alert(result.error || 'উত্তর জমা দিতে ব্যর্থ।');
+                    submitButton.disabled = false;
+                }
+            })
+            .catch(() => {
+                alert('উত্তর জমা দিতে ব্যর্থ।');
+                submitButton.disabled = false;
+            });
+    });
+});
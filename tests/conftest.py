@@ -0,0 +1,62 @@
+"""
+Shared fixtures: every test gets its own app on a fresh SQLite database migrated to the latest
+revision, so nothing touches instance/site.db, Cloudinary or the checkout's upload folder.
+
+Run from the project root:
+    python -m pytest -q
+"""
+import os
+import pytest
+
+os.environ.setdefault('SECRET_KEY', 'test')
+
+from app import create_app
+from config import Config
+from database import db, upgrade_database
+from utils.class_catalog import invalidate_class_catalog
+from utils import leaderboard
+from utils.identity import invalidate_principal
+from utils.pagination import invalidate_listing_counts
+from utils.quiz_sets import invalidate_quiz_sets
+from utils.settings_cache import invalidate_settings_cache
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Factory for an app on tmp_path/primary.db; keyword arguments override Config values."""
+    apps = []
+    # The process-wide leaderboards would otherwise carry ids and points over from an earlier test
+    monkeypatch.setattr(leaderboard, '_leaderboards', leaderboard.Leaderboards())
+
+    def factory(**overrides):
+        settings = dict(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}", TESTING=True,
+                        WTF_CSRF_ENABLED=False, JOB_WORKERS=0, REQUEST_METRICS=False,
+                        CLOUDINARY_CLOUD_NAME='demo', DATABASE_REPLICA_URL=None)
+        settings.update(overrides)
+        app = create_app(type('TestConfig', (Config,), settings))
+        with app.app_context():
+            upgrade_database()
+        apps.append(app)
+        return app
+
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+    # Per-process caches were built from this test's database
+    invalidate_class_catalog()
+    invalidate_quiz_sets()
+    invalidate_settings_cache()
+    invalidate_listing_counts()
+    invalidate_principal()
+
+@pytest.fixture
+def app(make_app):
+    """
+    App with its context pushed for the whole test, for tests that use db directly. Test client
+    requests would share that context's g, so client tests build their app with make_app instead.
+    """
+    app = make_app()
+    with app.app_context():
+        yield app
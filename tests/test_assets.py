@@ -0,0 +1,55 @@
+import gzip
+import json
+import pytest
+from utils import assets
+from utils.assets import DIST_DIRECTORY, MANIFEST_NAME, asset_url, build_assets
+
+CSS = b'body { color: #333; }\n' * 200
+
+@pytest.fixture
+def static_folder(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'style.css').write_bytes(CSS)
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / 'logo.png').write_bytes(b'\x89PNG not really')
+    return tmp_path
+
+def test_build_fingerprints_and_compresses(static_folder):
+    manifest, original_bytes, encoded_bytes = build_assets(str(static_folder))
+    css = manifest['css/style.css']
+    assert css.startswith(f'{DIST_DIRECTORY}/css/style.') and css.endswith('.css')
+    assert (static_folder / css).read_bytes() == CSS
+    assert gzip.decompress((static_folder / (css + '.gz')).read_bytes()) == CSS
+    assert not (static_folder / (manifest['images/logo.png'] + '.gz')).exists() # Not a text asset
+    assert json.loads((static_folder / DIST_DIRECTORY / MANIFEST_NAME).read_text()) == manifest
+    assert encoded_bytes < original_bytes
+
+def test_rebuilding_after_a_change_keeps_the_old_build(static_folder):
+    old = build_assets(str(static_folder))[0]['css/style.css']
+    assert build_assets(str(static_folder))[0]['css/style.css'] == old # Same content, same name
+    (static_folder / 'css' / 'style.css').write_bytes(CSS + b'a { }')
+    new = build_assets(str(static_folder))[0]['css/style.css']
+    assert new != old
+    assert (static_folder / old).exists() # Pages rendered before the deploy still find it
+
+def test_built_assets_are_served_compressed_and_immutable(make_app, static_folder, monkeypatch):
+    manifest = build_assets(str(static_folder))[0]
+    app = make_app()
+    app.static_folder = str(static_folder)
+    monkeypatch.setattr(assets, '_manifest', manifest)
+    client = app.test_client()
+    with app.test_request_context():
+        url = asset_url('css/style.css')
+        assert url == f"/static/{manifest['css/style.css']}"
+        assert asset_url('js/unbuilt.js') == '/static/js/unbuilt.js' # Not in the manifest: plain file
+
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == CSS
+    assert compressed.mimetype == 'text/css'
+    assert 'immutable' in compressed.headers['Cache-Control'] and 'max-age=31536000' in compressed.headers['Cache-Control']
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == CSS
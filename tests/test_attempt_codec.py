@@ -0,0 +1,29 @@
+import pytest
+from utils.attempt_codec import AnswerSheetDecodeError, decode_answer_sheet, encode_answer_arrays, encode_answer_sheet
+
+def test_round_trip_sorts_by_question_id():
+    blob = encode_answer_sheet({30: 4, 7: 1, 2**32 - 1: 2}, set_version='0123456789abcdef')
+    sheet = decode_answer_sheet(blob)
+    assert sheet.set_version == '0123456789abcdef'
+    assert sheet.question_ids.tolist() == [7, 30, 2**32 - 1]
+    assert sheet.as_dict() == {7: 1, 30: 4, 2**32 - 1: 2}
+    assert len(blob) == 13 + 5 * 3
+
+def test_empty_sheet_without_a_set_version():
+    sheet = decode_answer_sheet(encode_answer_arrays([], []))
+    assert sheet.set_version is None
+    assert sheet.as_dict() == {}
+
+@pytest.mark.parametrize('blob', [
+    b'',
+    b'\x01' + bytes(8), # Shorter than the header
+    b'\x02' + bytes(12), # Unknown format
+    encode_answer_sheet({1: 1, 2: 2})[:-1], # Truncated
+    encode_answer_sheet({1: 1}) + b'\x00', # Trailing bytes
+])
+def test_malformed_blobs_raise_the_codec_error(blob):
+    with pytest.raises(AnswerSheetDecodeError):
+        decode_answer_sheet(blob)
+
+def test_the_codec_error_is_a_value_error():
+    assert issubclass(AnswerSheetDecodeError, ValueError)
@@ -0,0 +1,62 @@
+from utils.cache import TTLCache
+
+def test_loads_once_until_expired():
+    cache = TTLCache(ttl_seconds=60)
+    loads = []
+    for _ in range(3):
+        assert cache.get_or_load('key', lambda: loads.append(1) or len(loads)) == 1
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 1}
+
+def test_invalidate_during_a_load_discards_the_loaded_value():
+    cache = TTLCache(ttl_seconds=60)
+
+    def stale_loader():
+        cache.invalidate('key') # An admin edit commits while this load is still reading
+        return 'stale'
+
+    assert cache.get_or_load('key', stale_loader) == 'stale' # The caller still gets an answer
+    assert cache.get_or_load('key', lambda: 'fresh') == 'fresh'
+    assert cache.get_or_load('key', lambda: 'reloaded') == 'fresh'
+
+def test_invalidate_all_during_a_load_discards_the_loaded_value():
+    cache = TTLCache(ttl_seconds=60)
+
+    def stale_loader():
+        cache.invalidate()
+        return 'stale'
+
+    cache.get_or_load('key', stale_loader)
+    assert cache.stats()['size'] == 0
+
+def test_invalidating_another_key_during_a_load_keeps_the_loaded_value():
+    cache = TTLCache(ttl_seconds=60)
+
+    def loader():
+        cache.invalidate('other') # e.g. one user's principal dropped after a quiz submit
+        return 'value'
+
+    cache.get_or_load('key', loader)
+    assert cache.get_or_load('key', lambda: 'reloaded') == 'value'
+
+def test_a_failed_load_leaves_nothing_behind():
+    cache = TTLCache(ttl_seconds=60)
+
+    def failing_loader():
+        raise RuntimeError('database is down')
+
+    try:
+        cache.get_or_load('key', failing_loader)
+    except RuntimeError:
+        pass
+    assert cache.get_or_load('key', lambda: 'value') == 'value'
+    assert cache.stats()['size'] == 1 and not cache._loading
+
+def test_max_entries_evicts_the_least_recently_used_key():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.get_or_load('a', lambda: 1)
+    cache.get_or_load('b', lambda: 2)
+    cache.get_or_load('a', lambda: 'unused') # 'a' is now the most recently used
+    cache.set('c', 3)
+    assert cache.stats()['size'] == 2
+    assert cache.get_or_load('a', lambda: 'reloaded') == 1
+    assert cache.get_or_load('b', lambda: 'reloaded') == 'reloaded'
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+from database import db
+from models import Chapter, QuizQuestion, Subject
+from utils.class_catalog import get_class_catalog, invalidate_class_catalog
+
+def add_subject(name, chapters, is_active=True):
+    """chapters: (name, for_class, question count, is_active) tuples."""
+    subject = Subject(name=name, is_active=is_active)
+    db.session.add(subject)
+    db.session.flush()
+    for chapter_name, for_class, question_count, chapter_active in chapters:
+        chapter = Chapter(name=chapter_name, subject_id=subject.id, for_class=for_class, is_active=chapter_active)
+        db.session.add(chapter)
+        db.session.flush()
+        db.session.add_all(QuizQuestion(chapter_id=chapter.id, question_text=f'{chapter_name} {number}', option1='a',
+                                        option2='b', option3='c', option4='d', correct_option_number=1)
+                           for number in range(question_count))
+    db.session.commit()
+
+def outline(catalog):
+    return [(subject['name'], subject['question_count'], [(chapter['name'], chapter['question_count']) for chapter in subject['chapters']])
+            for subject in catalog]
+
+def test_catalog_lists_active_chapters_of_the_class_with_question_counts(app):
+    add_subject('Math', [('Algebra', 'Class 9', 3, True), ('Geometry', 'Class 9', 0, True),
+                         ('Calculus', 'Class 10', 2, True), ('Hidden', 'Class 9', 5, False)])
+    add_subject('Biology', [('Cells', 'Class 10', 1, True)])
+    add_subject('Archived', [('Old', 'Class 9', 1, True)], is_active=False)
+
+    assert outline(get_class_catalog('Class 9')) == [('Math', 3, [('Algebra', 3), ('Geometry', 0)])]
+    assert outline(get_class_catalog()) == [('Biology', 1, [('Cells', 1)]),
+                                            ('Math', 5, [('Algebra', 3), ('Calculus', 2), ('Geometry', 0)])]
+
+def test_catalog_is_one_query_and_cached_until_invalidated(app):
+    add_subject('Math', [('Algebra', 'Class 9', 2, True)])
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    get_class_catalog('Class 9')
+    get_class_catalog('Class 9')
+    assert len(statements) == 1
+
+    add_subject('Physics', [('Motion', 'Class 9', 1, True)])
+    assert [subject['name'] for subject in get_class_catalog('Class 9')] == ['Math'] # Still cached
+    invalidate_class_catalog()
+    assert [subject['name'] for subject in get_class_catalog('Class 9')] == ['Math', 'Physics']
@@ -0,0 +1,24 @@
+from sqlalchemy import text
+from database import db, REPLICA_BIND
+from utils.db_pool import pool_stats, reset_pool_stats
+
+def test_primary_and_replica_pools_count_separately(make_app, tmp_path):
+    app = make_app(DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        primary, replica = db.engine, db.engines[REPLICA_BIND]
+        reset_pool_stats(primary)
+        for _ in range(3):
+            with primary.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        with replica.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+        assert pool_stats(primary)['checkouts'] == 3
+        assert pool_stats(replica)['checkouts'] == 1
+        assert pool_stats(replica)['connects'] == 1
+
+        primary.dispose() # The recreated pool keeps counting into the same metrics
+        with primary.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        assert pool_stats(primary)['checkouts'] == 4
+        assert pool_stats(replica)['checkouts'] == 1
@@ -0,0 +1,97 @@
+import shutil
+import pytest
+from flask import g
+from sqlalchemy import insert, select
+from database import db, REPLICA_BIND
+from models import Chapter, Subject, User, UserQuizAttempt
+from utils.leaderboard import chapter_board, get_leaderboards
+from utils.db_routing import STICKY_SESSION_KEY, primary_reads, replica_reads, routing_stats
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    """
+    Primary and replica are two SQLite files with the same schema but a different subject row.
+    No app context stays pushed, so each request gets its own g like in a server.
+    """
+    app = make_app(DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        db.engine.dispose()
+        shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+        for bind, name in ((None, 'primary'), (REPLICA_BIND, 'replica')):
+            with db.engines[bind].begin() as connection:
+                connection.execute(insert(Subject).values(name=name))
+    return app
+
+def subject_name():
+    return db.session.scalar(select(Subject.name))
+
+@replica_reads
+def read_only_view():
+    return subject_name()
+
+def test_replica_reads_view_reads_the_replica(app):
+    with app.test_request_context('/'):
+        assert read_only_view() == 'replica'
+        assert g.db_read_target == REPLICA_BIND
+        assert routing_stats()['replica_configured']
+
+def test_other_reads_stay_on_the_primary(app):
+    with app.test_request_context('/'):
+        assert subject_name() == 'primary'
+    with app.app_context(): # No request: CLI commands, jobs
+        assert subject_name() == 'primary'
+
+def test_primary_reads_block_inside_a_replica_view(app):
+    @replica_reads
+    def view():
+        with primary_reads():
+            inside = subject_name()
+        return inside, subject_name()
+
+    with app.test_request_context('/'):
+        assert view() == ('primary', 'replica')
+
+def test_reads_after_a_write_go_to_the_primary(app):
+    @replica_reads
+    def view():
+        before = subject_name()
+        db.session.add(Subject(name='new'))
+        db.session.flush()
+        after = db.session.scalar(select(Subject.name).where(Subject.name == 'new'))
+        db.session.rollback()
+        return before, after
+
+    with app.test_request_context('/'):
+        assert view() == ('replica', 'new')
+        assert g.db_wrote
+
+def test_browser_that_wrote_sticks_to_the_primary(app):
+    client = app.test_client()
+    assert client.get('/').headers['X-DB-Read'] == 'replica'
+    with client.session_transaction() as session:
+        session[STICKY_SESSION_KEY] = 2**40 # Far in the future
+    assert client.get('/').headers['X-DB-Read'] == 'primary'
+
+def test_a_writing_request_makes_the_browser_sticky(app):
+    client = app.test_client()
+    response = client.post('/register', data=dict(username='stud', email='s@example.com', password='pw12345',
+                                                 confirm_password='pw12345', selected_class='Class 9'))
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert STICKY_SESSION_KEY in session
+    assert client.get('/').headers['X-DB-Read'] == 'primary'
+
+def test_leaderboard_sync_in_a_replica_view_reads_the_primary(app):
+    # An attempt the lagging replica doesn't have yet
+    with app.app_context(), db.engines[None].begin() as connection:
+        connection.execute(insert(Chapter).values(id=1, name='Algebra', subject_id=1))
+        connection.execute(insert(User).values(id=1, username='stud', email='s@example.com', password_hash='x'))
+        connection.execute(insert(UserQuizAttempt).values(user_id=1, chapter_id=1, score=3.0, total_questions=4))
+
+    @replica_reads
+    def view():
+        return get_leaderboards().top(chapter_board(1), 10)
+
+    with app.test_request_context('/'):
+        assert view() == [(1, 1, 3.0)]
+        assert g.db_read_target == REPLICA_BIND # The view's own reads still use the replica
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from utils.excel_parser import (CORRECT_OPTION_COLUMN, MEDIA_COLUMN, POINT_COLUMN, QUESTION_COLUMN, REQUIRED_COLUMNS,
+                                QuizParseError, iter_quiz_file_chunks, parse_quiz_dataframe)
+
+def sheet_row(number, question, correct=1, point=1, media=None):
+    values = [number, question, 'a', 'b', 'c', 'd', correct, 0.25, point]
+    return dict(zip(REQUIRED_COLUMNS, values), **({MEDIA_COLUMN: media} if media is not None else {}))
+
+def test_rows_become_typed_question_dicts():
+    df = pd.DataFrame([sheet_row(1, 'প্রশ্ন এক', media=' https://example.com/a.png '), sheet_row(2, 'প্রশ্ন দুই', correct='3', media='')])
+    first, second = parse_quiz_dataframe(df)
+    assert first == {'quiz_number': 1, 'question_text': 'প্রশ্ন এক', 'option1': 'a', 'option2': 'b', 'option3': 'c',
+                     'option4': 'd', 'correct_option_number': 1, 'point_value': 1.0, 'negative_mark': 0.25,
+                     'media_url': 'https://example.com/a.png'}
+    assert second['correct_option_number'] == 3
+    assert second['media_url'] is None
+
+def test_every_invalid_row_is_reported_with_its_spreadsheet_row():
+    df = pd.DataFrame([sheet_row(1, 'ok'), sheet_row(2, '  ', correct=5), sheet_row(3, 'ok', point='many')])
+    with pytest.raises(QuizParseError) as raised:
+        parse_quiz_dataframe(df)
+    assert raised.value.errors == [
+        (3, f"'{QUESTION_COLUMN}' is empty."),
+        (3, f"'{CORRECT_OPTION_COLUMN}' must be between 1 and 4."),
+        (4, f"'{POINT_COLUMN}' must be a number."),
+    ]
+
+def test_missing_columns_are_a_sheet_level_error():
+    with pytest.raises(QuizParseError) as raised:
+        parse_quiz_dataframe(pd.DataFrame([sheet_row(1, 'q')]).drop(columns=[POINT_COLUMN]))
+    (row, message), = raised.value.errors
+    assert row is None and POINT_COLUMN in message
+
+def write_workbook(path, sheets):
+    """sheets: {title: list of rows, the first being the header}."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets.items():
+        sheet = workbook.create_sheet(title)
+        for values in rows:
+            sheet.append(values)
+    workbook.save(path)
+
+def values(number, question, correct=1):
+    return list(sheet_row(number, question, correct).values())
+
+def test_workbook_is_streamed_in_chunks_across_sheets(tmp_path):
+    path = tmp_path / 'bank.xlsx'
+    write_workbook(path, {
+        'Chapter 1': [REQUIRED_COLUMNS, values(1, 'q1'), [None] * len(REQUIRED_COLUMNS), values(2, 'q2'), values(3, 'q3')],
+        'Chapter 2': [REQUIRED_COLUMNS, values(4, 'q4')],
+        'Empty': [],
+    })
+    chunks = list(iter_quiz_file_chunks(str(path), chunk_size=2))
+    assert [[question['question_text'] for question in chunk] for chunk in chunks] == [['q1', 'q2'], ['q3'], ['q4']]
+
+def test_workbook_errors_name_the_sheet_and_the_real_row(tmp_path):
+    path = tmp_path / 'bank.xlsx'
+    write_workbook(path, {'Chapter 1': [REQUIRED_COLUMNS, values(1, 'q1'), [None] * len(REQUIRED_COLUMNS), values(2, 'q2', correct=9)]})
+    with pytest.raises(QuizParseError) as raised:
+        list(iter_quiz_file_chunks(str(path), chunk_size=10))
+    assert raised.value.errors == [(4, f"[Chapter 1] '{CORRECT_OPTION_COLUMN}' must be between 1 and 4.")]
+
+def test_csv_chunks_keep_counting_rows(tmp_path):
+    path = tmp_path / 'bank.csv'
+    rows = [values(number, f'q{number}') for number in range(1, 4)] + [values(4, 'q4', correct=0)]
+    path.write_text('\n'.join(','.join(str(value) for value in row) for row in [REQUIRED_COLUMNS] + rows), encoding='utf-8-sig')
+    chunks = iter_quiz_file_chunks(str(path), chunk_size=2)
+    assert len(next(chunks)) == 2
+    with pytest.raises(QuizParseError) as raised:
+        next(chunks)
+    assert raised.value.errors[0][0] == 5 # Header is row 1, so the fourth data row is row 5
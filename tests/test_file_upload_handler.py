@@ -0,0 +1,109 @@
+import cloudinary.uploader
+import pytest
+from database import db
+from models import Chapter, QuizQuestion, Subject
+from utils.file_upload_handler import parse_cloudinary_url, upload_file_to_cloudinary, upload_to_cloudinary
+from utils.media_cleanup import MediaCleanup
+
+OURS = 'https://res.cloudinary.com/demo/image/upload/v1712345/polyquiz_media/chapter_1/diagram.png'
+
+@pytest.mark.parametrize('url, expected', [
+    (OURS, ('image', 'polyquiz_media/chapter_1/diagram')),
+    ('https://res.cloudinary.com/demo/image/upload/polyquiz_media/diagram.png', ('image', 'polyquiz_media/diagram')),
+    ('https://res.cloudinary.com/demo/video/upload/v1/polyquiz_media/clip.mp4', ('video', 'polyquiz_media/clip')),
+    ('https://res.cloudinary.com/demo/raw/upload/v1/polyquiz_media/notes.pdf', ('raw', 'polyquiz_media/notes.pdf')),
+    ('https://res.cloudinary.com/demo/image/upload/v1/polyquiz_media/%E0%A6%95.png', ('image', 'polyquiz_media/ক')),
+])
+def test_parse_cloudinary_url_of_this_account(app, url, expected):
+    assert parse_cloudinary_url(url) == expected
+
+@pytest.mark.parametrize('url', [
+    None,
+    '',
+    'https://vimeo.com/76979871',
+    'https://drive.google.com/file/d/abc/view',
+    'https://example.com/upload/2024/a.png',
+    'https://example.com/demo/image/upload/v1/a.png',
+    'https://res.cloudinary.com/someone_else/image/upload/v1/a/b.png', # Another account's asset
+    'https://res.cloudinary.com.evil.com/demo/image/upload/v1/a.png',
+    'https://res.cloudinary.com/demo/image/fetch/https://example.com/a.png',
+    'https://res.cloudinary.com/demo/image/upload/v1',
+    'ftp://res.cloudinary.com/demo/image/upload/v1/a.png',
+])
+def test_parse_cloudinary_url_rejects_other_urls(app, url):
+    assert parse_cloudinary_url(url) is None
+
+def test_parse_cloudinary_url_needs_a_configured_account(app):
+    assert parse_cloudinary_url(OURS, cloud_name='other') is None
+
+class StubUploader:
+    """Records the calls cloudinary.uploader would have sent."""
+
+    def __init__(self, result=None, error=None):
+        self.calls = []
+        self.result = result
+        self.error = error
+
+    def __call__(self, method):
+        def upload(file, **options):
+            self.calls.append((method, file, options))
+            if self.error:
+                raise self.error
+            return self.result
+        return upload
+
+def test_upload_file_to_cloudinary_returns_the_secure_url(app, monkeypatch):
+    stub = StubUploader(result={'secure_url': OURS, 'public_id': 'polyquiz_media/chapter_1/diagram'})
+    monkeypatch.setattr(cloudinary.uploader, 'upload', stub('upload'))
+    assert upload_file_to_cloudinary(b'image bytes', 'chapter_1') == OURS
+    (method, file, options), = stub.calls
+    assert file == b'image bytes'
+    assert options['folder'] == 'polyquiz_media/chapter_1'
+    assert options['resource_type'] == 'auto'
+
+def test_upload_in_chunks_uses_upload_large(app, monkeypatch):
+    stub = StubUploader(result={'secure_url': OURS})
+    monkeypatch.setattr(cloudinary.uploader, 'upload', stub('upload'))
+    monkeypatch.setattr(cloudinary.uploader, 'upload_large', stub('upload_large'))
+    upload_to_cloudinary('/tmp/video.mp4', 'videos', chunk_size=6 * 1024 * 1024, public_id='abc')
+    (method, _, options), = stub.calls
+    assert method == 'upload_large'
+    assert options['chunk_size'] == 6 * 1024 * 1024
+    assert options['public_id'] == 'abc'
+
+def test_failed_upload_returns_none(app, monkeypatch):
+    monkeypatch.setattr(cloudinary.uploader, 'upload', StubUploader(error=RuntimeError('network down'))('upload'))
+    assert upload_file_to_cloudinary(b'image bytes') is None
+
+class StubDeleter:
+    """Stands in for CloudinaryDeleter; reports every ID as deleted."""
+
+    def __init__(self):
+        self.deleted = []
+
+    def delete_resources(self, public_ids, resource_type):
+        self.deleted.extend((resource_type, public_id) for public_id in public_ids)
+        return {'deleted': dict.fromkeys(public_ids, 'deleted')}
+
+def test_media_cleanup_only_deletes_this_accounts_unused_uploads(app):
+    subject = Subject(name='S')
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name='C', subject_id=subject.id, for_class='Class 9')
+    db.session.add(chapter)
+    db.session.flush()
+    still_used = 'https://res.cloudinary.com/demo/image/upload/v1/polyquiz_media/shared.png'
+    db.session.add(QuizQuestion(chapter_id=chapter.id, question_text='q', option1='a', option2='b', option3='c',
+                                option4='d', correct_option_number=1, media_url=still_used))
+    db.session.commit()
+
+    deleter = StubDeleter()
+    cleanup = MediaCleanup(deleter=deleter).add_urls([
+        OURS, still_used,
+        'https://vimeo.com/76979871',
+        'https://example.com/upload/2024/a.png',
+        'https://res.cloudinary.com/someone_else/image/upload/v1/a/b.png',
+    ])
+    result = cleanup.flush()
+    assert deleter.deleted == [('image', 'polyquiz_media/chapter_1/diagram')]
+    assert result == {'deleted': 1, 'failed': [], 'kept_in_use': 1}
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from database import db
+from models import BackgroundJob
+from utils import job_queue
+from utils.job_queue import claim_next_job, enqueue_job, requeue_expired_jobs, run_pending_jobs
+
+@pytest.fixture
+def ran(app, monkeypatch):
+    """Registers a 'test' job kind for the test; returns the payloads it ran, in order."""
+    ran = []
+
+    def handler(job, payload):
+        if payload.get('fail'):
+            raise RuntimeError('handler failed')
+        ran.append(payload)
+        return {'echo': payload}
+
+    monkeypatch.setitem(job_queue._handlers, 'test', handler)
+    return ran
+
+def expire(job, attempts=1):
+    """Makes job look claimed by a worker that stopped renewing its lease."""
+    job.status = 'running'
+    job.started_at = job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+    job.attempts = attempts
+    db.session.commit()
+
+def test_unknown_kinds_are_rejected(app):
+    with pytest.raises(ValueError):
+        enqueue_job('no_such_kind', {})
+
+def test_jobs_run_in_order_and_record_their_outcome(ran):
+    first = enqueue_job('test', {'n': 1})
+    failing = enqueue_job('test', {'fail': True})
+    assert run_pending_jobs() == 2
+    assert ran == [{'n': 1}]
+    assert (first.status, json.loads(first.result), first.attempts) == ('done', {'echo': {'n': 1}}, 1)
+    assert (failing.status, failing.error) == ('failed', 'handler failed')
+    assert claim_next_job() is None
+
+def test_a_running_job_holds_its_lock_key(ran):
+    held = enqueue_job('test', {'n': 1}, lock_key='chapter:1')
+    waiting = enqueue_job('test', {'n': 2}, lock_key='chapter:1')
+    other = enqueue_job('test', {'n': 3}, lock_key='chapter:2')
+    assert claim_next_job().id == held.id
+    assert claim_next_job().id == other.id # Skips the job waiting for chapter:1
+    assert claim_next_job() is None
+    held.status = 'done'
+    db.session.commit()
+    assert claim_next_job().id == waiting.id
+
+def test_an_expired_lease_requeues_the_job_and_frees_its_lock(ran):
+    abandoned = enqueue_job('test', {'n': 1}, lock_key='chapter:1')
+    waiting = enqueue_job('test', {'n': 2}, lock_key='chapter:1')
+    expire(abandoned)
+    assert run_pending_jobs() == 2
+    assert ran == [{'n': 1}, {'n': 2}]
+    assert (abandoned.status, abandoned.attempts) == ('done', 2)
+    assert waiting.status == 'done'
+
+def test_a_live_lease_is_kept(ran):
+    job = enqueue_job('test', {})
+    claim_next_job()
+    assert requeue_expired_jobs() == 0
+    assert job.status == 'running'
+
+def test_a_job_that_keeps_losing_its_worker_fails(app, ran):
+    job = enqueue_job('test', {})
+    expire(job, attempts=app.config['JOB_MAX_ATTEMPTS'])
+    assert requeue_expired_jobs() == 1
+    db.session.refresh(job)
+    assert job.status == 'failed' and 'gave up' in job.error
+    assert run_pending_jobs() == 0
@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import insert
+from database import db
+from models import Chapter, LeaderboardSnapshot, Subject, User, UserQuizAttempt
+from utils.leaderboard import Leaderboard, Leaderboards, chapter_board, class_board
+
+def test_ties_share_a_rank():
+    board = Leaderboard([(1, 10.0), (2, 30.0), (3, 20.0), (4, 20.0), (5, 5.0)])
+    assert board.top(4) == [(1, 2, 30.0), (2, 3, 20.0), (2, 4, 20.0), (4, 1, 10.0)]
+    assert board.rank(4) == (2, 20.0)
+    assert board.rank(5) == (5, 5.0)
+    assert board.rank(99) is None
+
+def test_updates_move_users():
+    board = Leaderboard([(1, 10.0), (2, 20.0)])
+    board.add(1, 15.0)
+    board.raise_to(2, 5.0) # Lower than the current best: ignored
+    assert board.top(2) == [(1, 1, 25.0), (2, 2, 20.0)]
+    assert board.remove(1) == 25.0
+    assert len(board) == 1 and 1 not in board
+
+def test_float_sums_keep_ties_exact():
+    board = Leaderboard()
+    for _ in range(3):
+        board.add(1, 0.1)
+    board.set(2, 0.3)
+    assert board.rank(1) == board.rank(2) == (1, 0.3)
+
+@pytest.fixture
+def players(app):
+    subject = Subject(name='S')
+    db.session.add(subject)
+    db.session.flush()
+    db.session.add_all([Chapter(id=1, name='A', subject_id=subject.id, for_class='Class 9'),
+                        Chapter(id=2, name='B', subject_id=subject.id, for_class='Class 9')])
+    db.session.add_all([User(id=1, username='u1', email='u1@example.com', password_hash='x', selected_class='Class 9'),
+                        User(id=2, username='u2', email='u2@example.com', password_hash='x', selected_class='Class 9')])
+    db.session.commit()
+
+def attempt(attempt_id, user_id, chapter_id, score):
+    db.session.execute(insert(UserQuizAttempt).values(id=attempt_id, user_id=user_id, chapter_id=chapter_id,
+                                                      score=score, total_questions=4))
+    db.session.commit()
+
+def test_class_boards_sum_and_chapter_boards_keep_the_best(players):
+    for attempt_id, user_id, chapter_id, score in [(1, 1, 1, 3.0), (2, 1, 1, 1.0), (3, 1, 2, 2.0), (4, 2, 1, 4.0)]:
+        attempt(attempt_id, user_id, chapter_id, score)
+    boards = Leaderboards()
+    boards.rebuild()
+    assert boards.top(class_board('Class 9'), 10) == [(1, 1, 6.0), (2, 2, 4.0)]
+    assert boards.top(chapter_board(1), 10) == [(1, 2, 4.0), (2, 1, 3.0)]
+
+    attempt(5, 2, 2, 3.0)
+    boards.sync(force=True)
+    assert boards.rank(class_board('Class 9'), 2) == (1, 7.0)
+
+def test_an_attempt_committed_after_a_higher_id_is_still_applied(players):
+    attempt(1, 1, 1, 1.0)
+    boards = Leaderboards()
+    boards.rebuild()
+    attempt(5, 1, 1, 2.0) # Ids 2-4 belong to transactions that haven't committed yet
+    boards.sync(force=True)
+    assert boards.stats()['missing_attempt_ids'] == 3
+    attempt(3, 2, 1, 4.0)
+    boards.sync(force=True)
+    boards.sync(force=True) # Applied once only
+    assert boards.top(class_board('Class 9'), 10) == [(1, 2, 4.0), (2, 1, 3.0)]
+    assert boards.stats()['missing_attempt_ids'] == 2
+
+def test_a_user_who_changes_class_takes_their_total_along(players):
+    attempt(1, 1, 1, 3.0)
+    boards = Leaderboards()
+    boards.rebuild()
+    db.session.get(User, 1).selected_class = 'Class 10'
+    db.session.commit()
+    attempt(2, 1, 2, 1.0)
+    boards.sync(force=True)
+    assert boards.rank(class_board('Class 10'), 1) == (1, 4.0)
+    assert boards.rank(class_board('Class 9'), 1) is None
+
+def test_snapshot_restores_the_boards(players):
+    attempt(1, 1, 1, 3.0)
+    attempt(2, 2, 1, 2.0)
+    boards = Leaderboards()
+    boards.rebuild()
+    assert boards.save_snapshot() == 2
+    db.session.commit()
+    db.session.execute(UserQuizAttempt.__table__.delete()) # The restored boards can only come from the snapshot
+    db.session.commit()
+
+    restored = Leaderboards()
+    restored.rebuild()
+    assert restored.top(chapter_board(1), 10) == boards.top(chapter_board(1), 10)
+    assert restored.top(class_board('Class 9'), 10) == [(1, 1, 3.0), (2, 2, 2.0)]
+    assert db.session.query(LeaderboardSnapshot).count() == 2
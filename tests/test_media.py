@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+import cloudinary.uploader
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from database import db
+from models import Chapter, MediaAsset, QuizQuestion, Subject
+from utils import media
+
+@pytest.fixture
+def local_backend(app, tmp_path, monkeypatch):
+    """MEDIA_BACKEND=local storing under tmp_path instead of the checkout's static/uploads."""
+    backend = media.LocalMediaBackend(str(tmp_path / 'media'), '/static/uploads/media', (320, 480))
+    monkeypatch.setattr(media, '_local_backend', backend)
+    monkeypatch.setattr(media, '_upload_backend', backend)
+    monkeypatch.setattr(media, '_widths', (320, 480))
+    return backend
+
+def upload(data, filename):
+    return FileStorage(io.BytesIO(data), filename=filename)
+
+def image_bytes(size, image_format='PNG', frames=1, exif_orientation=None):
+    images = [Image.new('RGB', size, (40 * number, 80, 160)) for number in range(frames)]
+    options = {}
+    if frames > 1:
+        options.update(save_all=True, append_images=images[1:], duration=100, loop=0)
+    if exif_orientation is not None:
+        exif = images[0].getexif()
+        exif[0x0112] = exif_orientation
+        options['exif'] = exif.tobytes()
+    data = io.BytesIO()
+    images[0].save(data, image_format, **options)
+    return data.getvalue()
+
+def stored_files(backend):
+    return sorted(os.path.relpath(os.path.join(root, name), backend.root)
+                  for root, _, names in os.walk(backend.root) for name in names)
+
+class RecordingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+def test_spool_upload_copies_and_hashes_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(media, 'STREAM_CHUNK_SIZE', 4)
+    data = b'0123456789abcdefghij!'
+    stream = RecordingStream(data)
+    temp_path, sha256, size = media.spool_upload(FileStorage(stream, filename='notes.pdf'), str(tmp_path))
+    try:
+        assert all(0 < read_size <= 4 for read_size in stream.read_sizes)
+        assert len(stream.read_sizes) == 7 # Six full or partial chunks, then the empty read
+        assert (sha256, size) == (hashlib.sha256(data).hexdigest(), len(data))
+        with open(temp_path, 'rb') as spooled:
+            assert spooled.read() == data
+    finally:
+        os.remove(temp_path)
+
+def test_same_content_is_stored_once(local_backend):
+    data = b'%PDF-1.4 same document'
+    first = media.save_media(upload(data, 'notes.pdf'), 'chapter_1')
+    second = media.save_media(upload(data, 'renamed.pdf'), 'chapter_2')
+    db.session.commit()
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert first == second
+    assert first.url == f"/static/uploads/media/{sha256[:2]}/{sha256}.pdf"
+    assert stored_files(local_backend) == [f"{sha256[:2]}/{sha256}.pdf"] # Spooled copies removed too
+    assert db.session.query(MediaAsset).count() == 1
+    assert media.media_stats()['deduplicated'] >= 1
+
+def test_shared_file_is_kept_until_no_question_uses_it(local_backend):
+    stored = media.save_media(upload(b'%PDF-1.4 shared', 'shared.pdf'))
+    subject = Subject(name='S')
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name='C', subject_id=subject.id, for_class='Class 9')
+    db.session.add(chapter)
+    db.session.flush()
+    questions = [QuizQuestion(chapter_id=chapter.id, question_text=f"q{number}", option1='a', option2='b', option3='c',
+                              option4='d', correct_option_number=1, media_url=stored.url) for number in range(2)]
+    db.session.add_all(questions)
+    db.session.commit()
+
+    db.session.delete(questions[0])
+    db.session.commit()
+    assert media.release_media([stored.url]) == []
+
+    db.session.delete(questions[1])
+    db.session.commit()
+    assert media.release_media([stored.url]) == [stored.url]
+    assert media.delete_local_media([stored.url]) == 1
+    assert stored_files(local_backend) == []
+    assert db.session.query(MediaAsset).count() == 0
+
+def test_cloudinary_uploads_once_per_content_in_chunks(app, monkeypatch):
+    calls = []
+    def upload_large(file, **options):
+        with open(file, 'rb') as spooled: # A spooled temp file, not the request stream
+            calls.append((spooled.read(), options))
+        return {'secure_url': f"https://res.cloudinary.com/demo/video/upload/v1/{options['public_id']}.mp4",
+                'width': 640, 'height': 360}
+    monkeypatch.setattr(cloudinary.uploader, 'upload_large', upload_large)
+    monkeypatch.setattr(media, '_upload_backend', media._cloudinary_backend)
+
+    data = b'not really a video'
+    first = media.save_media(upload(data, 'clip.mp4'), 'videos')
+    second = media.save_media(upload(data, 'clip-again.mp4'), 'videos')
+    db.session.commit()
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert first == second == media.StoredMedia(f"https://res.cloudinary.com/demo/video/upload/v1/{sha256}.mp4", 640, 360)
+    (uploaded, options), = calls
+    assert uploaded == data
+    assert options['chunk_size'] == media.CLOUDINARY_UPLOAD_CHUNK_SIZE
+    assert options['public_id'] == sha256
+    assert options['overwrite'] is False
+
+def test_local_images_get_smaller_copies_and_a_srcset(local_backend):
+    stored = media.save_media(upload(image_bytes((960, 480)), 'diagram.png'), 'chapter_1')
+    db.session.commit()
+
+    assert (stored.width, stored.height) == (960, 480)
+    stem = stored.url[:-len('.png')]
+    assert media.media_srcset(stored.url, stored.width) == f"{stem}.w320.png 320w, {stem}.w480.png 480w, {stored.url} 960w"
+    for width in (320, 480):
+        with Image.open(local_backend._path(local_backend.derivative_url(stored.url, width))) as copy:
+            assert copy.size == (width, width // 2)
+    assert local_backend.dimensions(stored.url) == (960, 480)
+
+def test_images_are_never_upscaled(local_backend):
+    small = media.save_media(upload(image_bytes((400, 300)), 'small.png'))
+    tiny = media.save_media(upload(image_bytes((200, 100)), 'tiny.png'))
+    db.session.commit()
+
+    small_stem = small.url[:-len('.png')]
+    assert media.media_srcset(small.url, 400) == f"{small_stem}.w320.png 320w, {small.url} 400w"
+    assert not os.path.exists(local_backend._path(local_backend.derivative_url(small.url, 480)))
+    assert media.media_srcset(tiny.url, 200) == f"{tiny.url} 200w" # Only the original
+    assert len(stored_files(local_backend)) == 3
+
+def test_rotated_photo_is_measured_as_displayed(local_backend):
+    stored = media.save_media(upload(image_bytes((1200, 800), 'JPEG', exif_orientation=6), 'photo.jpg'))
+    db.session.commit()
+
+    assert (stored.width, stored.height) == (800, 1200) # Orientation 6 turns the photo upright
+    with Image.open(local_backend._path(local_backend.derivative_url(stored.url, 320))) as copy:
+        assert copy.size == (320, 480)
+
+def test_animated_gif_has_no_copies_or_srcset(local_backend):
+    stored = media.save_media(upload(image_bytes((1000, 600), 'GIF', frames=3), 'steps.gif'))
+    db.session.commit()
+
+    assert (stored.width, stored.height) == (1000, 600)
+    assert media.media_srcset(stored.url, stored.width) == ''
+    assert len(stored_files(local_backend)) == 1
+
+def test_srcset_is_empty_for_other_media(local_backend):
+    document = media.save_media(upload(b'%PDF-1.4 notes', 'notes.pdf'))
+    unmeasured = media.save_media(upload(image_bytes((900, 600)), 'unmeasured.png'))
+    db.session.commit()
+
+    assert media.media_srcset(document.url) == ''
+    assert media.media_srcset('https://example.com/picture.png', 900) == '' # Not ours
+    assert media.media_srcset(unmeasured.url, None) == '' # Width not recorded yet
+
+def test_cloudinary_srcset_uses_delivery_transformations(app):
+    url = 'https://res.cloudinary.com/demo/image/upload/v1/abc.png'
+    assert media.media_srcset(url, 500) == (
+        'https://res.cloudinary.com/demo/image/upload/c_limit,w_320,q_auto,f_auto/v1/abc.png 320w, '
+        'https://res.cloudinary.com/demo/image/upload/c_limit,w_480,q_auto,f_auto/v1/abc.png 480w, '
+        f"{url} 500w")
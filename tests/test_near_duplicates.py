@@ -0,0 +1,57 @@
+import pytest
+from database import db
+from models import Chapter, QuizQuestion, Subject
+from utils.near_duplicates import find_near_duplicates, normalize_question_text
+
+CAPITAL = 'বাংলাদেশের রাজধানী কোনটি?'
+
+@pytest.mark.parametrize('variant', [
+    'বাংলাদেশের  রাজধানী কোনটি ।', # Extra space, danda instead of a question mark
+    'বাংলাদেশের রাজ\u200cধানী কোনটি?', # ZWNJ inside a word
+    'বাংলাদেশের রাজধানী ক\u09c7\u09beনটি?', # O-kar as two code points (not NFC)
+])
+def test_bengali_variants_normalize_alike(variant):
+    assert variant != CAPITAL
+    assert normalize_question_text(variant) == normalize_question_text(CAPITAL)
+
+def test_digits_and_legacy_khanda_ta_normalize_alike():
+    assert normalize_question_text('২০২৪ সালে') == normalize_question_text('2024 সালে')
+    assert normalize_question_text('হঠাত\u09cd\u200d') == normalize_question_text('হঠা\u09ce')
+
+def test_math_symbols_are_kept():
+    assert normalize_question_text('২+৩ = ?') != normalize_question_text('২×৩ = ?')
+
+def add_questions(texts):
+    subject = Subject(name='S')
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name='ভূগোল', subject_id=subject.id, for_class='Class 9')
+    db.session.add(chapter)
+    db.session.flush()
+    questions = [QuizQuestion(chapter_id=chapter.id, question_text=text, option1='a', option2='b', option3='c',
+                              option4='d', correct_option_number=1) for text in texts]
+    db.session.add_all(questions) # Indexed by the ORM insert listener
+    db.session.commit()
+    return [question.id for question in questions]
+
+def test_stored_near_duplicates_are_found_across_the_bank(app):
+    capital_id, _ = add_questions([CAPITAL, 'পদ্মা নদী কোন দেশের উপর দিয়ে প্রবাহিত হয়েছে?'])
+    variant, unrelated = find_near_duplicates(['বাংলাদেশের  রাজধানী কোনটি ।', 'সূর্য কোন দিকে অস্ত যায়?'], threshold=0.7)
+    assert [(match['question_id'], match['chapter_name'], match['similarity']) for match in variant] == [(capital_id, 'ভূগোল', 1.0)]
+    assert unrelated == []
+
+def test_near_duplicates_within_one_upload_point_to_the_earlier_row(app):
+    results = find_near_duplicates([CAPITAL, 'সূর্য কোন দিকে অস্ত যায়?', 'বাংলাদেশের রাজধানী কোনটি ?'], threshold=0.7)
+    assert results[0] == [] and results[1] == []
+    assert results[2] == [{'row': 0, 'similarity': 1.0}]
+
+def test_edits_and_deletes_keep_the_index_current(app):
+    question_id, = add_questions([CAPITAL])
+    question = db.session.get(QuizQuestion, question_id)
+    question.question_text = 'ভারতের রাজধানী কোন শহর?'
+    db.session.commit()
+    assert find_near_duplicates([CAPITAL]) == [[]]
+    assert find_near_duplicates(['ভারতের রাজধানী কোন শহর'])[0][0]['question_id'] == question_id
+    db.session.delete(question)
+    db.session.commit()
+    assert find_near_duplicates(['ভারতের রাজধানী কোন শহর']) == [[]]
@@ -0,0 +1,77 @@
+import pytest
+from database import db, seed_defaults, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from models import Subject
+from utils.page_cache import VERSION_KEY, FileCacheBackend, page_cache_stats
+
+@pytest.fixture(params=['memory', 'filesystem'])
+def app(request, make_app, tmp_path):
+    app = make_app(PAGE_CACHE_BACKEND=request.param, PAGE_CACHE_DIR=str(tmp_path / 'page_cache'))
+    with app.app_context():
+        seed_defaults()
+    return app
+
+def admin_client(app):
+    client = app.test_client()
+    client.post('/login', data=dict(username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD))
+    return client
+
+def test_unchanged_page_answers_304(app):
+    client = app.test_client()
+    first = client.get('/')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    assert 'Cookie' in first.headers['Vary']
+    again = client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.data == b''
+
+def test_an_admin_edit_changes_the_page_and_its_etag(app):
+    client = app.test_client()
+    etag = client.get('/').headers['ETag']
+    admin_client(app).post('/admin/subjects', data=dict(name='পদার্থবিজ্ঞান', is_active='y'))
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'পদার্থবিজ্ঞান' in response.text
+
+def test_unread_query_parameters_share_one_entry(app):
+    client = app.test_client()
+    client.get('/')
+    entries = page_cache_stats()['entries']
+    for number in range(5):
+        assert client.get('/', query_string={'utm': number}).status_code == 200
+    assert page_cache_stats()['entries'] == entries
+
+def test_logged_in_pages_are_not_shared_but_still_conditional(app):
+    client = admin_client(app)
+    client.get('/') # Shows the login flash message once
+    anonymous_etag = app.test_client().get('/').headers['ETag']
+    etag = client.get('/').headers['ETag']
+    assert etag != anonymous_etag # The nav differs
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+def test_another_workers_version_bump_is_seen(make_app, tmp_path):
+    directory = str(tmp_path / 'page_cache')
+    app = make_app(PAGE_CACHE_BACKEND='filesystem', PAGE_CACHE_DIR=directory)
+    client = app.test_client()
+    client.get('/')
+    with app.app_context():
+        db.session.add(Subject(name='OtherWorkerSubject'))
+        db.session.commit()
+    FileCacheBackend(directory).set(VERSION_KEY, b'0123456789abcdef', 3600) # What bump_content_version() writes elsewhere
+    assert 'OtherWorkerSubject' in client.get('/').text
+
+def test_file_backend_sweep_keeps_the_newest_entries_and_the_version(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), max_entries=8)
+    backend.set(VERSION_KEY, b'v1', 3600)
+    for number in range(40):
+        backend.set(f'page:{number}', b'x', 3600)
+    assert len(backend) <= 8 + 1 + 1 # Swept every max_entries / 8 writes; the version is never swept
+    assert backend.get(VERSION_KEY) == b'v1'
+    assert backend.get('page:39') == b'x'
+    assert backend.get('page:0') is None
+
+def test_expired_entries_are_not_served(tmp_path):
+    backend = FileCacheBackend(str(tmp_path))
+    backend.set('page:/', b'x', -1)
+    assert backend.get('page:/') is None
@@ -0,0 +1,44 @@
+import pytest
+from database import DEFAULT_ADMIN_PASSWORD, DEFAULT_ADMIN_USERNAME, seed_defaults
+from models import Subject
+from utils import pagination
+from utils.pagination import decode_cursor, encode_cursor, listing_count_stats
+
+@pytest.mark.parametrize('values, expected', [
+    (['গণিত', 7], ['গণিত', 7]),
+    ([{'name': 'x'}, 7], None),
+    (['গণিত', '7'], None),
+    (['গণিত', True], None),
+    (['গণিত', 2**70], None), # Beyond what a bound parameter can hold
+    (['গণিত', 7.5], None),
+    ([7, 7], None),
+    (['গণিত'], None),
+])
+def test_decode_cursor_checks_value_types(values, expected):
+    assert decode_cursor(encode_cursor(values), [Subject.name, Subject.id]) == expected
+
+@pytest.mark.parametrize('token', ['', '!!!', 'bm90IGpzb24', encode_cursor({'a': 1})])
+def test_malformed_cursor_is_the_first_page(token):
+    assert decode_cursor(token, [Subject.id]) is None
+
+@pytest.mark.parametrize('cursor', [[{'a': 1}, 1], ['x', 'y'], ['x', 2**70]])
+def test_crafted_cursor_on_a_listing_shows_the_first_page(make_app, cursor):
+    app = make_app()
+    with app.app_context():
+        seed_defaults()
+    client = app.test_client()
+    client.post('/login', data=dict(username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD))
+    for parameter in ('after', 'before'):
+        response = client.get('/admin/subjects', query_string={parameter: encode_cursor(cursor)})
+        assert response.status_code == 200
+
+def test_searches_do_not_grow_the_count_cache_past_its_bound(make_app, monkeypatch):
+    app = make_app()
+    with app.app_context():
+        seed_defaults()
+    monkeypatch.setattr(pagination._count_cache, 'max_entries', 3)
+    client = app.test_client()
+    client.post('/login', data=dict(username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD))
+    for term in ('বীজগণিত', 'জ্যামিতি', 'ত্রিকোণমিতি', 'পরিসংখ্যান', 'ক্যালকুলাস'):
+        assert client.get('/admin/questions', query_string={'q': term}).status_code == 200
+    assert listing_count_stats()['size'] == 3
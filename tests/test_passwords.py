@@ -0,0 +1,62 @@
+import threading
+import pytest
+from sqlalchemy import select
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+from database import db
+from models import User
+from utils.passwords import PasswordHashBusy, PasswordHasher, normalize_method, stored_method
+
+@pytest.mark.parametrize('method, expected', [
+    ('pbkdf2', f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'),
+    ('pbkdf2:sha512', f'pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}'),
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:1000'),
+    ('scrypt', 'scrypt:32768:8:1'),
+    ('scrypt:16384:8:1', 'scrypt:16384:8:1'),
+])
+def test_methods_are_spelled_out(method, expected):
+    assert normalize_method(method) == expected
+
+def test_unknown_methods_are_rejected():
+    with pytest.raises(ValueError):
+        normalize_method('md5')
+
+def test_needs_rehash_compares_method_and_cost():
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1)
+    fresh = hasher.hash('secret')
+    assert stored_method(fresh) == 'pbkdf2:sha256:1000'
+    assert hasher.verify(fresh, 'secret') and not hasher.verify(fresh, 'wrong')
+    assert not hasher.needs_rehash(fresh)
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:2000')) # Stronger counts too
+    hasher.shutdown()
+
+def test_a_full_queue_raises_busy():
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, max_pending=1, wait_seconds=0.01)
+    started, release = threading.Event(), threading.Event()
+    blocker = threading.Thread(target=hasher._run, args=(lambda: started.set() or release.wait(),))
+    blocker.start()
+    started.wait()
+    with pytest.raises(PasswordHashBusy):
+        hasher.hash('secret')
+    release.set()
+    blocker.join()
+    assert hasher.verify(hasher.hash('secret'), 'secret') # The slot is free again
+    hasher.shutdown()
+
+def stored_hash(app):
+    with app.app_context():
+        return db.session.scalar(select(User.password_hash).where(User.username == 'stud'))
+
+def test_login_rehashes_a_hash_made_with_another_cost(make_app):
+    app = make_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:2000')
+    with app.app_context():
+        db.session.add(User(username='stud', email='s@example.com',
+                            password_hash=generate_password_hash('pw12345', 'pbkdf2:sha256:1000')))
+        db.session.commit()
+    client = app.test_client()
+    assert client.post('/login', data=dict(username='stud', password='wrong')).status_code == 200
+    assert stored_method(stored_hash(app)) == 'pbkdf2:sha256:1000' # A failed login changes nothing
+
+    assert client.post('/login', data=dict(username='stud', password='pw12345')).status_code == 302
+    assert stored_method(stored_hash(app)) == 'pbkdf2:sha256:2000'
+    client.get('/logout')
+    assert client.post('/login', data=dict(username='stud', password='pw12345')).status_code == 302
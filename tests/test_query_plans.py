@@ -0,0 +1,15 @@
+import pytest
+from sqlalchemy import text
+from database import db
+from utils.query_plans import check_query_plans, explain_query_plan, hot_queries
+
+@pytest.mark.parametrize('name', sorted(hot_queries()))
+def test_hot_query_uses_an_index(app, name):
+    ok, plan = check_query_plans()[name]
+    assert ok, f"{name} scans a whole table: {' | '.join(plan)}"
+
+def test_check_flags_a_full_table_scan(app):
+    db.session.execute(text('DROP INDEX ix_background_job_status_id'))
+    plan = explain_query_plan(hot_queries()['queued_jobs'])
+    assert any(line.startswith('SCAN') and 'USING' not in line for line in plan)
+    assert not check_query_plans()['queued_jobs'][0]
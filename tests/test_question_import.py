@@ -0,0 +1,90 @@
+import io
+import json
+import os
+from sqlalchemy import select
+from database import db, seed_defaults, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from models import BackgroundJob, Chapter, QuizQuestion, Subject
+from utils.excel_parser import REQUIRED_COLUMNS
+from utils.job_queue import run_pending_jobs
+from utils.question_importer import QuestionImport
+
+def question_sheet(rows):
+    """CSV bytes with the Bengali header; rows are (question, correct option) pairs."""
+    lines = [','.join(REQUIRED_COLUMNS)]
+    for number, (question, correct) in enumerate(rows, start=1):
+        lines.append(f"{number},{question},a,b,c,d,{correct},0.25,1")
+    return '\n'.join(lines).encode('utf-8')
+
+def test_uploaded_sheet_is_staged_outside_static_and_imported(make_app, tmp_path):
+    staging = tmp_path / 'staging'
+    app = make_app(IMPORT_STAGING_DIR=str(staging))
+    with app.app_context():
+        seed_defaults()
+        subject = Subject(name='গণিত')
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name='Algebra', subject_id=subject.id, for_class='Class 9')
+        db.session.add(chapter)
+        db.session.commit()
+        subject_id, chapter_id = subject.id, chapter.id
+    client = app.test_client()
+    client.post('/login', data=dict(username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD))
+
+    response = client.post('/admin/quiz_upload', content_type='multipart/form-data', data={
+        'subject_id': subject_id, 'chapter_id': chapter_id,
+        'excel_file': (io.BytesIO(question_sheet([('প্রশ্ন এক', 1), ('প্রশ্ন দুই', 3)])), 'bank.csv'),
+    })
+    assert response.status_code == 302
+    with app.app_context():
+        job = db.session.scalar(select(BackgroundJob))
+        file_path = json.loads(job.payload)['file_path']
+        assert os.path.dirname(file_path) == str(staging)
+        assert os.path.exists(file_path)
+
+        assert run_pending_jobs() == 1
+        job = db.session.get(BackgroundJob, job.id)
+        assert job.status == 'done', job.error
+        assert json.loads(job.result)['inserted'] == 2
+        assert sorted(db.session.scalars(select(QuizQuestion.correct_option_number))) == [1, 3]
+    assert not os.path.exists(file_path) # The job removes its staged file
+
+def row(text, correct=1, media_url=None):
+    return {'quiz_number': 1, 'question_text': text, 'option1': 'a', 'option2': 'b', 'option3': 'c', 'option4': 'd',
+            'correct_option_number': correct, 'point_value': 1.0, 'negative_mark': 0.0, 'media_url': media_url}
+
+def add_chapter():
+    subject = Subject(name='S')
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name='C', subject_id=subject.id, for_class='Class 9')
+    db.session.add(chapter)
+    db.session.commit()
+    return chapter.id
+
+def test_import_inserts_updates_and_skips_unchanged_rows(app):
+    chapter_id = add_chapter()
+    first = QuestionImport(chapter_id)
+    first.apply([row('Old question', media_url='https://example.com/old.png'), row('Kept question')])
+    db.session.commit()
+
+    second = QuestionImport(chapter_id, batch_size=1)
+    second.apply_chunks(iter([
+        [row('Old question', correct=2, media_url='https://example.com/new.png'), row('Kept question')],
+        [row('New question'), row('New question', correct=4)], # Repeated text: the last row wins
+    ]))
+    db.session.commit()
+
+    report = second.report()
+    assert (report['inserted'], report['updated'], report['unchanged']) == (1, 1, 1)
+    assert report['stale_media_urls'] == ['https://example.com/old.png']
+    questions = dict(db.session.execute(select(QuizQuestion.question_text, QuizQuestion.correct_option_number)).all())
+    assert questions == {'Old question': 2, 'Kept question': 1, 'New question': 4}
+
+def test_rows_repeated_in_a_later_chunk_update_the_inserted_question(app):
+    chapter_id = add_chapter()
+    question_import = QuestionImport(chapter_id)
+    question_import.apply_chunks(iter([[row('Question')], [row('Question', correct=3)]]))
+    db.session.commit()
+    report = question_import.report()
+    assert (report['inserted'], report['updated']) == (1, 0) # Counted once, as an insert
+    assert db.session.scalars(select(QuizQuestion.correct_option_number)).all() == [3]
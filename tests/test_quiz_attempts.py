@@ -0,0 +1,152 @@
+import json
+import pytest
+from sqlalchemy import func, select
+from database import db, seed_defaults, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from models import Chapter, QuizAttemptToken, QuizQuestion, Subject, User, UserQuizAttempt
+from utils.quiz_sets import get_quiz_set, invalidate_quiz_sets
+
+@pytest.fixture
+def quiz(make_app):
+    """A chapter with four one-point questions (answer 1) and a logged-in student's client."""
+    app = make_app()
+    with app.app_context():
+        subject = Subject(name='গণিত')
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(name='Algebra', subject_id=subject.id, for_class='Class 9')
+        db.session.add(chapter)
+        db.session.flush()
+        db.session.add_all(QuizQuestion(chapter_id=chapter.id, question_text=f'Question {number}', option1='a', option2='b',
+                                        option3='c', option4='d', correct_option_number=1, point_value=1, negative_mark=0)
+                           for number in range(4))
+        student = User(username='stud', email='s@example.com', selected_class='Class 9')
+        student.set_password('pw12345')
+        db.session.add(student)
+        db.session.commit()
+        chapter_id, question_ids = chapter.id, db.session.scalars(select(QuizQuestion.id).order_by(QuizQuestion.id)).all()
+    client = app.test_client()
+    assert client.post('/login', data=dict(username='stud', password='pw12345')).status_code == 302
+    return app, client, chapter_id, question_ids
+
+def total_points(app):
+    with app.app_context():
+        return db.session.scalar(select(User.total_points).where(User.username == 'stud'))
+
+def test_a_replayed_attempt_is_not_scored_twice(quiz):
+    app, client, chapter_id, question_ids = quiz
+    assert client.get(f'/user/quiz/{chapter_id}').status_code == 200
+    with client.session_transaction() as session:
+        attempt = dict(session[f'quiz_{chapter_id}'])
+    sheet = {'answers': {str(question_id): 1 for question_id in question_ids}}
+
+    assert client.post(f'/user/quiz/{chapter_id}/submit', json=sheet).status_code == 200
+    with client.session_transaction() as session:
+        session[f'quiz_{chapter_id}'] = attempt # The saved cookie, sent again
+    assert client.post(f'/user/quiz/{chapter_id}/submit', json=sheet).status_code == 409
+    assert total_points(app) == 4.0
+
+def test_reopening_the_quiz_replaces_the_open_attempt(quiz):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    with client.session_transaction() as session:
+        first = dict(session[f'quiz_{chapter_id}'])
+    client.get(f'/user/quiz/{chapter_id}')
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(QuizAttemptToken)) == 1
+
+    with client.session_transaction() as session:
+        session[f'quiz_{chapter_id}'] = first
+    assert client.post(f'/user/quiz/{chapter_id}/submit', json={'answers': {}}).status_code == 409
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(UserQuizAttempt)) == 0
+
+def test_chapters_and_subjects_with_attempts_are_not_deleted(quiz):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    client.post(f'/user/quiz/{chapter_id}/submit', json={'answers': {str(question_ids[0]): 1}})
+    with app.app_context():
+        seed_defaults()
+        subject_id = db.session.scalar(select(Chapter.subject_id).where(Chapter.id == chapter_id))
+        unplayed = Chapter(name='Geometry', subject_id=subject_id, for_class='Class 9')
+        db.session.add(unplayed)
+        db.session.commit()
+        unplayed_id = unplayed.id
+    admin = app.test_client()
+    admin.post('/login', data=dict(username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD))
+
+    assert admin.post(f'/admin/chapters/delete/{unplayed_id}').status_code == 302
+    assert admin.post(f'/admin/chapters/delete/{chapter_id}').status_code == 302
+    assert admin.post(f'/admin/subjects/delete/{subject_id}').status_code == 302
+    with app.app_context():
+        assert db.session.get(Chapter, unplayed_id) is None
+        assert db.session.get(Chapter, chapter_id) is not None
+        assert db.session.get(Subject, subject_id) is not None
+        assert db.session.scalar(select(func.count()).select_from(UserQuizAttempt)) == 1
+
+def test_an_unreadable_answer_sheet_still_shows_the_result(quiz):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    attempt_id = client.post(f'/user/quiz/{chapter_id}/submit', json={'answers': {str(question_ids[0]): 1}}).get_json()['attempt_id']
+    with app.app_context():
+        db.session.get(UserQuizAttempt, attempt_id).answer_sheet = b'\x07garbage'
+        db.session.commit()
+
+    response = client.get(f'/user/quiz/result/{attempt_id}')
+    assert response.status_code == 200
+    assert 'পরিবর্তন হয়েছে' in response.text # Shown as a sheet from another question set
+    assert response.text.count('উত্তর দেওয়া হয়নি') == len(question_ids) # ...with no choices
+
+def test_questions_are_shuffled_per_attempt_without_answers(quiz):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    first = client.get(f'/user/quiz/{chapter_id}/questions')
+    assert first.headers['Cache-Control'] == 'private, no-store'
+    questions = first.get_json()['questions']
+    assert sorted(question['id'] for question in questions) == question_ids
+    assert all('correct_option_number' not in question for question in questions)
+    assert client.get(f'/user/quiz/{chapter_id}/questions').get_json() == first.get_json() # Same attempt, same order
+
+def test_quiz_set_order_depends_only_on_the_seed(quiz):
+    app, client, chapter_id, question_ids = quiz
+    with app.app_context():
+        quiz_set = get_quiz_set(chapter_id)
+        assert json.loads(quiz_set.to_json(7)) == json.loads(quiz_set.to_json(7))
+        orders = {tuple(question['id'] for question in json.loads(quiz_set.to_json(seed))['questions']) for seed in range(20)}
+        assert len(orders) > 1
+        assert quiz_set.question(question_ids[0])['correct_option_number'] == 1
+
+def test_editing_a_question_changes_the_set_version(quiz):
+    app, client, chapter_id, question_ids = quiz
+    with app.app_context():
+        version = get_quiz_set(chapter_id).version
+        db.session.get(QuizQuestion, question_ids[0]).correct_option_number = 2
+        db.session.commit()
+        invalidate_quiz_sets(chapter_id)
+        assert get_quiz_set(chapter_id).version != version
+
+def test_a_sheet_answered_against_an_older_set_is_rejected(quiz):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    with app.app_context():
+        db.session.get(QuizQuestion, question_ids[0]).point_value = 5
+        db.session.commit()
+        invalidate_quiz_sets(chapter_id)
+    assert client.post(f'/user/quiz/{chapter_id}/submit', json={'answers': {}}).status_code == 409
+    assert total_points(app) == 0.0
+
+@pytest.mark.parametrize('body', [[1, 2], {'answers': [1]}, {'answers': {'x': 1}}, {'answers': {'1': 2**40}}])
+def test_malformed_sheets_are_rejected(quiz, body):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    assert client.post(f'/user/quiz/{chapter_id}/submit', json=body).status_code == 400
+
+def test_submitting_scores_and_shows_the_result(quiz):
+    app, client, chapter_id, question_ids = quiz
+    client.get(f'/user/quiz/{chapter_id}')
+    answers = {str(question_ids[0]): 1, str(question_ids[1]): 2} # One right, one wrong (no negative mark)
+    result = client.post(f'/user/quiz/{chapter_id}/submit', json={'answers': answers}).get_json()
+    assert (result['score'], result['correct'], result['wrong'], result['skipped']) == (1.0, 1, 1, 2)
+    assert total_points(app) == 1.0
+    page = client.get(result['result_url'])
+    assert page.status_code == 200
+    assert page.text.count('উত্তর দেওয়া হয়নি') == 2
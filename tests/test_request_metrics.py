@@ -0,0 +1,120 @@
+import re
+import pytest
+from database import seed_defaults, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
+from utils import request_metrics
+from utils.request_metrics import (DURATION_BUCKETS, EndpointStats, endpoint_report, prometheus_text,
+                                   recent_slow_queries, reset_request_metrics)
+
+SERVER_TIMING = re.compile(r'^db;dur=[\d.]+;desc="(\d+) quer(?:y|ies)", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+@pytest.fixture
+def metrics_app(make_app, monkeypatch):
+    """App with request metrics on; the per-process figures and slow-query threshold are put back afterwards."""
+    monkeypatch.setattr(request_metrics, '_slow_query_seconds', request_metrics._slow_query_seconds)
+    reset_request_metrics()
+    yield lambda **overrides: make_app(REQUEST_METRICS=True, **overrides)
+    reset_request_metrics()
+
+def report_row(endpoint, method='GET'):
+    rows = [row for row in endpoint_report() if (row['endpoint'], row['method']) == (endpoint, method)]
+    return rows[0] if rows else None
+
+def test_bucket_counts_and_quantiles():
+    stats = EndpointStats()
+    for seconds in (0.004, 0.004, 0.02, 0.3, 20.0):
+        stats.add(seconds, sql_queries=2, sql_seconds=0.001, template_seconds=0.002)
+    assert stats.count == 5
+    assert sum(stats.bucket_counts) == 4 # The 20 s request only lands in +Inf
+    assert stats.bucket_counts[DURATION_BUCKETS.index(0.005)] == 2
+    assert stats.quantile(0.4) == 0.005
+    assert stats.quantile(0.6) == 0.025
+    assert stats.quantile(0.8) == 0.5
+    assert stats.quantile(1.0) is None
+    assert stats.max_seconds == 20.0
+    assert stats.sql_queries == 10
+
+def test_server_timing_header_counts_the_request_queries(metrics_app):
+    client = metrics_app().test_client()
+    first = client.get('/')
+    queries = int(SERVER_TIMING.match(first.headers['Server-Timing']).group(1))
+    assert queries > 0
+    cached = client.get('/') # Served from the page cache, so no SQL
+    assert SERVER_TIMING.match(cached.headers['Server-Timing']).group(1) == '0'
+
+    row = report_row('index')
+    assert row['count'] == 2
+    assert row['avg_queries'] == queries / 2
+    assert row['max_ms'] >= row['avg_ms'] > 0
+
+def test_requests_are_grouped_by_endpoint_and_method(metrics_app):
+    client = metrics_app().test_client()
+    client.get('/login')
+    client.post('/login', data=dict(username='nobody', password='wrong'))
+    client.get('/no-such-page')
+    client.get('/no-such-page-either')
+
+    assert report_row('auth.login', 'GET')['count'] == 1
+    assert report_row('auth.login', 'POST')['count'] == 1
+    assert report_row('unmatched')['count'] == 2
+
+def test_server_timing_header_can_be_turned_off(metrics_app):
+    client = metrics_app(SERVER_TIMING_HEADER=False).test_client()
+    response = client.get('/login')
+    assert 'Server-Timing' not in response.headers
+    assert report_row('auth.login')['count'] == 1 # Still measured
+
+def test_metrics_off_adds_nothing(make_app):
+    reset_request_metrics()
+    client = make_app().test_client() # conftest default: REQUEST_METRICS=False
+    assert 'Server-Timing' not in client.get('/login').headers
+    assert client.get('/metrics').status_code == 404
+    assert endpoint_report() == []
+
+def test_slow_queries_are_logged_with_their_call_site(metrics_app, monkeypatch):
+    client = metrics_app(SLOW_QUERY_MS=0).test_client()
+    reset_request_metrics() # Only the queries of the request below
+    # Recorded directly: the migrations' logging fileConfig replaces the root handlers caplog relies on
+    logged = []
+    monkeypatch.setattr(request_metrics.logger, 'warning', lambda message, *args: logged.append(message % args))
+    client.get('/')
+
+    slow = [entry for entry in recent_slow_queries() if entry['endpoint'] == 'index']
+    assert slow
+    for entry in slow:
+        assert entry['call_site'] != 'unknown'
+        assert not entry['call_site'].startswith('utils/request_metrics.py')
+        assert re.match(r'^[\w/]+\.py:\d+ in \w+$', entry['call_site'])
+    assert any(line.startswith('Slow query') and slow[0]['call_site'] in line for line in logged)
+    total = re.search(r'^polyquiz_slow_queries_total (\d+)$', prometheus_text(), re.M)
+    assert int(total.group(1)) == len(recent_slow_queries())
+
+def test_metrics_endpoint_needs_the_token_or_an_admin(metrics_app):
+    app = metrics_app(METRICS_TOKEN='scrape-secret')
+    with app.app_context():
+        seed_defaults()
+    client = app.test_client()
+    client.get('/login')
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'scrape-secret'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    name = 'polyquiz_request_duration_seconds'
+    labels = 'endpoint="auth.login",method="GET"'
+    buckets = [int(count) for count in re.findall(rf'^{name}_bucket{{{labels},le="[^"]+"}} (\d+)$', response.text, re.M)]
+    assert len(buckets) == len(DURATION_BUCKETS) + 1
+    assert buckets == sorted(buckets) # Cumulative
+    assert buckets[-1] == 1
+    assert re.search(rf'^{name}_count{{{labels}}} 1$', response.text, re.M)
+
+    admin = app.test_client()
+    admin.post('/login', data=dict(username=DEFAULT_ADMIN_USERNAME, password=DEFAULT_ADMIN_PASSWORD))
+    assert admin.get('/metrics').status_code == 200
+
+def test_metrics_endpoint_without_a_token_is_admin_only(metrics_app):
+    client = metrics_app(METRICS_TOKEN=None).test_client()
+    assert client.get('/metrics', headers={'Authorization': 'Bearer None'}).status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 403
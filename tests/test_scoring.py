@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import select
+from database import db
+from models import Chapter, Subject, User, UserQuizAttempt
+from utils.attempt_codec import decode_answer_sheet
+from utils.scoring import AnswerKey, record_attempts
+
+# Question ids out of order on purpose: the key sorts them
+KEY = AnswerKey(question_ids=[30, 10, 20], correct_options=[3, 1, 2], point_values=[2, 1, 1], negative_marks=[0.5, 0.25, 0])
+
+def score(*sheets):
+    scored = KEY.score(KEY.encode_sheets(list(sheets)))
+    return [{name: scored[name][row].item() for name in ('score', 'correct', 'wrong', 'skipped')} for row in range(len(sheets))]
+
+def test_all_correct():
+    assert score({10: 1, 20: 2, 30: 3}) == [{'score': 4.0, 'correct': 3, 'wrong': 0, 'skipped': 0}]
+
+def test_wrong_answers_lose_their_negative_mark():
+    assert score({10: 2, 20: 1, 30: 1}) == [{'score': -0.75, 'correct': 0, 'wrong': 3, 'skipped': 0}]
+
+def test_skipped_and_invalid_answers_score_nothing():
+    # 99 is not in the chapter, 5 and 0 are not options: all three count as skipped
+    assert score({10: 1, 20: 5, 30: 0, 99: 1}) == [{'score': 1.0, 'correct': 1, 'wrong': 0, 'skipped': 2}]
+    assert score({}) == [{'score': 0.0, 'correct': 0, 'wrong': 0, 'skipped': 3}]
+
+def test_many_sheets_are_scored_independently():
+    assert [result['score'] for result in score({10: 1}, {30: 1}, {10: 1, 20: 2, 30: 3}, {})] == [1.0, -0.5, 4.0, 0.0]
+
+def test_encode_row_keeps_only_answered_questions():
+    choices = KEY.encode_sheets([{30: 3, 10: 2}])
+    sheet = decode_answer_sheet(KEY.encode_row(choices[0], 'ab' * 8))
+    assert sheet.as_dict() == {10: 2, 30: 3}
+    assert sheet.set_version == 'ab' * 8
+
+@pytest.fixture
+def chapter_and_users(app):
+    subject = Subject(name='S')
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name='C', subject_id=subject.id, for_class='Class 9')
+    users = [User(username=f'u{number}', email=f'u{number}@example.com', password_hash='x', total_points=1.0)
+             for number in range(2)]
+    db.session.add(chapter)
+    db.session.add_all(users)
+    db.session.commit()
+    return chapter.id, [user.id for user in users]
+
+def test_record_attempts_writes_attempts_and_adds_points(chapter_and_users):
+    chapter_id, (first, second) = chapter_and_users
+    results = record_attempts(chapter_id, 'ab' * 8, KEY, [
+        (first, {10: 1, 20: 2, 30: 3}),
+        (second, {10: 2}),
+        (first, {30: 3}),
+    ], batch_size=2) # Two INSERT batches
+    db.session.commit()
+
+    assert [result['score'] for result in results] == [4.0, -0.25, 2.0]
+    attempts = db.session.execute(select(UserQuizAttempt.id, UserQuizAttempt.user_id, UserQuizAttempt.score)
+                                  .order_by(UserQuizAttempt.id)).all()
+    assert [(attempt.id, attempt.user_id, attempt.score) for attempt in attempts] == \
+        [(result['attempt_id'], user_id, result['score']) for result, user_id in zip(results, (first, second, first))]
+    points = dict(db.session.execute(select(User.id, User.total_points)).all())
+    assert points == {first: 1.0 + 4.0 + 2.0, second: 1.0 - 0.25}
+
+def test_record_attempts_counts_from_zero_when_points_are_null(chapter_and_users):
+    chapter_id, (first, _) = chapter_and_users
+    db.session.get(User, first).total_points = None
+    db.session.commit()
+    record_attempts(chapter_id, None, KEY, [(first, {20: 2})])
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(User, first).total_points == 1.0
+    assert db.session.scalar(select(UserQuizAttempt.score)) == 1.0
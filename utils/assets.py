@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli # Optional: without it only .gz copies are built
+except ImportError:
+    brotli = None
+
+# Source folders under static/ that are fingerprinted (uploads are user media, served as they are)
+ASSET_DIRECTORIES = ('css', 'js', 'images')
+# Output folder under static/ and its manifest: logical name ('css/style.css') -> 'dist/css/style.<hash>.css'
+DIST_DIRECTORY = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt'}
+# Pre-compressed variants in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_manifest = {}
+
+def _write_atomic(path, data):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as output:
+        output.write(data)
+    os.replace(temp_path, path)
+
+def _compressed_variants(data):
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)} # mtime=0: same bytes on every build
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {extension: compressed for extension, compressed in variants.items() if len(compressed) < len(data)}
+
+def build_assets(static_folder):
+    """
+    Copies every file of ASSET_DIRECTORIES to static/dist under a content-hashed name, with .gz/.br
+    copies of text assets, and writes the manifest. Files of earlier builds are kept, so pages
+    rendered (or cached) before a deploy still find their assets.
+    :return: (manifest dict, bytes of the originals, bytes of their smallest encoded variants)
+    """
+    dist_folder = os.path.join(static_folder, DIST_DIRECTORY)
+    manifest, original_bytes, encoded_bytes = {}, 0, 0
+    for directory in ASSET_DIRECTORIES:
+        for root, _, filenames in os.walk(os.path.join(static_folder, directory)):
+            for filename in sorted(filenames):
+                source = os.path.join(root, filename)
+                logical_name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+                with open(source, 'rb') as source_file:
+                    data = source_file.read()
+                stem, extension = os.path.splitext(logical_name)
+                hashed_name = f"{DIST_DIRECTORY}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+                target = os.path.join(static_folder, *hashed_name.split('/'))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if not os.path.exists(target): # Same name = same content, already built
+                    _write_atomic(target, data)
+                    if extension in COMPRESSIBLE_EXTENSIONS:
+                        for variant_extension, compressed in _compressed_variants(data).items():
+                            _write_atomic(target + variant_extension, compressed)
+                manifest[logical_name] = hashed_name
+                original_bytes += len(data)
+                encoded_bytes += min([len(data)] + [os.path.getsize(target + ext) for _, ext in ENCODINGS
+                                                    if os.path.exists(target + ext)])
+    os.makedirs(dist_folder, exist_ok=True)
+    _write_atomic(os.path.join(dist_folder, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest, original_bytes, encoded_bytes
+
+def load_manifest(static_folder):
+    """Reads static/dist/manifest.json; an empty manifest (no build yet, e.g. in development) is fine."""
+    try:
+        with open(os.path.join(static_folder, DIST_DIRECTORY, MANIFEST_NAME), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+def asset_url(filename, **values):
+    """
+    url_for('static', filename=...) that resolves the fingerprinted name from the build manifest
+    (Jinja global). Falls back to the plain file when 'flask build-assets' hasn't been run.
+    """
+    return url_for('static', filename=_manifest.get(filename, filename), **values)
+
+def _send_built_asset(filename):
+    """Serves a fingerprinted asset, pre-compressed when the client accepts it, cached for a year."""
+    static_folder = current_app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = None
+    for candidate, extension in ENCODINGS:
+        if request.accept_encodings[candidate] > 0 and os.path.isfile(os.path.join(static_folder, filename + extension)):
+            encoding = candidate
+            filename += extension
+            break
+    response = send_from_directory(static_folder, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True # The name changes with the content, so never revalidate
+    return response
+
+def init_assets(app):
+    """
+    Loads the asset manifest, registers asset_url() for templates, serves static/dist files with
+    immutable cache headers and pre-compressed variants, and adds the 'flask build-assets' command.
+    """
+    global _manifest
+    _manifest = load_manifest(app.static_folder)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    serve_static = app.view_functions['static']
+    def static_with_built_assets(filename):
+        if filename.startswith(DIST_DIRECTORY + '/') and not filename.endswith(MANIFEST_NAME):
+            return _send_built_asset(filename)
+        return serve_static(filename=filename)
+    app.view_functions['static'] = static_with_built_assets
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprints and pre-compresses static/css, js and images into static/dist (run on each deploy)."""
+        manifest, original_bytes, encoded_bytes = build_assets(app.static_folder)
+        print(f"Built {len(manifest)} asset(s): {original_bytes} bytes, {encoded_bytes} bytes compressed"
+              f"{'' if brotli else ' (gzip only; install Brotli for .br files)'}.")
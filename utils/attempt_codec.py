@@ -0,0 +1,66 @@
+import struct
+from collections import namedtuple
+import numpy as np
+
+# Binary answer sheet layout (all little-endian), stored in UserQuizAttempt.answer_sheet:
+#   format  uint8        ANSWER_SHEET_FORMAT
+#   set     8 bytes      QuizSet.version (16 hex chars) as raw bytes, zeros if unknown
+#   count   uint32       number of answered questions
+#   ids     count x uint32   question ids, ascending
+#   options count x uint8    chosen option (1-4) for each id
+ANSWER_SHEET_FORMAT = 1
+_HEADER = struct.Struct('<B8sI')
+_QUESTION_ID_DTYPE = np.dtype('<u4')
+_OPTION_DTYPE = np.dtype('u1')
+_NO_SET_VERSION = bytes(8)
+
+class AnswerSheetDecodeError(ValueError):
+    pass
+
+class AnswerSheet(namedtuple('AnswerSheet', ['set_version', 'question_ids', 'options'])):
+    """A decoded answer sheet: set_version (hex str or None) and aligned NumPy arrays."""
+    __slots__ = ()
+
+    def as_dict(self):
+        """{question_id: chosen_option} as plain ints."""
+        return dict(zip(self.question_ids.tolist(), self.options.tolist()))
+
+def encode_answer_arrays(question_ids, options, set_version=None):
+    """
+    Packs aligned question id / chosen option arrays (skipped questions already removed).
+    :param set_version: QuizSet.version the sheet was answered against.
+    :return: bytes (13 + 5 per answered question).
+    """
+    question_ids = np.asarray(question_ids, dtype=np.int64)
+    options = np.asarray(options, dtype=np.int64)
+    order = np.argsort(question_ids, kind='stable')
+    set_bytes = bytes.fromhex(set_version) if set_version else _NO_SET_VERSION
+    return (
+        _HEADER.pack(ANSWER_SHEET_FORMAT, set_bytes, len(question_ids))
+        + question_ids[order].astype(_QUESTION_ID_DTYPE).tobytes()
+        + options[order].astype(_OPTION_DTYPE).tobytes()
+    )
+
+def encode_answer_sheet(answers, set_version=None):
+    """:param answers: {question_id: chosen_option} for the answered questions."""
+    return encode_answer_arrays(list(answers.keys()), list(answers.values()), set_version)
+
+def decode_answer_sheet(blob):
+    """
+    :param blob: bytes written by encode_answer_sheet / encode_answer_arrays.
+    :return: AnswerSheet (arrays are read-only views over the blob, no copy).
+    :raises AnswerSheetDecodeError: Unknown format byte or truncated data.
+    """
+    if len(blob) < _HEADER.size:
+        raise AnswerSheetDecodeError("Answer sheet is truncated.")
+    data_format, set_bytes, count = _HEADER.unpack_from(blob)
+    if data_format != ANSWER_SHEET_FORMAT:
+        raise AnswerSheetDecodeError(f"Unsupported answer sheet format {data_format}.")
+    ids_end = _HEADER.size + count * _QUESTION_ID_DTYPE.itemsize
+    if len(blob) != ids_end + count * _OPTION_DTYPE.itemsize:
+        raise AnswerSheetDecodeError("Answer sheet length does not match its question count.")
+    return AnswerSheet(
+        set_version=set_bytes.hex() if set_bytes != _NO_SET_VERSION else None,
+        question_ids=np.frombuffer(blob, dtype=_QUESTION_ID_DTYPE, count=count, offset=_HEADER.size),
+        options=np.frombuffer(blob, dtype=_OPTION_DTYPE, count=count, offset=ids_end),
+    )
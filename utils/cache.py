@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with a per-entry time-to-live.
+    Every gunicorn worker holds its own instance, so hit/miss counters are per worker.
+    With max_entries set, storing a new key beyond that evicts the least recently used one
+    (expired entries are otherwise only replaced when their key is read again).
+    """
+
+    def __init__(self, ttl_seconds=60, max_entries=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> token of the load in flight; invalidate() drops it, so a load that started before an
+        # invalidation of its key (or of everything) doesn't store its result. Other keys are unaffected.
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value for key, calling loader() to (re)build it when missing or expired.
+        :param key: Any hashable cache key.
+        :param loader: Zero-argument callable returning the fresh value.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+            token = self._loading[key] = object()
+
+        # Load outside the lock so a slow query doesn't block readers of other keys
+        try:
+            value = loader()
+        except BaseException:
+            with self._lock:
+                if self._loading.get(key) is token:
+                    del self._loading[key]
+            raise
+        with self._lock:
+            # If invalidated meanwhile, the value may predate the change: return it, but don't cache it
+            if self._loading.get(key) is token:
+                del self._loading[key]
+                self._store(key, value)
+        return value
+
+    def set(self, key, value):
+        """Stores a value that is already known (e.g. just loaded elsewhere) with a fresh TTL."""
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        # Caller holds the lock
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drops a single key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._loading.clear()
+            else:
+                self._data.pop(key, None)
+                self._loading.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
@@ -0,0 +1,65 @@
+from sqlalchemy import and_, func, select
+from database import db
+from models import Subject, Chapter, QuizQuestion
+from utils.cache import TTLCache
+from utils.db_routing import primary_reads
+
+# for_class (None = every class) -> list of subject dicts
+_catalog_cache = TTLCache()
+
+def init_class_catalog(app):
+    """Applies CATALOG_CACHE_TTL from the app config to the in-process catalog cache."""
+    _catalog_cache.ttl_seconds = app.config.get('CATALOG_CACHE_TTL', 300)
+
+def _build_catalog(for_class):
+    chapter_join = and_(Chapter.subject_id == Subject.id, Chapter.is_active.is_(True))
+    if for_class is not None:
+        chapter_join = and_(chapter_join, Chapter.for_class == for_class)
+
+    # One grouped query for the whole tree: active subjects -> active chapters -> question counts.
+    # Cached for CATALOG_CACHE_TTL, so read from the primary (never a lagging replica).
+    with primary_reads():
+        rows = db.session.execute(
+            select(Subject.id, Subject.name, Chapter.id, Chapter.name, Chapter.for_class, func.count(QuizQuestion.id))
+            .select_from(Subject)
+            .outerjoin(Chapter, chapter_join)
+            .outerjoin(QuizQuestion, QuizQuestion.chapter_id == Chapter.id)
+            .where(Subject.is_active.is_(True))
+            .group_by(Subject.id, Subject.name, Chapter.id, Chapter.name, Chapter.for_class)
+            .order_by(Subject.name, Chapter.name)
+        ).all()
+
+    subjects = {}
+    for subject_id, subject_name, chapter_id, chapter_name, chapter_class, question_count in rows:
+        subject = subjects.setdefault(subject_id, {'id': subject_id, 'name': subject_name, 'question_count': 0, 'chapters': []})
+        if chapter_id is None:
+            continue # Subject without (matching) active chapters
+        subject['chapters'].append({
+            'id': chapter_id,
+            'name': chapter_name,
+            'for_class': chapter_class,
+            'subject_id': subject_id,
+            'question_count': question_count,
+        })
+        subject['question_count'] += question_count
+
+    catalog = list(subjects.values())
+    if for_class is not None:
+        # A class only sees subjects that actually have chapters for it
+        catalog = [subject for subject in catalog if subject['chapters']]
+    return catalog
+
+def get_class_catalog(for_class=None):
+    """
+    Returns the subject -> chapter tree (with question counts) as plain dicts, cached per class.
+    :param for_class: e.g. 'Class 9'; None returns every active subject with chapters of all classes.
+    :return: List of {'id', 'name', 'question_count', 'chapters': [{'id', 'name', 'for_class', 'subject_id', 'question_count'}]}
+    """
+    return _catalog_cache.get_or_load(for_class, lambda: _build_catalog(for_class))
+
+def invalidate_class_catalog():
+    """Call after committing changes to subjects, chapters or questions."""
+    _catalog_cache.invalidate()
+
+def class_catalog_stats():
+    return _catalog_cache.stats()
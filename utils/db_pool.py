@@ -0,0 +1,208 @@
+import threading
+import time
+from flask import jsonify
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+from database import db, REPLICA_BIND
+
+# Connection pool presets per deployment profile (DB_PROFILE). Sizes are per worker process:
+# a gunicorn deploy opens up to workers * (pool_size + max_overflow) connections, which has to
+# stay below the server's max_connections (or the pgbouncer pool size).
+DB_PROFILES = {
+    # 'flask run' / debugging: small pool, waits long rather than failing, no statement limit
+    'development': {'pool_size': 2, 'max_overflow': 3, 'pool_timeout': 30, 'pool_recycle': 1800,
+                    'pool_pre_ping': True, 'statement_timeout_ms': 0, 'connect_timeout': 10},
+    # gunicorn web workers: fail fast (503) instead of queueing requests behind a full pool,
+    # recycle before typical server/load balancer idle timeouts, cap runaway queries
+    'web': {'pool_size': 5, 'max_overflow': 5, 'pool_timeout': 5, 'pool_recycle': 1800,
+            'pool_pre_ping': True, 'statement_timeout_ms': 15000, 'connect_timeout': 5},
+    # 'flask run-jobs' processes: few connections, long imports are allowed to run
+    'worker': {'pool_size': 2, 'max_overflow': 0, 'pool_timeout': 60, 'pool_recycle': 1800,
+               'pool_pre_ping': True, 'statement_timeout_ms': 300000, 'connect_timeout': 10},
+    # Behind pgbouncer in transaction mode: pgbouncer does the pooling (NullPool here), and
+    # startup options like statement_timeout are rejected, so set it on the database role instead
+    'pgbouncer': {'pool_size': 0, 'max_overflow': 0, 'pool_timeout': 0, 'pool_recycle': -1,
+                  'pool_pre_ping': False, 'statement_timeout_ms': 0, 'connect_timeout': 5},
+}
+DEFAULT_PROFILE = 'web'
+
+# Config keys that override single values of the chosen preset (None = keep the preset's value)
+POOL_OVERRIDES = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+    'DB_STATEMENT_TIMEOUT_MS': 'statement_timeout_ms',
+    'DB_CONNECT_TIMEOUT': 'connect_timeout',
+}
+
+# --- Per-process pool counters, kept per engine (gauges like checked-out connections are read from the pool itself) ---
+
+class PoolMetrics:
+    """Checkout and connection counters of one engine's pool (primary and replica count separately)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {'checkouts': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0, 'timeouts': 0,
+                            'connects': 0, 'invalidations': 0}
+
+    def add(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] += value
+
+    def record_checkout(self, waited):
+        with self._lock:
+            self._values['checkouts'] += 1
+            self._values['wait_seconds_total'] += waited
+            self._values['wait_seconds_max'] = max(self._values['wait_seconds_max'], waited)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection and how often they time out."""
+    metrics = None # Set on the per-engine subclass made by _pool_class_with_metrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.add(timeouts=1)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+def _pool_class_with_metrics(base):
+    """
+    A subclass of the pool class owning a fresh PoolMetrics, made once per engine. The pool that
+    engine.dispose() recreates is of the same class, so the counters carry over.
+    """
+    metrics = PoolMetrics()
+    pool_class = type(base.__name__, (base,), {'metrics': metrics})
+
+    def count_connect(dbapi_connection, connection_record):
+        metrics.add(connects=1)
+
+    def count_invalidation(dbapi_connection, connection_record, exception):
+        # Stale connections found by pre-ping, or dropped after a disconnect error
+        metrics.add(invalidations=1)
+
+    event.listen(pool_class, 'connect', count_connect)
+    event.listen(pool_class, 'invalidate', count_invalidation)
+    return pool_class
+
+def _coerce(value, like):
+    """Converts a config/env string to the type of the preset's value ('true'/'1' for flags)."""
+    if isinstance(value, str):
+        if isinstance(like, bool):
+            return value.strip().lower() in ('1', 'true', 'yes', 'on')
+        return type(like)(value)
+    return value
+
+def pool_settings(config):
+    """
+    The preset named by DB_PROFILE with the DB_POOL_* / DB_STATEMENT_TIMEOUT_MS / DB_CONNECT_TIMEOUT
+    overrides applied.
+    :raises ValueError: For an unknown profile name.
+    """
+    profile = config.get('DB_PROFILE') or DEFAULT_PROFILE
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}' (use one of: {', '.join(DB_PROFILES)}).")
+    settings = dict(DB_PROFILES[profile])
+    for config_key, setting in POOL_OVERRIDES.items():
+        if config.get(config_key) not in (None, ''):
+            settings[setting] = _coerce(config[config_key], settings[setting])
+    return settings
+
+def engine_options(database_url, settings):
+    """
+    Translates pool settings into create_engine() keyword arguments for the given database.
+    In-memory SQLite keeps SQLAlchemy's own pool (each connection would be a separate, empty database).
+    """
+    url = make_url(database_url)
+    options = {}
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return options
+        # SQLite has no statement timeout; wait this long for a locked database instead of failing at once
+        options['connect_args'] = {'timeout': max(settings['pool_timeout'], 1)}
+    elif url.get_backend_name() == 'postgresql':
+        connect_args = {'connect_timeout': settings['connect_timeout']}
+        if settings['statement_timeout_ms']:
+            connect_args['options'] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+        options['connect_args'] = connect_args
+
+    if settings['pool_size'] <= 0:
+        # A new connection per checkout (an external pooler does the pooling)
+        options['poolclass'] = _pool_class_with_metrics(NullPool)
+        return options
+    options.update(poolclass=_pool_class_with_metrics(TimedQueuePool),
+                   pool_size=settings['pool_size'], max_overflow=settings['max_overflow'],
+                   pool_timeout=settings['pool_timeout'], pool_recycle=settings['pool_recycle'],
+                   pool_pre_ping=settings['pool_pre_ping'])
+    return options
+
+def pool_stats(engine):
+    """Live pool gauges of the engine plus this process's checkout counters for that engine."""
+    pool = engine.pool
+    metrics = getattr(pool, 'metrics', None) or PoolMetrics() # In-memory SQLite keeps SQLAlchemy's own pool
+    stats = metrics.snapshot()
+    stats['pool_class'] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        stats.update(pool_size=pool.size(), checked_out=pool.checkedout(), checked_in=pool.checkedin(),
+                     overflow=max(pool.overflow(), 0), max_overflow=pool._max_overflow)
+    stats['wait_ms_avg'] = round(stats['wait_seconds_total'] / stats['checkouts'] * 1000, 3) if stats['checkouts'] else 0.0
+    stats['wait_ms_max'] = round(stats.pop('wait_seconds_max') * 1000, 3)
+    del stats['wait_seconds_total']
+    return stats
+
+def reset_pool_stats(engine):
+    metrics = getattr(engine.pool, 'metrics', None)
+    if metrics is not None:
+        metrics.reset()
+
+def database_health():
+    """
+    Round-trips 'SELECT 1' through the pool.
+    :return: ({'status', 'database', 'ping_ms'}, HTTP status) with 503 when the database can't be reached.
+    """
+    started = time.perf_counter()
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    except exc.SQLAlchemyError as e:
+        return {'status': 'error', 'database': type(e).__name__}, 503
+    return {'status': 'ok', 'database': 'ok', 'ping_ms': round((time.perf_counter() - started) * 1000, 3)}, 200
+
+def init_db_pool(app):
+    """
+    Sets SQLALCHEMY_ENGINE_OPTIONS from DB_PROFILE and the DB_* overrides (must run before init_db,
+    which creates the engine). Options set explicitly in SQLALCHEMY_ENGINE_OPTIONS win over the preset.
+    With DATABASE_REPLICA_URL set, adds the 'replica' bind with the same preset (see utils/db_routing.py).
+    Adds the public /health endpoint (load balancer check: database reachable, no pool details).
+    """
+    settings = pool_settings(app.config)
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], settings)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.config['DB_POOL_SETTINGS'] = settings
+
+    replica_url = app.config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, {'url': replica_url, **engine_options(replica_url, settings)})
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+    def health():
+        body, status = database_health()
+        return jsonify(body), status
+    app.add_url_rule('/health', 'health', health)
@@ -0,0 +1,98 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context, session
+from sqlalchemy import event
+from database import db, REPLICA_BIND, RoutingSession
+
+PRIMARY = 'primary'
+
+# Flask session key: until this timestamp the browser's reads stay on the primary (read-your-writes)
+STICKY_SESSION_KEY = '_db_primary_until'
+
+# --- Per-process counters of how replica_reads requests were routed ---
+_stats_lock = threading.Lock()
+_stats = {'replica': 0, 'primary_sticky': 0, 'primary_no_replica': 0}
+
+def replica_configured():
+    return REPLICA_BIND in db.engines
+
+def _sticky():
+    return session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+def replica_reads(view):
+    """
+    Marks a read-only student view: its SELECTs go to the replica (when DATABASE_REPLICA_URL is
+    set), unless this browser wrote something within the last REPLICA_STICKY_SECONDS, so a student
+    sees their own submitted attempt even while the replica lags. Put it below @login_required.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not replica_configured():
+            route = 'primary_no_replica'
+        elif _sticky():
+            route = 'primary_sticky'
+        else:
+            route = 'replica'
+            g.db_read_target = REPLICA_BIND
+        with _stats_lock:
+            _stats[route] += 1
+        return view(*args, **kwargs)
+    return wrapped
+
+@contextmanager
+def primary_reads():
+    """
+    Reads inside this block go to the primary even in a replica_reads view. Used for per-worker cache
+    fills: a lagging replica row would otherwise be served from the cache for a whole TTL.
+    """
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('db_read_target')
+    g.db_read_target = PRIMARY
+    try:
+        yield
+    finally:
+        g.db_read_target = previous
+
+def stick_to_primary(seconds):
+    """Keeps this browser's reads on the primary for the next `seconds` (call after a write it will read back)."""
+    session[STICKY_SESSION_KEY] = time.time() + seconds
+
+def _wrote():
+    # The rest of this request reads the primary, and so does this browser for a while (see init_db_routing)
+    if has_request_context():
+        g.db_read_target = PRIMARY
+        g.db_wrote = True
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(db_session, flush_context):
+    _wrote()
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _after_bulk_write(orm_execute_state):
+    # Core-style insert()/update()/delete() through db.session (e.g. record_attempts) bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _wrote()
+
+def routing_stats():
+    with _stats_lock:
+        return dict(_stats, replica_configured=replica_configured())
+
+def init_db_routing(app):
+    """
+    After any request that wrote to the database (an attempt submission, a profile change), keeps the
+    writer's reads on the primary for REPLICA_STICKY_SECONDS. Adds an X-DB-Read response header
+    ('replica' / 'primary') while a replica is configured.
+    """
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10)
+
+    @app.after_request
+    def _read_your_writes(response):
+        if replica_configured():
+            if g.get('db_wrote'):
+                stick_to_primary(sticky_seconds)
+            response.headers['X-DB-Read'] = 'replica' if g.get('db_read_target') == REPLICA_BIND else PRIMARY
+        return response
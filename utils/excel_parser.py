@@ -1,40 +1,162 @@
+import os
 import pandas as pd
-import math # Import math for checking NaN
+from openpyxl import load_workbook
 
-def parse_quiz_excel(file_path):
+# --- Column contract of the question bank sheet (header row, Bengali names) ---
+QUIZ_NUMBER_COLUMN = 'কুইজ নাম্বার'
+QUESTION_COLUMN = 'প্রশ্ন'
+OPTION_COLUMNS = ['অপশন ১', 'অপশন ২', 'অপশন ৩', 'অপশন ৪']
+CORRECT_OPTION_COLUMN = 'সঠিক অপশন নাম্বার'
+NEGATIVE_MARK_COLUMN = 'নেগেটিভ মার্ক'
+POINT_COLUMN = 'পয়েন্ট'
+MEDIA_COLUMN = 'ভিডিও/ছবি লিঙ্ক' # Optional
+
+REQUIRED_COLUMNS = [QUIZ_NUMBER_COLUMN, QUESTION_COLUMN] + OPTION_COLUMNS + [CORRECT_OPTION_COLUMN, NEGATIVE_MARK_COLUMN, POINT_COLUMN]
+TEXT_COLUMNS = [QUESTION_COLUMN] + OPTION_COLUMNS + [MEDIA_COLUMN]
+
+# Spreadsheet row of the first data row (row 1 is the header)
+FIRST_DATA_ROW = 2
+# How many row errors are spelled out in the exception message
+MAX_REPORTED_ERRORS = 20
+# Rows per chunk yielded by iter_quiz_file_chunks
+DEFAULT_CHUNK_SIZE = 1000
+
+class QuizParseError(ValueError):
+    """
+    Raised when an uploaded question sheet is invalid.
+    :param errors: List of (row_number, message) tuples; row_number is None for sheet-level problems.
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        shown = [f"Row {row}: {message}" if row is not None else message for row, message in errors[:MAX_REPORTED_ERRORS]]
+        if len(errors) > MAX_REPORTED_ERRORS:
+            shown.append(f"... and {len(errors) - MAX_REPORTED_ERRORS} more error(s)")
+        super().__init__('; '.join(shown))
+
+def read_quiz_file(file_path):
+    """Reads an .xlsx or .csv question sheet into a DataFrame, keeping text columns as strings."""
+    text_dtypes = {col: str for col in TEXT_COLUMNS}
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        return pd.read_csv(file_path, dtype=text_dtypes, encoding='utf-8-sig')
+    return pd.read_excel(file_path, dtype=text_dtypes)
+
+def parse_quiz_dataframe(df, first_row_number=FIRST_DATA_ROW, row_numbers=None):
+    """
+    Validates and converts a question sheet column-by-column (no per-row Python loop for checks).
+    :param df: DataFrame with the Bengali header contract.
+    :param first_row_number: Spreadsheet row number of df's first row, used in error messages.
+    :param row_numbers: Optional explicit spreadsheet row number per df row (overrides first_row_number).
+    :return: List of question dicts ready for QuestionImport.apply().
+    :raises QuizParseError: With every row-level error found, not just the first one.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise QuizParseError([(None, f"Missing required column(s): {', '.join(missing)}. Required: {', '.join(REQUIRED_COLUMNS)}")])
+
+    df = df.reset_index(drop=True)
+    row_numbers = pd.Index(row_numbers) if row_numbers is not None else df.index + first_row_number
+    errors = []
+
+    def collect(mask, message):
+        for row in row_numbers[mask.to_numpy()]:
+            errors.append((int(row), message))
+
+    # Text columns: blank cells are errors, values are kept as typed (question_text is the import match key)
+    text = {}
+    for col in [QUESTION_COLUMN] + OPTION_COLUMNS:
+        values = df[col].astype('string')
+        collect(values.isna() | (values.str.strip() == ''), f"'{col}' is empty.")
+        text[col] = values
+
+    # Numeric columns: coerce once, anything unparsable becomes NaN and is reported
+    quiz_number = pd.to_numeric(df[QUIZ_NUMBER_COLUMN], errors='coerce')
+    collect(quiz_number.isna() | (quiz_number % 1 != 0), f"'{QUIZ_NUMBER_COLUMN}' must be a whole number.")
+
+    correct_option = pd.to_numeric(df[CORRECT_OPTION_COLUMN], errors='coerce')
+    collect(~correct_option.isin([1, 2, 3, 4]), f"'{CORRECT_OPTION_COLUMN}' must be between 1 and 4.")
+
+    point_value = pd.to_numeric(df[POINT_COLUMN], errors='coerce')
+    collect(point_value.isna(), f"'{POINT_COLUMN}' must be a number.")
+
+    negative_mark = pd.to_numeric(df[NEGATIVE_MARK_COLUMN], errors='coerce')
+    collect(negative_mark.isna(), f"'{NEGATIVE_MARK_COLUMN}' must be a number.")
+
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        raise QuizParseError(errors)
+
+    if MEDIA_COLUMN in df.columns:
+        media_url = df[MEDIA_COLUMN].astype('string').str.strip()
+        media_url = media_url.astype(object).where(media_url.notna() & (media_url != ''), None)
+    else:
+        media_url = pd.Series([None] * len(df), dtype=object)
+
+    parsed = pd.DataFrame({
+        'quiz_number': quiz_number.astype('int64'),
+        'question_text': text[QUESTION_COLUMN].astype(object),
+        'option1': text[OPTION_COLUMNS[0]].astype(object),
+        'option2': text[OPTION_COLUMNS[1]].astype(object),
+        'option3': text[OPTION_COLUMNS[2]].astype(object),
+        'option4': text[OPTION_COLUMNS[3]].astype(object),
+        'correct_option_number': correct_option.astype('int64'),
+        'point_value': point_value.astype('float64'),
+        'negative_mark': negative_mark.astype('float64'),
+        'media_url': media_url,
+    })
+    return parsed.to_dict('records')
+
+def _iter_csv_chunks(file_path, chunk_size):
+    text_dtypes = {col: str for col in TEXT_COLUMNS}
+    first_row_number = FIRST_DATA_ROW
+    for df in pd.read_csv(file_path, dtype=text_dtypes, encoding='utf-8-sig', chunksize=chunk_size):
+        yield parse_quiz_dataframe(df, first_row_number=first_row_number)
+        first_row_number += len(df)
+
+def _iter_sheet_chunks(sheet, chunk_size):
+    rows = sheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None or not any(cell is not None for cell in header):
+        return # Empty sheet
+    header = [str(cell).strip() if cell is not None else None for cell in header]
+
+    buffer = []
+    row_numbers = []
+    for row_number, values in enumerate(rows, start=FIRST_DATA_ROW):
+        if not any(cell is not None and str(cell).strip() != '' for cell in values):
+            continue # Skip blank rows (e.g. formatted but empty rows at the end of a sheet)
+        buffer.append(values)
+        row_numbers.append(row_number)
+        if len(buffer) == chunk_size:
+            yield _parse_sheet_rows(sheet.title, header, buffer, row_numbers)
+            buffer, row_numbers = [], []
+    if buffer:
+        yield _parse_sheet_rows(sheet.title, header, buffer, row_numbers)
+
+def _parse_sheet_rows(sheet_title, header, rows, row_numbers):
+    width = len(header)
+    df = pd.DataFrame([tuple(values[:width]) + (None,) * (width - len(values)) for values in rows], columns=header)
+    df = df.loc[:, [col is not None for col in df.columns]]
+    try:
+        return parse_quiz_dataframe(df, row_numbers=row_numbers)
+    except QuizParseError as e:
+        raise QuizParseError([(row, f"[{sheet_title}] {message}") for row, message in e.errors]) from None
+
+def iter_quiz_file_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams a question sheet and yields validated question dicts in lists of at most chunk_size.
+    .xlsx files are read with openpyxl's read-only iterator, every worksheet in turn (each with its
+    own header row), so peak memory depends on chunk_size rather than the workbook size.
+    :param file_path: Path of the saved upload (.xlsx or .csv).
+    :param chunk_size: Maximum number of rows per yielded list.
+    :raises QuizParseError: For the first chunk that contains invalid rows.
+    """
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        yield from _iter_csv_chunks(file_path, chunk_size)
+        return
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
     try:
-        df = pd.read_excel(file_path)
-        questions_data = []
-        for index, row in df.iterrows():
-            # Validate required columns
-            required_cols = ['কুইজ নাম্বার', 'প্রশ্ন', 'অপশন ১', 'অপশন ২', 'অপশন ৩', 'অপশন ৪', 'সঠিক অপশন নাম্বার', 'নেগেটিভ মার্ক', 'পয়েন্ট']
-            if not all(col in df.columns for col in required_cols):
-                raise ValueError(f"Missing one or more required columns in the Excel sheet. Required: {', '.join(required_cols)}")
-            
-            # Use .get() and check for NaN for optional/nullable fields
-            media_url_val = row.get('ভিডিও/ছবি লিঙ্ক')
-            if pd.isna(media_url_val): # Check if it's NaN (Not a Number) from pandas
-                media_url_val = None
-            else:
-                media_url_val = str(media_url_val).strip() # Convert to string if not NaN
-
-            question = {
-                'quiz_number': int(row['কুইজ নাম্বার']), # Assuming this is quiz ID or just a serial
-                'question_text': str(row['প্রশ্ন']),
-                'option1': str(row['অপশন ১']),
-                'option2': str(row['অপশন ২']),
-                'option3': str(row['অপশন ৩']),
-                'option4': str(row['অপশন ৪']),
-                'correct_option_number': int(row['সঠিক অপশন নাম্বার']),
-                'point_value': float(row['পয়েন্ট']),
-                'negative_mark': float(row['নেগেটিভ মার্ক']),
-                'media_url': media_url_val
-            }
-            # Basic validation for correct_option_number
-            if not (1 <= question['correct_option_number'] <= 4):
-                raise ValueError(f"Invalid correct option number in row {index + 2} (Quiz Number {question.get('quiz_number', 'N/A')}). Must be between 1 and 4.")
-            questions_data.append(question)
-        return questions_data
-    except Exception as e:
-        print(f"Error parsing Excel file: {e}")
-        raise e
\ No newline at end of file
+        for sheet in workbook.worksheets:
+            yield from _iter_sheet_chunks(sheet, chunk_size)
+    finally:
+        workbook.close() # Read-only workbooks keep the file handle open until closed
@@ -1,8 +1,12 @@
+import logging
 import cloudinary
 import cloudinary.uploader
 import os
+from urllib.parse import unquote, urlparse
 from flask import url_for, current_app # Added current_app for allowed_file
 
+logger = logging.getLogger(__name__)
+
 def init_cloudinary(app):
     """Initializes Cloudinary configuration with app settings."""
     cloudinary.config(
@@ -18,6 +22,19 @@ def upload_file_to_cloudinary(file, folder_name=None):
     :param folder_name: Optional subfolder name within the main Cloudinary upload folder.
     :return: The secure URL of the uploaded file, or None if upload fails.
     """
+    upload_result = upload_to_cloudinary(file, folder_name)
+    return upload_result.get('secure_url') if upload_result else None
+
+def upload_to_cloudinary(file, folder_name=None, chunk_size=None, **options):
+    """
+    Uploads a file to Cloudinary and returns Cloudinary's whole upload result
+    (secure_url, public_id, resource_type, and width/height for images and videos).
+    :param file: File object or path of a local file.
+    :param chunk_size: If given, uploads in parts of this many bytes (upload_large), so only
+                       one part is held in memory at a time.
+    :param options: Extra upload options (e.g. public_id, overwrite).
+    :return: The upload result dict, or None if upload fails.
+    """
     if not file:
         return None
     try:
@@ -27,54 +44,77 @@ def upload_file_to_cloudinary(file, folder_name=None):
         # Combine base folder with a subfolder if provided, otherwise just use base folder
         full_folder_path_on_cloudinary = os.path.join(base_upload_folder, folder_name or 'misc_uploads')
         
-        # Upload the file
-        upload_result = cloudinary.uploader.upload(file, folder=full_folder_path_on_cloudinary)
-        
-        # Return the secure URL of the uploaded file
-        return upload_result.get('secure_url')
-    except Exception as e:
-        print(f"Error uploading file to Cloudinary: {e}")
-        # In a production app, you might log the full traceback here
+        # Upload the file (resource_type='auto' so videos are accepted too)
+        if chunk_size:
+            return cloudinary.uploader.upload_large(file, folder=full_folder_path_on_cloudinary, resource_type='auto',
+                                                    chunk_size=chunk_size, **options)
+        return cloudinary.uploader.upload(file, folder=full_folder_path_on_cloudinary, resource_type='auto', **options)
+    except Exception:
+        logger.exception("Error uploading file to Cloudinary")
+        return None
+
+def parse_cloudinary_url(url, cloud_name=None):
+    """
+    Extracts the resource type and public ID (with folder path) from a Cloudinary URL of this account.
+    Example URL: https://res.cloudinary.com/cloud_name/image/upload/v12345/my_base_folder/sub_folder/public_id_of_file.png
+    gives ('image', 'my_base_folder/sub_folder/public_id_of_file').
+    Anything else (external links, other accounts' assets, look-alike paths) gives None, so it is never
+    handed to a Cloudinary delete.
+    :param url: The secure URL of the file on Cloudinary.
+    :param cloud_name: Account to accept (default: the configured CLOUDINARY_CLOUD_NAME).
+    :return: (resource_type, public_id), or None if the URL is not an upload URL of this account.
+    """
+    if not url:
+        return None
+    cloud_name = cloud_name or cloudinary.config().cloud_name
+    if not cloud_name:
+        return None # Without a configured account nothing can be verified as ours
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or parsed.hostname != 'res.cloudinary.com':
+        return None
+    # /<cloud_name>/<resource_type>/upload/[v<version>/]<public_id>.<ext>
+    segments = [unquote(segment) for segment in parsed.path.split('/')[1:]]
+    if len(segments) < 4 or segments[0] != cloud_name or segments[2] != 'upload':
+        return None
+    resource_type = segments[1]
+    if resource_type not in ('image', 'video', 'raw'):
+        return None
+
+    segments = segments[3:]
+    if segments[0][:1] == 'v' and segments[0][1:].isdigit():
+        segments = segments[1:]
+    public_id = '/'.join(segments)
+    if resource_type != 'raw': # Raw files keep their extension in the public ID
+        public_id = os.path.splitext(public_id)[0] # Removes '.png' or '.jpg'
+    if not public_id or '' in segments:
         return None
+    return resource_type, public_id
 
 def delete_file_from_cloudinary(url):
     """
     Deletes a file from Cloudinary using its URL.
+    For many files at once (imports, chapter/subject deletes) use utils.media_cleanup instead.
     :param url: The secure URL of the file on Cloudinary.
     :return: True if deletion is successful, False otherwise.
     """
-    if not url:
+    parsed = parse_cloudinary_url(url)
+    if not parsed:
         return False
     try:
-        # Extract the public ID including the folder path from the URL
-        # Example URL: https://res.cloudinary.com/cloud_name/image/upload/v12345/my_base_folder/sub_folder/public_id_of_file.png
-        # We need: my_base_folder/sub_folder/public_id_of_file
-        
-        # Get the path part after '/upload/' or '/v<version>/'
-        parts = url.split('/upload/')
-        if len(parts) < 2:
-            parts = url.split('/v') # Fallback if /upload/ is missing
-            if len(parts) < 2: return False # Not a valid Cloudinary URL
-            
-        public_id_with_version = parts[-1]
-        
-        # Remove version number if present (like v1234567890/) and file extension
-        public_id_path_with_ext = '/'.join(public_id_with_version.split('/')[1:]) # Removes potential 'v1234567890' part
-        public_id_without_ext = os.path.splitext(public_id_path_with_ext)[0] # Removes '.png' or '.jpg'
-
-        # Finally, delete from Cloudinary
-        cloudinary.uploader.destroy(public_id_without_ext)
-        print(f"Deleted {public_id_without_ext} from Cloudinary.")
+        resource_type, public_id = parsed
+        cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+        logger.info("Deleted %s from Cloudinary.", public_id)
         return True
-    except Exception as e:
-        print(f"Error deleting file from Cloudinary: {e}")
+    except Exception:
+        logger.exception("Error deleting file from Cloudinary: %s", url)
         return False
 
-def allowed_file(filename):
+def allowed_file(filename, config_key='ALLOWED_EXTENSIONS'):
     """
     Checks if a file's extension is allowed based on app configuration.
     :param filename: The name of the file.
+    :param config_key: App config entry holding the allowed extensions (e.g. 'ALLOWED_QUIZ_EXTENSIONS').
     :return: True if extension is allowed, False otherwise.
     """
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
\ No newline at end of file
+           filename.rsplit('.', 1)[1].lower() in current_app.config[config_key]
\ No newline at end of file
@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from flask import g, has_request_context
+from sqlalchemy import event, literal, null, select, union_all, update
+from database import db
+from models import User, AdminUser
+from utils.cache import TTLCache
+from utils.passwords import hash_password, password_needs_rehash, verify_password
+
+# Flask-Login session ids: '<id>' for users, 'admin_<id>' for admins (the format sessions already carry)
+ADMIN_ID_PREFIX = 'admin_'
+
+# session user id -> Principal (or None for an account that no longer exists); bounded by IDENTITY_CACHE_MAX_ENTRIES
+_principals = TTLCache(max_entries=10000)
+
+class Principal:
+    """
+    The logged-in account as Flask-Login's current_user: a few plain attributes copied from
+    User/AdminUser when the session is first seen, then served from the per-worker cache.
+    Read-only; routes that change an account's row call invalidate_principal() after committing.
+    Only identity fields live here: invalidate_principal() reaches one worker, so fields that change
+    during play (points, level, class) are read from the user row where they are shown.
+    """
+    __slots__ = ('id', 'is_admin', 'username', 'email')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, is_admin, username, email=None):
+        self.id = id
+        self.is_admin = is_admin
+        self.username = username
+        self.email = email
+
+    def get_id(self):
+        return session_user_id(self.id, self.is_admin)
+
+    def __eq__(self, other):
+        return isinstance(other, Principal) and self.get_id() == other.get_id()
+
+    def __hash__(self):
+        return hash(self.get_id())
+
+    def __repr__(self):
+        return f"<Principal {self.get_id()} {self.username}>"
+
+def session_user_id(account_id, is_admin=False):
+    return f"{ADMIN_ID_PREFIX}{account_id}" if is_admin else str(account_id)
+
+# --- Lookups (one query each) ---
+
+def _identity_columns(model, is_admin):
+    if is_admin:
+        return (literal(True).label('is_admin'), model.id, model.username, model.password_hash, null().label('email'))
+    return (literal(False).label('is_admin'), model.id, model.username, model.password_hash, model.email)
+
+def _principal_from_row(row):
+    return Principal(row.id, bool(row.is_admin), row.username, row.email)
+
+def _load_principal(user_id):
+    is_admin = user_id.startswith(ADMIN_ID_PREFIX)
+    try:
+        account_id = int(user_id[len(ADMIN_ID_PREFIX):] if is_admin else user_id)
+    except ValueError:
+        return None # Tampered or legacy session cookie
+    model = AdminUser if is_admin else User
+    with counting_auth_queries():
+        row = db.session.execute(select(*_identity_columns(model, is_admin)).where(model.id == account_id)).first()
+    return _principal_from_row(row) if row else None
+
+def load_principal(user_id):
+    """Flask-Login user_loader: no query while the session's principal is cached (IDENTITY_CACHE_TTL)."""
+    return _principals.get_or_load(user_id, lambda: _load_principal(user_id))
+
+def authenticate(username, password):
+    """
+    Resolves a login with one query over both account tables. A user account wins over an admin
+    account of the same name when the password matches both (as the old two-step login did).
+    The principal is cached, so the first request after login needs no user query either.
+    A hash made with another method or cost than PASSWORD_HASH_METHOD is replaced (and committed).
+    :return: Principal, or None for an unknown username or a wrong password.
+    :raises PasswordHashBusy: When the hashing pool is saturated.
+    """
+    with counting_auth_queries():
+        rows = db.session.execute(union_all(
+            select(*_identity_columns(User, False)).where(User.username == username),
+            select(*_identity_columns(AdminUser, True)).where(AdminUser.username == username),
+        )).all()
+    for row in sorted(rows, key=lambda row: bool(row.is_admin)):
+        if verify_password(row.password_hash, password):
+            if password_needs_rehash(row.password_hash):
+                _rehash(row, password)
+            principal = _principal_from_row(row)
+            _principals.set(principal.get_id(), principal)
+            return principal
+    return None
+
+def _rehash(row, password):
+    # Conditional on the old hash, so a password changed meanwhile by another request is kept
+    model = AdminUser if row.is_admin else User
+    with counting_auth_queries():
+        db.session.execute(update(model).where(model.id == row.id, model.password_hash == row.password_hash)
+                           .values(password_hash=hash_password(password)))
+        db.session.commit()
+
+def invalidate_principal(account_id=None, is_admin=False):
+    """Drops one account's cached principal on this worker (all of them when account_id is None)."""
+    _principals.invalidate(None if account_id is None else session_user_id(account_id, is_admin))
+
+def identity_cache_stats():
+    return _principals.stats()
+
+# --- Per-request count of queries issued by authentication ---
+
+@contextmanager
+def counting_auth_queries():
+    """Statements executed inside this block are counted as auth queries of the current request."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('_counting_auth_queries', False)
+    g._counting_auth_queries = True
+    try:
+        yield
+    finally:
+        g._counting_auth_queries = previous
+
+def auth_query_count():
+    """DB queries that authentication (user loading, login) issued during the current request."""
+    return g.get('auth_queries', 0) if has_request_context() else 0
+
+def _count_auth_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('_counting_auth_queries'):
+        g.auth_queries = g.get('auth_queries', 0) + 1
+
+def init_identity(app, login_manager):
+    """Registers the cached user loader, applies IDENTITY_CACHE_TTL/_MAX_ENTRIES and adds the X-Auth-Queries response header."""
+    _principals.ttl_seconds = app.config.get('IDENTITY_CACHE_TTL', 60)
+    _principals.max_entries = app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 10000)
+    login_manager.user_loader(load_principal)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _count_auth_query)
+
+    @app.after_request
+    def add_auth_query_header(response):
+        response.headers['X-Auth-Queries'] = str(auth_query_count())
+        return response
@@ -0,0 +1,240 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import aliased
+from database import db
+from models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(job, payload); handlers return a JSON-serializable result
+_handlers = {}
+
+def job_handler(kind):
+    """Decorator registering the function that runs jobs of the given kind."""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+def enqueue_job(kind, payload, lock_key=None):
+    """
+    Adds a job to the queue and commits so workers in any process can see it.
+    :param kind: Registered handler name.
+    :param payload: JSON-serializable dict passed to the handler.
+    :param lock_key: Optional key (e.g. 'chapter:5'); jobs with the same key run one at a time.
+    :return: The new BackgroundJob.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No job handler registered for '{kind}'")
+    job = BackgroundJob(kind=kind, status='queued', lock_key=lock_key, payload=json.dumps(payload, ensure_ascii=False))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def requeue_expired_jobs():
+    """
+    Recovers jobs left 'running' by a worker that went away (crash, deploy, killed process): once the
+    heartbeat is older than JOB_LEASE_SECONDS the job is queued again, which also frees its lock_key,
+    or marked failed if it has already been claimed JOB_MAX_ATTEMPTS times. Handlers must be safe to
+    re-run (the question import matches rows on question_text). Reads first, so the common case of
+    nothing to recover doesn't take SQLite's write lock on every poll.
+    :return: Number of jobs requeued or failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get('JOB_LEASE_SECONDS', 300))
+    # Jobs claimed before heartbeats existed only have started_at
+    stale = func.coalesce(BackgroundJob.heartbeat_at, BackgroundJob.started_at) < cutoff
+    max_attempts = current_app.config.get('JOB_MAX_ATTEMPTS', 3)
+    expired = db.session.execute(
+        select(BackgroundJob.id, BackgroundJob.attempts)
+        .where(BackgroundJob.status == 'running', stale)
+    ).all()
+    recovered = 0
+    for job_id, attempts in expired:
+        if attempts >= max_attempts:
+            values = dict(status='failed', finished_at=datetime.utcnow(),
+                          error=f"Worker stopped responding; gave up after {attempts} attempts")
+        else:
+            values = dict(status='queued')
+        # Conditional on the stale heartbeat, so a worker that renewed it meanwhile keeps its job
+        recovered += db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == 'running', stale)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        logger.warning("Background job %s lost its worker (lease expired); %s", job_id,
+                       'marked failed' if values['status'] == 'failed' else 'queued again')
+    if expired:
+        db.session.commit()
+    return recovered
+
+def claim_next_job():
+    """
+    Atomically moves the oldest queued job to 'running' and returns it, or None if the queue is empty.
+    The conditional UPDATE makes this safe with several workers and processes. Jobs whose lock_key
+    is held by a running job are skipped until it finishes (strict on SQLite, whose writes are
+    serialized; on Postgres two claims racing in the same instant can still overlap). Expired
+    running jobs are recovered first, so a dead worker can't hold a lock_key forever.
+    """
+    requeue_expired_jobs()
+    running = aliased(BackgroundJob)
+    lock_is_free = ~exists().where(
+        running.lock_key == BackgroundJob.lock_key, running.status == 'running', running.id != BackgroundJob.id
+    )
+    while True:
+        job_id = db.session.execute(
+            select(BackgroundJob.id)
+            .where(BackgroundJob.status == 'queued', (BackgroundJob.lock_key.is_(None)) | lock_is_free)
+            .order_by(BackgroundJob.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback() # End the read transaction so the next poll sees new jobs
+            return None
+        claimed = db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == 'queued',
+                   (BackgroundJob.lock_key.is_(None)) | lock_is_free)
+            .values(status='running', started_at=datetime.utcnow(), heartbeat_at=datetime.utcnow(),
+                    attempts=BackgroundJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(BackgroundJob, job_id)
+        # Another worker won the race for this job; try the next one
+
+def report_progress(job, progress, total=None):
+    """Records progress on the job. It is committed with the handler's next commit."""
+    job.progress = progress
+    if total is not None:
+        job.total = total
+
+def _renew_lease(app, job_id, interval, stop):
+    """
+    Renews the job's heartbeat every interval seconds until stop is set. Uses its own connection, so
+    the heartbeat is written even while the handler is in the middle of a long transaction.
+    """
+    while not stop.wait(interval):
+        try:
+            with app.app_context(), db.engine.begin() as connection:
+                connection.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id, BackgroundJob.status == 'running')
+                    .values(heartbeat_at=datetime.utcnow())
+                )
+        except Exception:
+            logger.exception("Could not renew the lease of background job %s", job_id)
+
+def run_job(job):
+    """Runs a claimed job through its handler and records the outcome."""
+    app = current_app._get_current_object()
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_renew_lease, name=f"job-{job.id}-heartbeat", daemon=True,
+                                 args=(app, job.id, app.config.get('JOB_LEASE_SECONDS', 300) / 5, stop))
+    heartbeat.start()
+    try:
+        result = _handlers[job.kind](job, json.loads(job.payload or '{}'))
+        job.status = 'done'
+        job.result = json.dumps(result, ensure_ascii=False) if result is not None else None
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Background job %s (%s) failed", job.id, job.kind)
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def run_pending_jobs(max_jobs=None):
+    """
+    Runs queued jobs in the calling thread until the queue is empty (or max_jobs ran).
+    Needs an app context. Handy for tests and for draining the queue from the CLI.
+    :return: Number of jobs run.
+    """
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+class JobWorkerPool:
+    """
+    Fixed number of daemon threads polling the job table.
+    Used in-process by the web app (JOB_WORKERS) and by the 'flask run-jobs' command.
+    """
+
+    def __init__(self, app, size=1, poll_interval=2.0):
+        self.app = app
+        self.size = size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for number in range(self.size):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    job = claim_next_job()
+                    if job is not None:
+                        run_job(job)
+                        continue
+            except Exception:
+                logger.exception("Job worker error")
+            self._stop.wait(self.poll_interval)
+
+_in_process_pool = None
+_in_process_lock = threading.Lock()
+
+def start_in_process_workers(app):
+    """Starts this process's worker threads once (no-op when JOB_WORKERS is 0)."""
+    global _in_process_pool
+    size = app.config.get('JOB_WORKERS', 0)
+    if size <= 0 or _in_process_pool is not None:
+        return
+    with _in_process_lock:
+        if _in_process_pool is None:
+            _in_process_pool = JobWorkerPool(app, size=size, poll_interval=app.config.get('JOB_POLL_INTERVAL', 2.0))
+            _in_process_pool.start()
+
+def init_job_queue(app):
+    """
+    Wires the job queue into the app: in-process workers start on the first request, so
+    processes that never serve requests (like 'flask run-jobs') don't start a second pool.
+    """
+    @app.before_request
+    def _start_job_workers():
+        start_in_process_workers(app)
+
+    @app.cli.command('run-jobs')
+    def run_jobs_command():
+        """Runs background job workers in this process until interrupted."""
+        size = max(app.config.get('JOB_WORKERS', 0), 1)
+        pool = JobWorkerPool(app, size=size, poll_interval=app.config.get('JOB_POLL_INTERVAL', 2.0))
+        pool.start()
+        print(f"Running {size} job worker(s). Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pool.stop(timeout=5)
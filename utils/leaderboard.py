@@ -0,0 +1,292 @@
+import threading
+import time
+from collections import defaultdict
+from itertools import islice
+import numpy as np
+from sortedcontainers import SortedList
+from sqlalchemy import delete, func, insert, select
+from database import db
+from models import User, UserQuizAttempt, LeaderboardSnapshot
+from utils.db_routing import primary_reads
+
+# Board keys: 'class:<selected_class>' ranks users of a class by total points (sum of attempt
+# scores); 'chapter:<id>' ranks users by their best score in that chapter.
+CLASS_BOARD_PREFIX = 'class:'
+CHAPTER_BOARD_PREFIX = 'chapter:'
+SYNC_BATCH_SIZE = 5000
+# Ids skipped by a sync stay on the watch list until this many newer ids have been applied: an attempt
+# whose transaction commits after a later one (PostgreSQL sequences) is still picked up when it appears
+SYNC_GAP_WINDOW = 1000
+
+# Snapshot entries: entry_count x uint32 user ids, then entry_count x float64 points
+_USER_ID_DTYPE = np.dtype('<u4')
+_POINTS_DTYPE = np.dtype('<f8')
+
+def class_board(selected_class):
+    return f"{CLASS_BOARD_PREFIX}{selected_class}"
+
+def chapter_board(chapter_id):
+    return f"{CHAPTER_BOARD_PREFIX}{chapter_id}"
+
+class Leaderboard:
+    """
+    One ranking. Keeps user_id -> points plus a SortedList of (-points, user_id), so updates,
+    rank lookups and the start of a top-N listing are all O(log n). Ties share a rank
+    (1, 2, 2, 4) and are listed by user id.
+    """
+
+    def __init__(self, entries=()):
+        self._points = {user_id: round(points, 2) for user_id, points in entries}
+        self._ranking = SortedList((-points, user_id) for user_id, points in self._points.items())
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, user_id):
+        return user_id in self._points
+
+    def points(self, user_id):
+        return self._points.get(user_id)
+
+    def set(self, user_id, points):
+        points = round(points, 2) # Sums of 2-decimal scores drift in float; keep ties exact
+        old = self._points.get(user_id)
+        if old == points:
+            return
+        if old is not None:
+            self._ranking.remove((-old, user_id))
+        self._points[user_id] = points
+        self._ranking.add((-points, user_id))
+
+    def add(self, user_id, delta):
+        self.set(user_id, self._points.get(user_id, 0.0) + delta)
+
+    def raise_to(self, user_id, points):
+        """Keeps the higher of the current and the given points (best-score boards)."""
+        old = self._points.get(user_id)
+        if old is None or points > old:
+            self.set(user_id, points)
+
+    def remove(self, user_id):
+        """:return: The removed user's points, or None if they were not on the board."""
+        points = self._points.pop(user_id, None)
+        if points is not None:
+            self._ranking.remove((-points, user_id))
+        return points
+
+    def _rank_of_points(self, points):
+        # Number of entries with strictly more points, + 1
+        return self._ranking.bisect_left((-points, float('-inf'))) + 1
+
+    def rank(self, user_id):
+        """:return: (rank, points) or None if the user has no entry."""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self._rank_of_points(points), points
+
+    def top(self, n):
+        """:return: List of (rank, user_id, points) for the first n entries."""
+        result = []
+        for index, (negative_points, user_id) in enumerate(islice(self._ranking, n)):
+            points = -negative_points
+            rank = result[-1][0] if result and result[-1][2] == points else index + 1
+            result.append((rank, user_id, points))
+        return result
+
+    def entries(self):
+        return self._points.items()
+
+class Leaderboards:
+    """
+    Every board of this process, kept current from UserQuizAttempt by id: each sync() applies
+    only attempts with an id above the last one applied (one indexed range query), so boards
+    update incrementally and also pick up attempts recorded by other workers.
+    Ids can commit out of order (on PostgreSQL a transaction may commit a lower id after a higher
+    one), so ids skipped over are remembered and looked up again by primary key on later syncs,
+    each applied once, until they fall SYNC_GAP_WINDOW ids behind (rolled back or deleted).
+    Builds and syncs read the primary even from replica_reads views: an attempt missing from a
+    lagging replica would otherwise be stepped over and, beyond SYNC_GAP_WINDOW, never applied.
+    """
+
+    def __init__(self, sync_interval=5.0):
+        self.sync_interval = sync_interval
+        self._boards = defaultdict(Leaderboard)
+        self._user_class = {} # user_id -> class board the user's total is currently on
+        self._last_attempt_id = 0
+        self._missing_ids = set() # Skipped ids below _last_attempt_id that may still commit
+        self._loaded = False
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+
+    # --- Building ---
+
+    def rebuild(self):
+        """Loads the DB snapshot when there is one, else aggregates UserQuizAttempt, then catches up."""
+        with self._lock, primary_reads():
+            self._boards.clear()
+            self._user_class.clear()
+            self._missing_ids.clear()
+            if not self._load_snapshot():
+                self._rebuild_from_attempts()
+            self._loaded = True
+            self.sync(force=True)
+
+    def _rebuild_from_attempts(self):
+        through_id = db.session.scalar(select(func.max(UserQuizAttempt.id))) or 0
+        in_range = UserQuizAttempt.id <= through_id
+        totals = db.session.execute(
+            select(UserQuizAttempt.user_id, User.selected_class, func.sum(UserQuizAttempt.score))
+            .join(User, User.id == UserQuizAttempt.user_id)
+            .where(in_range, User.selected_class.isnot(None))
+            .group_by(UserQuizAttempt.user_id, User.selected_class)
+        ).all()
+        best = db.session.execute(
+            select(UserQuizAttempt.chapter_id, UserQuizAttempt.user_id, func.max(UserQuizAttempt.score))
+            .where(in_range)
+            .group_by(UserQuizAttempt.chapter_id, UserQuizAttempt.user_id)
+        ).all()
+
+        by_board = defaultdict(list)
+        for user_id, selected_class, points in totals:
+            by_board[class_board(selected_class)].append((user_id, points))
+            self._user_class[user_id] = class_board(selected_class)
+        for chapter_id, user_id, points in best:
+            by_board[chapter_board(chapter_id)].append((user_id, points))
+        for board, entries in by_board.items():
+            self._boards[board] = Leaderboard(entries)
+        self._last_attempt_id = through_id
+
+    def _load_snapshot(self):
+        rows = db.session.execute(select(LeaderboardSnapshot)).scalars().all()
+        if not rows:
+            return False
+        for row in rows:
+            user_ids = np.frombuffer(row.entries, dtype=_USER_ID_DTYPE, count=row.entry_count)
+            points = np.frombuffer(row.entries, dtype=_POINTS_DTYPE, count=row.entry_count,
+                                   offset=row.entry_count * _USER_ID_DTYPE.itemsize)
+            self._boards[row.board] = Leaderboard(zip(user_ids.tolist(), points.tolist()))
+            if row.board.startswith(CLASS_BOARD_PREFIX):
+                self._user_class.update(dict.fromkeys(user_ids.tolist(), row.board))
+        # Snapshots are written together, so they share through_attempt_id
+        self._last_attempt_id = min(row.through_attempt_id for row in rows)
+        return True
+
+    def sync(self, force=False):
+        """Applies attempts recorded since the last sync (at most every sync_interval seconds unless forced)."""
+        with self._lock, primary_reads():
+            if not self._loaded:
+                return self.rebuild()
+            if not force and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            columns = (UserQuizAttempt.id, UserQuizAttempt.user_id, UserQuizAttempt.chapter_id,
+                       UserQuizAttempt.score, User.selected_class)
+            if self._missing_ids:
+                rows = db.session.execute(
+                    select(*columns).join(User, User.id == UserQuizAttempt.user_id)
+                    .where(UserQuizAttempt.id.in_(sorted(self._missing_ids)))
+                ).all()
+                for attempt_id, user_id, chapter_id, score, selected_class in rows:
+                    self._apply(user_id, chapter_id, score, selected_class)
+                    self._missing_ids.discard(attempt_id)
+            while True:
+                rows = db.session.execute(
+                    select(*columns).join(User, User.id == UserQuizAttempt.user_id)
+                    .where(UserQuizAttempt.id > self._last_attempt_id)
+                    .order_by(UserQuizAttempt.id)
+                    .limit(SYNC_BATCH_SIZE)
+                ).all()
+                for attempt_id, user_id, chapter_id, score, selected_class in rows:
+                    # Ids jumped over may belong to transactions that haven't committed yet
+                    self._missing_ids.update(range(max(self._last_attempt_id + 1, attempt_id - SYNC_GAP_WINDOW), attempt_id))
+                    self._apply(user_id, chapter_id, score, selected_class)
+                    self._last_attempt_id = attempt_id
+                if len(rows) < SYNC_BATCH_SIZE:
+                    break
+            oldest = self._last_attempt_id - SYNC_GAP_WINDOW
+            self._missing_ids = {attempt_id for attempt_id in self._missing_ids if attempt_id > oldest}
+            self._synced_at = time.monotonic()
+
+    def _apply(self, user_id, chapter_id, score, selected_class):
+        self._boards[chapter_board(chapter_id)].raise_to(user_id, score)
+        if selected_class is None:
+            return
+        board = class_board(selected_class)
+        previous = self._user_class.get(user_id)
+        if previous is not None and previous != board:
+            # The user changed class: their total moves with them
+            self._boards[board].add(user_id, self._boards[previous].remove(user_id) or 0.0)
+        self._user_class[user_id] = board
+        self._boards[board].add(user_id, score)
+
+    # --- Reading ---
+
+    def top(self, board, n):
+        with self._lock:
+            return self._boards[board].top(n) if board in self._boards else []
+
+    def rank(self, board, user_id):
+        with self._lock:
+            return self._boards[board].rank(user_id) if board in self._boards else None
+
+    def size(self, board):
+        with self._lock:
+            return len(self._boards[board]) if board in self._boards else 0
+
+    # --- Snapshot ---
+
+    def save_snapshot(self):
+        """Replaces the DB snapshot with the current boards (the caller commits). Returns the board count."""
+        with self._lock:
+            rows = []
+            for board, leaderboard in self._boards.items():
+                if not len(leaderboard):
+                    continue
+                user_ids, points = zip(*leaderboard.entries())
+                rows.append({
+                    'board': board,
+                    'through_attempt_id': self._last_attempt_id,
+                    'entry_count': len(user_ids),
+                    'entries': np.asarray(user_ids, dtype=_USER_ID_DTYPE).tobytes() + np.asarray(points, dtype=_POINTS_DTYPE).tobytes(),
+                })
+            db.session.execute(delete(LeaderboardSnapshot))
+            if rows:
+                db.session.execute(insert(LeaderboardSnapshot), rows)
+            return len(rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'boards': len(self._boards),
+                'entries': sum(len(board) for board in self._boards.values()),
+                'last_attempt_id': self._last_attempt_id,
+                'missing_attempt_ids': len(self._missing_ids),
+                'loaded': self._loaded,
+            }
+
+_leaderboards = Leaderboards()
+
+def init_leaderboards(app):
+    """Applies LEADERBOARD_SYNC_INTERVAL and registers the 'flask leaderboard-snapshot' command."""
+    _leaderboards.sync_interval = app.config.get('LEADERBOARD_SYNC_INTERVAL', 5.0)
+
+    @app.cli.command('leaderboard-snapshot')
+    def leaderboard_snapshot_command():
+        """Rebuilds every leaderboard from UserQuizAttempt and stores it as the startup snapshot."""
+        db.session.execute(delete(LeaderboardSnapshot)) # Rebuild from attempts, not from the old snapshot
+        _leaderboards.rebuild()
+        saved = _leaderboards.save_snapshot()
+        db.session.commit()
+        print(f"Saved {saved} leaderboard snapshot(s) through attempt {_leaderboards.stats()['last_attempt_id']}.")
+
+def get_leaderboards():
+    """The process-wide Leaderboards, built on first use and synced at most every LEADERBOARD_SYNC_INTERVAL."""
+    _leaderboards.sync()
+    return _leaderboards
+
+def sync_leaderboards():
+    """Call after committing new attempts so this worker's boards include them right away."""
+    _leaderboards.sync(force=True)
+
+def leaderboard_stats():
+    return _leaderboards.stats()
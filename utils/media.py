@@ -0,0 +1,328 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from flask import url_for
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import MediaAsset, QuizQuestion
+from utils.file_upload_handler import parse_cloudinary_url, upload_to_cloudinary
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Widths (px) offered in srcset; a derivative is never wider than its original
+DEFAULT_MEDIA_WIDTHS = (320, 480, 768, 1024, 1536)
+# JPEG/WebP quality of the resized copies (PNG/GIF are lossless and ignore it)
+DERIVATIVE_QUALITY = 85
+# Uploads are copied (and hashed) this many bytes at a time, so a large video never sits in memory whole
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Cloudinary chunked uploads: parts of this size (Cloudinary's minimum is 5 MB)
+CLOUDINARY_UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024
+# URLs per IN (...) when checking which ones questions still use
+URL_BATCH_SIZE = 500
+
+# url: what QuizQuestion.media_url stores; width/height: pixels, None when unknown (e.g. documents)
+StoredMedia = namedtuple('StoredMedia', ['url', 'width', 'height'])
+
+def _extension(name):
+    return name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+
+def is_image_url(url):
+    return _extension(url.split('?', 1)[0]) in IMAGE_EXTENSIONS
+
+def spool_upload(file, directory=None):
+    """
+    Copies an upload to a temporary file chunk by chunk, computing its SHA-256 on the way.
+    :param file: werkzeug FileStorage (or any object with read()).
+    :param directory: Where to put the temporary file (None: the system temp folder).
+    :return: (temporary file path, sha256 hex digest, size in bytes); the caller removes the file.
+    """
+    stream = getattr(file, 'stream', file)
+    digest, size = hashlib.sha256(), 0
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as spooled:
+            while True:
+                chunk = stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                spooled.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+# --- Storage backends ---
+# A backend stores a spooled upload under its content hash and knows its own URLs:
+#   name; spool_directory (where uploads are spooled, None = the system temp folder)
+#   store(temp_path, sha256, extension, folder_name) -> StoredMedia or None (may move temp_path away)
+#   owns(url), derivative_url(url, width), has_derivatives(url, width), dimensions(url)
+
+class CloudinaryMediaBackend:
+    """
+    Uploads to Cloudinary in chunks with the content hash as public ID (dimensions come back in the
+    upload result). Derivatives are delivery URLs with a transformation (c_limit,w_<width>,q_auto,f_auto):
+    Cloudinary resizes on first request, never upscales, and picks WebP/AVIF where the browser supports it.
+    """
+    name = 'cloudinary'
+    spool_directory = None
+
+    def store(self, temp_path, sha256, extension, folder_name):
+        upload_result = upload_to_cloudinary(temp_path, folder_name, public_id=sha256, overwrite=False,
+                                             chunk_size=CLOUDINARY_UPLOAD_CHUNK_SIZE)
+        if not upload_result:
+            return None
+        return StoredMedia(upload_result['secure_url'], upload_result.get('width'), upload_result.get('height'))
+
+    def owns(self, url):
+        return parse_cloudinary_url(url) is not None # Uploads of the configured account only
+
+    def derivative_url(self, url, width):
+        base, path = url.split('/upload/', 1)
+        return f"{base}/upload/c_limit,w_{width},q_auto,f_auto/{path}"
+
+    def has_derivatives(self, url, width):
+        return True # Made on demand (animated GIFs too), also for media whose width isn't recorded
+
+    def dimensions(self, url):
+        import cloudinary.api
+        resource_type, public_id = parse_cloudinary_url(url)
+        resource = cloudinary.api.resource(public_id, resource_type=resource_type)
+        return resource.get('width'), resource.get('height')
+
+class LocalMediaBackend:
+    """
+    Stores media under UPLOAD_FOLDER/media (served as static files) at '<sha256[:2]>/<sha256>.<ext>', so
+    identical files share one path, and writes the resized copies next to the original at upload time:
+    '<name>.w480.<ext>'. Needs no network, so uploads and srcset can be tried without a Cloudinary account.
+    """
+    name = 'local'
+
+    def __init__(self, root, url_prefix, widths):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/') + '/'
+        self.widths = widths
+        # Spooled inside the media folder, so storing is a rename on the same filesystem
+        self.spool_directory = os.path.join(root, '.incoming')
+
+    def _path(self, url):
+        return os.path.join(self.root, *url[len(self.url_prefix):].split('/'))
+
+    def store(self, temp_path, sha256, extension, folder_name):
+        relative_name = f"{sha256[:2]}/{sha256}.{extension}" if extension else f"{sha256[:2]}/{sha256}"
+        url = self.url_prefix + relative_name
+        path = self._path(url)
+        if os.path.exists(path): # Stored before without a MediaAsset row (e.g. that edit was rolled back)
+            width, height = self.dimensions(url) if extension in IMAGE_EXTENSIONS else (None, None)
+            return StoredMedia(url, width, height)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        width = height = None
+        if extension in IMAGE_EXTENSIONS:
+            width, height = self._write_derivatives(path)
+        return StoredMedia(url, width, height)
+
+    def _write_derivatives(self, path):
+        """Writes the resized copies and returns the displayed (EXIF-rotated) size of the original."""
+        from PIL import Image, ImageOps # Only processes that store local media need Pillow loaded
+
+        with Image.open(path) as original:
+            image_format = original.format
+            # Browsers show photos turned by their EXIF orientation, so measure and resize them turned too
+            image = ImageOps.exif_transpose(original)
+            width, height = image.size
+            if getattr(original, 'is_animated', False):
+                return width, height # Resizing would keep only the first frame; has_derivatives sees no copies
+            for target_width in self.widths:
+                if target_width >= width:
+                    break
+                copy = image.copy()
+                copy.thumbnail((target_width, round(height * target_width / width)), Image.LANCZOS)
+                copy.save(self._derivative_path(path, target_width), format=image_format, optimize=True, quality=DERIVATIVE_QUALITY)
+        return width, height
+
+    def _derivative_path(self, path, width):
+        stem, extension = os.path.splitext(path)
+        return f"{stem}.w{width}{extension}"
+
+    def owns(self, url):
+        return url.startswith(self.url_prefix)
+
+    def derivative_url(self, url, width):
+        stem, extension = os.path.splitext(url)
+        return f"{stem}.w{width}{extension}"
+
+    def has_derivatives(self, url, width):
+        """Copies are written at upload for images whose size was read, except animated ones."""
+        if width is None:
+            return False
+        smaller = [target for target in self.widths if target < width]
+        return not smaller or os.path.exists(self._derivative_path(self._path(url), smaller[0]))
+
+    def dimensions(self, url):
+        from PIL import Image, ImageOps
+        with Image.open(self._path(url)) as image:
+            return ImageOps.exif_transpose(image).size
+
+    def delete(self, url):
+        """Removes the original and its resized copies (missing files are fine)."""
+        path = self._path(url)
+        for candidate in [path] + [self._derivative_path(path, width) for width in self.widths]:
+            try:
+                os.remove(candidate)
+            except FileNotFoundError:
+                pass
+
+_cloudinary_backend = CloudinaryMediaBackend()
+_local_backend = None
+_upload_backend = _cloudinary_backend
+_widths = DEFAULT_MEDIA_WIDTHS
+_stats_lock = threading.Lock()
+_stats = {'stored': 0, 'deduplicated': 0, 'bytes_stored': 0, 'bytes_deduplicated': 0}
+
+def _count(key, size):
+    with _stats_lock:
+        _stats[key] += 1
+        _stats[f"bytes_{key}"] += size
+
+def backend_for_url(url):
+    """The backend that stored this URL (None for external links, e.g. from question sheets)."""
+    if not url:
+        return None
+    if _cloudinary_backend.owns(url):
+        return _cloudinary_backend
+    if _local_backend is not None and _local_backend.owns(url):
+        return _local_backend
+    return None
+
+def save_media(file, folder_name=None):
+    """
+    Stores an uploaded file with the MEDIA_BACKEND, once per distinct content: the upload is streamed
+    to a temporary file while hashing, and content stored before (same SHA-256) reuses that URL
+    without uploading again. The new MediaAsset row is committed with the caller's transaction.
+    :return: StoredMedia, or None if the upload failed.
+    """
+    backend = _upload_backend
+    extension = _extension(file.filename or '')
+    temp_path, sha256, size = spool_upload(file, backend.spool_directory)
+    try:
+        asset = db.session.execute(
+            select(MediaAsset).where(MediaAsset.backend == backend.name, MediaAsset.sha256 == sha256)
+        ).scalar_one_or_none()
+        if asset is not None:
+            _count('deduplicated', size)
+            return StoredMedia(asset.url, asset.width, asset.height)
+
+        media = backend.store(temp_path, sha256, extension, folder_name)
+        if media is None:
+            return None
+        _count('stored', size)
+        try:
+            with db.session.begin_nested(): # Same file uploaded concurrently: the other row is just as good
+                db.session.add(MediaAsset(backend=backend.name, sha256=sha256, url=media.url, size_bytes=size,
+                                          width=media.width, height=media.height))
+        except IntegrityError:
+            pass
+        return media
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def release_media(urls):
+    """
+    Of these URLs, returns the ones no question uses any more and drops their MediaAsset rows, so a
+    later upload of the same content stores it again. Call after the commit that stopped using them,
+    right before deleting the files. Commits.
+    """
+    urls = sorted({url for url in urls if url})
+    in_use = set()
+    for start in range(0, len(urls), URL_BATCH_SIZE):
+        in_use.update(db.session.execute(
+            select(QuizQuestion.media_url).where(QuizQuestion.media_url.in_(urls[start:start + URL_BATCH_SIZE])).distinct()
+        ).scalars())
+    released = [url for url in urls if url not in in_use]
+    for start in range(0, len(released), URL_BATCH_SIZE):
+        db.session.execute(delete(MediaAsset).where(MediaAsset.url.in_(released[start:start + URL_BATCH_SIZE])))
+    db.session.commit()
+    return released
+
+def media_srcset(url, width=None):
+    """
+    srcset of size-bounded copies of an image ('<url> 320w, ..., <url> <width>w'); '' when the URL
+    isn't ours, isn't an image, or (local storage) has no recorded width or no resized copies
+    (animated images). Jinja global.
+    """
+    backend = backend_for_url(url)
+    if backend is None or not is_image_url(url) or not backend.has_derivatives(url, width):
+        return ''
+    candidates = [(backend.derivative_url(url, target), target) for target in _widths if width is None or target < width]
+    if width is not None:
+        candidates.append((url, width)) # The original is the largest candidate
+    return ', '.join(f"{candidate_url} {target}w" for candidate_url, target in candidates)
+
+def is_local_media(url):
+    return _local_backend is not None and bool(url) and _local_backend.owns(url)
+
+def delete_local_media(urls):
+    """Deletes locally stored media (other URLs are left to MediaCleanup). :return: Number of files removed."""
+    removed = 0
+    for url in urls:
+        if is_local_media(url):
+            _local_backend.delete(url)
+            removed += 1
+    return removed
+
+def media_stats():
+    """Uploads stored vs. answered by an identical earlier upload, in this worker."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['backend'] = _upload_backend.name
+    return stats
+
+def init_media(app):
+    """
+    Chooses the upload backend (MEDIA_BACKEND: 'cloudinary' or 'local' under UPLOAD_FOLDER/media),
+    applies MEDIA_WIDTHS, registers media_srcset() for templates and 'flask backfill-media-dimensions'.
+    :raises ValueError: For an unknown backend name.
+    """
+    global _local_backend, _upload_backend, _widths
+    _widths = tuple(sorted(app.config.get('MEDIA_WIDTHS') or DEFAULT_MEDIA_WIDTHS))
+    upload_root = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'media')
+    with app.test_request_context():
+        url_prefix = url_for('static', filename=os.path.relpath(upload_root, app.static_folder).replace(os.sep, '/'))
+    _local_backend = LocalMediaBackend(upload_root, url_prefix, _widths)
+    backend = app.config.get('MEDIA_BACKEND', 'cloudinary')
+    if backend not in ('cloudinary', 'local'):
+        raise ValueError(f"Unknown MEDIA_BACKEND '{backend}' (use 'cloudinary' or 'local').")
+    _upload_backend = _local_backend if backend == 'local' else _cloudinary_backend
+    app.jinja_env.globals['media_srcset'] = media_srcset
+
+    @app.cli.command('backfill-media-dimensions')
+    def backfill_media_dimensions_command():
+        """Records width/height for questions whose media was stored before dimensions were kept."""
+        from sqlalchemy import update
+
+        rows = db.session.execute(
+            select(QuizQuestion.id, QuizQuestion.media_url)
+            .where(QuizQuestion.media_url.isnot(None), QuizQuestion.media_width.is_(None))
+        ).all()
+        updated = 0
+        for question_id, url in rows:
+            backend = backend_for_url(url)
+            if backend is None or not is_image_url(url):
+                continue
+            try:
+                width, height = backend.dimensions(url)
+            except Exception as e:
+                print(f"Question {question_id}: could not read dimensions of {url}: {e}")
+                continue
+            db.session.execute(update(QuizQuestion).where(QuizQuestion.id == question_id)
+                               .values(media_width=width, media_height=height))
+            updated += 1
+        db.session.commit()
+        print(f"Recorded dimensions for {updated} of {len(rows)} question media file(s).")
@@ -0,0 +1,116 @@
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import cloudinary.api
+from utils.file_upload_handler import parse_cloudinary_url
+from utils.job_queue import enqueue_job, job_handler
+from utils.media import delete_local_media, is_local_media, release_media
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary's Admin API accepts at most 100 public IDs per delete_resources call
+CLOUDINARY_DELETE_BATCH_SIZE = 100
+
+class CloudinaryDeleter:
+    """Thin wrapper over Cloudinary's bulk Admin API. Tests can pass any object with the same method."""
+
+    def delete_resources(self, public_ids, resource_type):
+        return cloudinary.api.delete_resources(public_ids, resource_type=resource_type)
+
+class MediaCleanup:
+    """
+    Collects media to delete and removes it in bulk, concurrently, with retries.
+    Call flush() (or schedule()) only after the DB commit that stopped referencing the media,
+    so a rolled-back transaction never loses files. Uploads are deduplicated (utils/media.py),
+    so flush() keeps any URL another question still uses.
+    """
+
+    def __init__(self, deleter=None, max_workers=4, batch_size=CLOUDINARY_DELETE_BATCH_SIZE, max_retries=3, backoff_seconds=0.5):
+        self.deleter = deleter or CloudinaryDeleter()
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.public_ids = defaultdict(set) # resource_type -> public IDs
+        self.urls = set() # Cloudinary/local media URLs, deleted at flush() unless still used
+
+    def add_url(self, url):
+        """Queues a Cloudinary or locally stored URL for deletion; other URLs (e.g. external links) are ignored."""
+        if is_local_media(url) or parse_cloudinary_url(url):
+            self.urls.add(url)
+
+    def add_urls(self, urls):
+        for url in urls:
+            self.add_url(url)
+        return self
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.public_ids.values()) + len(self.urls)
+
+    def _delete_batch(self, resource_type, public_ids):
+        """Deletes one batch, retrying only the IDs Cloudinary did not confirm. Returns failed IDs."""
+        remaining = list(public_ids)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.deleter.delete_resources(remaining, resource_type) or {}
+                statuses = response.get('deleted', {})
+                # 'not_found' counts as done: the file is already gone
+                remaining = [pid for pid in remaining if statuses.get(pid) not in ('deleted', 'not_found')]
+            except Exception:
+                logger.exception("Media delete batch failed")
+            if not remaining or attempt == self.max_retries:
+                break
+            time.sleep(self.backoff_seconds * (2 ** attempt))
+        return remaining
+
+    def flush(self):
+        """
+        Deletes everything collected so far (except URLs still in use) using a bounded thread pool.
+        :return: {'deleted': count, 'failed': [public IDs not deleted],
+                  'kept_in_use': count of URLs another question still uses}
+        """
+        released = release_media(self.urls) if self.urls else []
+        local_urls = [url for url in released if is_local_media(url)]
+        for url in released:
+            if not is_local_media(url):
+                resource_type, public_id = parse_cloudinary_url(url)
+                self.public_ids[resource_type].add(public_id)
+
+        batches = []
+        for resource_type, ids in self.public_ids.items():
+            ids = sorted(ids)
+            for start in range(0, len(ids), self.batch_size):
+                batches.append((resource_type, ids[start:start + self.batch_size]))
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            batch_futures = [executor.submit(self._delete_batch, resource_type, ids) for resource_type, ids in batches]
+            for future in batch_futures:
+                failed.extend(future.result())
+
+        total = sum(len(ids) for _, ids in batches) + delete_local_media(local_urls)
+        kept_in_use = len(self.urls) - len(released)
+        self.public_ids.clear()
+        self.urls.clear()
+        return {'deleted': total - len(failed), 'failed': failed, 'kept_in_use': kept_in_use}
+
+    def schedule(self):
+        """Hands the collected media to a background 'media_cleanup' job (returns None if there is nothing to do)."""
+        if not len(self):
+            return None
+        payload = {
+            'public_ids': {resource_type: sorted(ids) for resource_type, ids in self.public_ids.items()},
+            'urls': sorted(self.urls),
+        }
+        self.public_ids.clear()
+        self.urls.clear()
+        return enqueue_job('media_cleanup', payload)
+
+@job_handler('media_cleanup')
+def run_media_cleanup_job(job, payload):
+    cleanup = MediaCleanup()
+    for resource_type, ids in payload.get('public_ids', {}).items():
+        cleanup.public_ids[resource_type].update(ids)
+    cleanup.urls.update(payload.get('urls', []))
+    return cleanup.flush()
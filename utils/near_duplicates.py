@@ -0,0 +1,239 @@
+import re
+import unicodedata
+import numpy as np
+from sqlalchemy import delete, event, insert, select
+from database import db
+from models import Chapter, QuizQuestion, QuestionSimilarityBucket
+
+# --- Normalization ---
+# Case, NFC/legacy encodings, Bengali vs ASCII digits, zero-width joiners, whitespace and punctuation
+# are all dropped, so "বাংলাদেশের রাজধানী কোনটি?" and "বাংলাদেশের  রাজধানী কোনটি ।" normalize alike.
+# Math symbols are kept: "২+৩" and "২×৩" are different questions.
+_BENGALI_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+_TOKEN_PATTERN = re.compile(r"(?:[^\W_]|[\u0981-\u0983\u09bc-\u09d7\u09e2\u09e3])+|[+\-\u00d7\u00f7=<>%\u221a^/*]")
+
+# --- MinHash / LSH parameters ---
+SHINGLE_SIZE = 4 # Characters per shingle (a Bengali syllable is often 2-4 code points)
+NUM_PERMUTATIONS = 64
+BANDS = 16 # 16 bands x 4 rows: texts with similarity 0.7 share a bucket with probability ~0.99, at 0.3 ~0.12
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+DEFAULT_THRESHOLD = 0.7 # Jaccard similarity of shingle sets above which a question is a suspected duplicate
+SIGNATURE_BATCH_SIZE = 256 # Texts hashed per NumPy pass (bounds the permutation matrix to a few MB)
+BUCKET_QUERY_SIZE = 4000 # Bucket ids per IN (...) lookup
+
+# Universal hashing (a*x + b) mod p over 32-bit shingle hashes; a, b < 2^31 keep a*x + b inside uint64
+_PRIME = np.uint64((1 << 32) - 5)
+_rng = np.random.RandomState(20261017) # Fixed seed: stored buckets must stay comparable across processes
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)[:, None]
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)[:, None]
+del _rng
+
+_threshold = DEFAULT_THRESHOLD
+
+def normalize_question_text(text):
+    """Canonical form of a question's text for similarity (not for display)."""
+    text = unicodedata.normalize('NFC', text or '').casefold().translate(_BENGALI_DIGITS)
+    text = text.replace('\u09a4\u09cd\u200d', '\u09ce') # Legacy khanda ta (ত + ্ + ZWJ) -> ৎ
+    text = text.replace('\u200c', '').replace('\u200d', '') # ZWNJ/ZWJ only change how conjuncts render
+    return ' '.join(_TOKEN_PATTERN.findall(text))
+
+def _padded(normalized):
+    # Texts shorter than a shingle still get exactly one shingle
+    return normalized.ljust(SHINGLE_SIZE, '\0')
+
+def shingles(normalized):
+    """Set of SHINGLE_SIZE-character shingles of a normalized text."""
+    text = _padded(normalized)
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def similarity(shingles_a, shingles_b):
+    """Jaccard similarity of two shingle sets."""
+    if not shingles_a and not shingles_b:
+        return 1.0
+    return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+
+def _fmix64(values):
+    # MurmurHash3 finalizer: spreads every input bit over the whole word (uint64 arithmetic wraps)
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xff51afd7ed558ccd)
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xc4ceb9fe1a85ec53)
+    return values ^ (values >> np.uint64(33))
+
+def _signature_batch(normalized_texts):
+    texts = [_padded(text) for text in normalized_texts]
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    code_points = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+
+    # Start position of every shingle of every text in the concatenated code points
+    shingle_counts = lengths - SHINGLE_SIZE + 1
+    text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    shingle_offsets = np.concatenate(([0], np.cumsum(shingle_counts)[:-1]))
+    positions = np.arange(shingle_counts.sum()) + np.repeat(text_starts - shingle_offsets, shingle_counts)
+
+    # 32-bit hash of each shingle from its code points
+    hashes = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        hashes = _fmix64(hashes ^ code_points[positions + offset])
+    hashes &= np.uint64(0xffffffff)
+
+    # Min over each text's shingles of every permutation
+    permuted = (_PERM_A * hashes + _PERM_B) % _PRIME
+    return np.minimum.reduceat(permuted, shingle_offsets, axis=1).T.astype(np.uint32)
+
+def minhash_signatures(normalized_texts):
+    """:return: uint32 array of shape (len(normalized_texts), NUM_PERMUTATIONS)."""
+    if not normalized_texts:
+        return np.empty((0, NUM_PERMUTATIONS), dtype=np.uint32)
+    return np.concatenate([_signature_batch(normalized_texts[start:start + SIGNATURE_BATCH_SIZE])
+                           for start in range(0, len(normalized_texts), SIGNATURE_BATCH_SIZE)])
+
+def lsh_buckets(signatures):
+    """
+    Hashes each band of ROWS_PER_BAND signature values (and the band number) to a signed 64-bit
+    bucket id; two texts are near-duplicate candidates when they share any bucket.
+    :return: int64 array of shape (len(signatures), BANDS).
+    """
+    bands = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND).astype(np.uint64)
+    buckets = np.broadcast_to(np.arange(BANDS, dtype=np.uint64), (len(signatures), BANDS))
+    for row in range(ROWS_PER_BAND):
+        buckets = _fmix64(buckets ^ bands[:, :, row])
+    return buckets.view(np.int64)
+
+def question_buckets(question_texts):
+    """:return: int64 array (len(question_texts), BANDS) of LSH buckets for raw question texts."""
+    return lsh_buckets(minhash_signatures([normalize_question_text(text) for text in question_texts]))
+
+# --- Index (question_similarity_bucket table) ---
+
+def _bucket_rows(question_ids, question_texts):
+    rows = []
+    for question_id, buckets in zip(question_ids, question_buckets(question_texts).tolist()):
+        rows.extend({'bucket': bucket, 'question_id': question_id} for bucket in set(buckets))
+    return rows
+
+def index_questions(questions, connection=None):
+    """
+    Adds questions to the near-duplicate index (new questions; see reindex_questions for edits).
+    Bulk INSERTs skip ORM events, so the importer calls this itself.
+    :param questions: Iterable of (question_id, question_text).
+    """
+    questions = list(questions)
+    question_ids, question_texts = zip(*questions) if questions else ((), ())
+    rows = _bucket_rows(question_ids, question_texts)
+    if rows:
+        (connection or db.session).execute(insert(QuestionSimilarityBucket.__table__), rows) # Core: no ORM bulk-insert bookkeeping
+
+def reindex_questions(questions, connection=None):
+    """Replaces the index entries of questions whose text changed."""
+    questions = list(questions)
+    executor = connection or db.session
+    executor.execute(delete(QuestionSimilarityBucket).where(
+        QuestionSimilarityBucket.question_id.in_([question_id for question_id, _ in questions])))
+    index_questions(questions, connection=connection)
+
+def find_near_duplicates(question_texts, threshold=None, exclude_ids=()):
+    """
+    Finds, for each text, questions anywhere in the bank and earlier texts of the same list that are
+    near-duplicates of it. Candidates come from shared LSH buckets (indexed lookups, so the cost
+    depends on the number of texts checked, not on the size of the bank) and are confirmed with the
+    exact shingle similarity.
+    :param question_texts: Raw question texts, e.g. the new rows of an import.
+    :param threshold: Minimum similarity (defaults to NEAR_DUPLICATE_THRESHOLD).
+    :param exclude_ids: Question ids never reported (e.g. the questions being checked).
+    :return: One list per text of match dicts, most similar first. A match is either
+             {'question_id', 'chapter_id', 'chapter_name', 'question_text', 'similarity'} for a stored
+             question or {'row': index, 'similarity'} for an earlier text of question_texts.
+    """
+    threshold = _threshold if threshold is None else threshold
+    normalized = [normalize_question_text(text) for text in question_texts]
+    buckets = lsh_buckets(minhash_signatures(normalized)).tolist()
+
+    # Stored questions sharing a bucket with any of the texts
+    candidates_by_bucket = {}
+    all_buckets = list({bucket for row in buckets for bucket in row})
+    for start in range(0, len(all_buckets), BUCKET_QUERY_SIZE):
+        for bucket, question_id in db.session.execute(
+            select(QuestionSimilarityBucket.bucket, QuestionSimilarityBucket.question_id)
+            .where(QuestionSimilarityBucket.bucket.in_(all_buckets[start:start + BUCKET_QUERY_SIZE]))
+        ):
+            candidates_by_bucket.setdefault(bucket, []).append(question_id)
+
+    candidate_ids = {question_id for ids in candidates_by_bucket.values() for question_id in ids} - set(exclude_ids)
+    stored = {}
+    candidate_ids = list(candidate_ids)
+    for start in range(0, len(candidate_ids), BUCKET_QUERY_SIZE):
+        for row in db.session.execute(
+            select(QuizQuestion.id, QuizQuestion.chapter_id, QuizQuestion.question_text, Chapter.name.label('chapter_name'))
+            .join(Chapter, Chapter.id == QuizQuestion.chapter_id)
+            .where(QuizQuestion.id.in_(candidate_ids[start:start + BUCKET_QUERY_SIZE]))
+        ):
+            stored[row.id] = (row, shingles(normalize_question_text(row.question_text)))
+
+    results = []
+    rows_by_bucket = {} # bucket -> indexes of earlier texts in this list
+    text_shingles = [shingles(text) for text in normalized]
+    for index, row_buckets in enumerate(buckets):
+        matches = []
+        seen_ids, seen_rows = set(), set()
+        for bucket in row_buckets:
+            for question_id in candidates_by_bucket.get(bucket, ()):
+                if question_id in stored and question_id not in seen_ids:
+                    seen_ids.add(question_id)
+                    row, candidate_shingles = stored[question_id]
+                    score = similarity(text_shingles[index], candidate_shingles)
+                    if score >= threshold:
+                        matches.append({'question_id': row.id, 'chapter_id': row.chapter_id, 'chapter_name': row.chapter_name,
+                                        'question_text': row.question_text, 'similarity': round(score, 3)})
+            for earlier in rows_by_bucket.get(bucket, ()):
+                if earlier not in seen_rows:
+                    seen_rows.add(earlier)
+                    score = similarity(text_shingles[index], text_shingles[earlier])
+                    if score >= threshold:
+                        matches.append({'row': earlier, 'similarity': round(score, 3)})
+            rows_by_bucket.setdefault(bucket, []).append(index)
+        matches.sort(key=lambda match: -match['similarity'])
+        results.append(matches)
+    return results
+
+def rebuild_near_duplicate_index(batch_size=5000):
+    """Recomputes every question's buckets (the caller commits). Returns the number of questions indexed."""
+    db.session.execute(delete(QuestionSimilarityBucket))
+    indexed = 0
+    last_id = 0
+    while True:
+        questions = db.session.execute(
+            select(QuizQuestion.id, QuizQuestion.question_text)
+            .where(QuizQuestion.id > last_id).order_by(QuizQuestion.id).limit(batch_size)
+        ).all()
+        if not questions:
+            return indexed
+        index_questions([tuple(question) for question in questions])
+        indexed += len(questions)
+        last_id = questions[-1].id
+
+# Keep the index current for questions saved one at a time through the ORM (admin add/edit/delete)
+@event.listens_for(QuizQuestion, 'after_insert')
+def _index_new_question(mapper, connection, question):
+    index_questions([(question.id, question.question_text)], connection=connection)
+
+@event.listens_for(QuizQuestion, 'after_update')
+def _reindex_edited_question(mapper, connection, question):
+    if db.inspect(question).attrs.question_text.history.has_changes():
+        reindex_questions([(question.id, question.question_text)], connection=connection)
+
+@event.listens_for(QuizQuestion, 'after_delete')
+def _unindex_deleted_question(mapper, connection, question):
+    connection.execute(delete(QuestionSimilarityBucket).where(QuestionSimilarityBucket.question_id == question.id))
+
+def init_near_duplicates(app):
+    """Applies NEAR_DUPLICATE_THRESHOLD and registers the 'flask rebuild-duplicate-index' command."""
+    global _threshold
+    _threshold = app.config.get('NEAR_DUPLICATE_THRESHOLD', DEFAULT_THRESHOLD)
+
+    @app.cli.command('rebuild-duplicate-index')
+    def rebuild_duplicate_index_command():
+        """Recomputes the near-duplicate buckets of every question (e.g. after changing SHINGLE_SIZE or BANDS)."""
+        indexed = rebuild_near_duplicate_index()
+        db.session.commit()
+        print(f"Near-duplicate index rebuilt for {indexed} question(s).")
@@ -0,0 +1,259 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask import g, has_request_context, make_response, render_template, request, session
+from flask_login import current_user
+from markupsafe import Markup
+from utils.class_catalog import invalidate_class_catalog
+from utils.quiz_sets import invalidate_quiz_sets
+from utils.settings_cache import invalidate_settings_cache
+
+# Backend key of the content version; every other key embeds the version it was rendered for
+VERSION_KEY = 'content_version'
+
+# --- Backends: bytes values with a per-entry TTL ---
+
+class MemoryCacheBackend:
+    """
+    LRU dict in this worker process (the default). The content version is per worker too, so an admin
+    edit reaches other workers' pages only through PAGE_CACHE_TTL, like the other in-process caches.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False) # Least recently used
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class FileCacheBackend:
+    """
+    One file per key in a directory shared by every worker on the host (a local stand-in for a shared
+    cache such as Redis). A version bump in one worker is seen by all of them on their next request.
+    Files are written to a temp name and renamed, so readers never see a partial entry. A hit touches
+    the file's mtime, and every max_entries / 8 writes a sweep deletes the least recently used files
+    beyond max_entries (each worker sweeps, so the directory can briefly run a little over).
+    """
+    _HEADER = struct.Struct('!d') # Expiry timestamp
+
+    def __init__(self, directory, max_entries=512):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._sweep_every = max(1, max_entries // 8)
+        self._writes = 0
+        self._sweep_lock = threading.Lock()
+        self._version_path = self._path(VERSION_KEY) # Never swept: losing it would orphan every entry
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                data = cache_file.read()
+        except OSError:
+            return None
+        if len(data) < self._HEADER.size or self._HEADER.unpack_from(data)[0] <= time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path) # Recently used, for the sweep
+        except OSError:
+            pass
+        return data[self._HEADER.size:]
+
+    def set(self, key, value, ttl):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as cache_file:
+            cache_file.write(self._HEADER.pack(time.time() + ttl) + value)
+        os.replace(temp_path, self._path(key))
+        with self._sweep_lock:
+            self._writes += 1
+            if self._writes < self._sweep_every:
+                return
+            self._writes = 0
+            self._sweep()
+
+    def _sweep(self):
+        """Deletes the least recently used entries beyond max_entries (the content version is kept)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp-'):
+                continue
+            path = os.path.join(self.directory, name)
+            if path == self._version_path:
+                continue
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                pass # Removed by another worker
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if not name.startswith('.tmp-'):
+                self._remove(os.path.join(self.directory, name))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass # Already removed by another worker
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if not name.startswith('.tmp-'))
+
+_backend = MemoryCacheBackend()
+_ttl_seconds = 300
+# Version this worker's in-process caches were last built for (see content_version)
+_seen_version = None
+_stats_lock = threading.Lock()
+_stats = {'page_hits': 0, 'page_misses': 0, 'fragment_hits': 0, 'fragment_misses': 0, 'not_modified': 0}
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+# --- Content version ---
+
+def content_version():
+    """
+    Token that changes whenever subjects, chapters, questions or site settings change (read once
+    per request). When another worker bumped it (shared backend), this worker's catalog, quiz set
+    and settings caches are dropped too, so the re-rendered page isn't built from stale data.
+    """
+    global _seen_version
+    if has_request_context() and 'content_version' in g:
+        return g.content_version
+    stored = _backend.get(VERSION_KEY)
+    if stored is None: # First use, or the entry expired: start a new version (old entries are unreachable)
+        stored = uuid.uuid4().hex[:16].encode('ascii')
+        _backend.set(VERSION_KEY, stored, ttl=10 * 365 * 24 * 3600)
+    version = stored.decode('ascii')
+    if _seen_version is not None and version != _seen_version:
+        invalidate_class_catalog()
+        invalidate_quiz_sets()
+        invalidate_settings_cache()
+    _seen_version = version
+    if has_request_context():
+        g.content_version = version
+    return version
+
+def bump_content_version():
+    """Call after committing a change to public content (admin edits, imports, site settings)."""
+    global _seen_version
+    _backend.clear() # Entries of older versions can never be read again
+    version = uuid.uuid4().hex[:16]
+    _backend.set(VERSION_KEY, version.encode('ascii'), ttl=10 * 365 * 24 * 3600)
+    _seen_version = version # This worker already invalidated its own caches
+    if has_request_context():
+        g.pop('content_version', None)
+
+# --- Fragments and pages ---
+
+def cached_fragment(name, template_name, **context):
+    """
+    Renders a template fragment once per content version (Jinja global). The fragment must depend
+    only on versioned content (no user, flash or CSRF data), since every visitor shares it.
+    """
+    key = f"fragment:{name}:{content_version()}"
+    html = _backend.get(key)
+    if html is None:
+        _count('fragment_misses')
+        html = render_template(template_name, **context).encode('utf-8')
+        _backend.set(key, html, _ttl_seconds)
+    else:
+        _count('fragment_hits')
+    return Markup(html.decode('utf-8'))
+
+def strong_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+def cached_page(render, query_args=()):
+    """
+    Response for a public page with a strong ETag (hash of the body) and 304 Not Modified support.
+    Anonymous visitors without pending flash messages share one cached copy per path, query_args
+    values and content version; logged-in pages (the nav differs per user) are rendered but still
+    answer 304 when unchanged. Other query parameters are not part of the key, so arbitrary query
+    strings can't fill the cache with copies of the same page.
+    :param render: Zero-argument callable returning the page HTML.
+    :param query_args: Names of the query parameters the view reads (e.g. ('subject_id',)).
+    """
+    if current_user.is_anonymous and not session.get('_flashes'):
+        args = '&'.join(f"{name}={value}" for name in sorted(query_args) for value in request.args.getlist(name))
+        key = f"page:{request.path}?{args}:{content_version()}"
+        body = _backend.get(key)
+        if body is None:
+            _count('page_misses')
+            body = render().encode('utf-8')
+            _backend.set(key, body, _ttl_seconds)
+        else:
+            _count('page_hits')
+    else:
+        body = render().encode('utf-8')
+
+    response = make_response(body)
+    response.set_etag(strong_etag(body))
+    response.headers['Cache-Control'] = 'no-cache' # Browsers may store it, but revalidate with If-None-Match
+    response.vary.add('Cookie')
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        _count('not_modified')
+    return response
+
+def page_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update(backend=type(_backend).__name__, entries=len(_backend))
+    return stats
+
+def init_page_cache(app):
+    """
+    Chooses the backend (PAGE_CACHE_BACKEND: 'memory', or 'filesystem' in PAGE_CACHE_DIR shared by
+    the workers), applies PAGE_CACHE_TTL and registers the cached_fragment Jinja global.
+    :raises ValueError: For an unknown backend name.
+    """
+    global _backend, _ttl_seconds
+    backend = app.config.get('PAGE_CACHE_BACKEND', 'memory')
+    if backend == 'memory':
+        _backend = MemoryCacheBackend(app.config.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    elif backend == 'filesystem':
+        _backend = FileCacheBackend(app.config.get('PAGE_CACHE_DIR') or os.path.join(app.instance_path, 'page_cache'),
+                                    app.config.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    else:
+        raise ValueError(f"Unknown PAGE_CACHE_BACKEND '{backend}' (use 'memory' or 'filesystem').")
+    _ttl_seconds = app.config.get('PAGE_CACHE_TTL', 300)
+    app.jinja_env.globals['cached_fragment'] = cached_fragment
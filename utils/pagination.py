@@ -0,0 +1,130 @@
+import base64
+import json
+from flask import request, url_for
+from sqlalchemy import and_, func, select, tuple_
+from database import db
+from utils.cache import TTLCache
+
+# (listing name, filters) -> row count. Filters include free text (name prefixes, search terms),
+# so the least recently used counts are dropped beyond COUNT_CACHE_MAX_ENTRIES.
+COUNT_CACHE_MAX_ENTRIES = 1000
+_count_cache = TTLCache(max_entries=COUNT_CACHE_MAX_ENTRIES)
+
+def init_pagination(app):
+    """Applies ADMIN_COUNT_CACHE_TTL and exposes listing_page_url() to templates."""
+    _count_cache.ttl_seconds = app.config.get('ADMIN_COUNT_CACHE_TTL', 60)
+    app.jinja_env.globals['listing_page_url'] = listing_page_url
+
+def listing_page_url(after=None, before=None):
+    """URL of the current listing with the same filters and a new cursor."""
+    args = {key: value for key, value in request.args.items() if key not in ('after', 'before')}
+    if after:
+        args['after'] = after
+    if before:
+        args['before'] = before
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+def encode_cursor(values):
+    """Opaque, URL-safe cursor for a row's sort key."""
+    return base64.urlsafe_b64encode(json.dumps(list(values), ensure_ascii=False).encode('utf-8')).decode('ascii').rstrip('=')
+
+def _cursor_value_type(column):
+    """Python type a cursor value for this sort column must have (int for columns of unknown type, like rowid)."""
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return int
+
+def _valid_cursor_value(value, expected_type):
+    if expected_type is int:
+        # bool is an int in Python; the range is what the databases accept as a bound parameter
+        return type(value) is int and -2**63 <= value < 2**63
+    return type(value) is expected_type
+
+def decode_cursor(token, order_columns):
+    """
+    :param order_columns: The listing's sort columns; each cursor value must have its column's type.
+    :return: The sort key list, or None for a missing or malformed cursor (first page). Cursors are
+             user input (URL parameters), so a crafted one with the wrong shape or value types is
+             treated like a missing one instead of reaching the query.
+    """
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(order_columns):
+        return None
+    if not all(_valid_cursor_value(value, _cursor_value_type(column)) for value, column in zip(values, order_columns)):
+        return None
+    return values
+
+def prefix_filter(column, prefix):
+    """
+    Case-sensitive "starts with" as a range condition, so a plain B-tree index on the column is
+    used (SQLite's LIKE is case-insensitive and can't use one).
+    """
+    return and_(column >= prefix, column < prefix + '\U0010ffff')
+
+class KeysetPage:
+    """One page of a listing, plus cursors for the neighbouring pages (None at either end)."""
+
+    def __init__(self, rows, next_cursor, prev_cursor, total):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+def keyset_page(query, order_columns, after=None, before=None, limit=50, count_key=None):
+    """
+    Fetches one page of `query` ordered by `order_columns` (ascending; the last column must make
+    the order unique, e.g. the primary key) that starts just after / ends just before a cursor.
+    Unlike OFFSET, every page costs the same: the database seeks straight to the cursor in the index.
+    :param query: A select() of only the columns the page shows; it must include order_columns.
+    :param after: Cursor from a previous page's next_cursor.
+    :param before: Cursor from a previous page's prev_cursor.
+    :param count_key: Hashable (listing name, filters) key; the total count is cached under it.
+    :return: KeysetPage
+    """
+    base_query = query
+    sort_key = tuple_(*order_columns)
+    after_values = decode_cursor(after, order_columns)
+    before_values = decode_cursor(before, order_columns) if after_values is None else None
+
+    if before_values is not None:
+        # Walk backwards from the cursor, then restore ascending order
+        rows = db.session.execute(
+            query.where(sort_key < tuple_(*before_values))
+            .order_by(*(column.desc() for column in order_columns)).limit(limit + 1)
+        ).all()
+        has_more = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        has_prev, has_next = has_more, True
+    else:
+        if after_values is not None:
+            query = query.where(sort_key > tuple_(*after_values))
+        rows = db.session.execute(query.order_by(*order_columns).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        has_prev, has_next = after_values is not None, has_more
+
+    def cursor_for(row):
+        return encode_cursor(row._mapping[column] for column in order_columns)
+
+    total = None
+    if count_key is not None:
+        total = _count_cache.get_or_load(count_key, lambda: db.session.scalar(select(func.count()).select_from(base_query.subquery())))
+    return KeysetPage(
+        rows=rows,
+        next_cursor=cursor_for(rows[-1]) if rows and has_next else None,
+        prev_cursor=cursor_for(rows[0]) if rows and has_prev else None,
+        total=total,
+    )
+
+def invalidate_listing_counts():
+    """Call after committing inserts/deletes that change a listing's row count."""
+    _count_cache.invalidate()
+
+def listing_count_stats():
+    return _count_cache.stats()
@@ -0,0 +1,84 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+
+class PasswordHashBusy(RuntimeError):
+    """Raised when every hashing thread is taken and the wait queue is full; the caller should answer 503."""
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small fixed pool of threads (hashlib's pbkdf2/scrypt release the GIL,
+    so other request threads keep running while a hash is computed). At most max_pending hashes wait
+    or run at once per process; further callers wait up to wait_seconds and then get PasswordHashBusy,
+    so a registration spike can't queue unbounded CPU work behind the workers.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=8, wait_seconds=5.0):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.wait_seconds = wait_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            raise PasswordHashBusy('Password hashing queue is full.')
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hashes with the configured method (salted; 16 characters of salt as Werkzeug's default)."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with another method or cost than the configured one (stronger or weaker)."""
+        return stored_method(password_hash) != self.method
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+def normalize_method(method):
+    """Spells out the defaults Werkzeug fills in, so 'pbkdf2' and 'pbkdf2:sha256:600000' compare equal."""
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    raise ValueError(f"Unsupported password hash method '{method}' (use pbkdf2 or scrypt).")
+
+def stored_method(password_hash):
+    """Method part of a Werkzeug hash ('pbkdf2:sha256:600000$salt$hash' -> 'pbkdf2:sha256:600000')."""
+    return password_hash.split('$', 1)[0] if password_hash else ''
+
+_hasher = PasswordHasher()
+
+def init_passwords(app):
+    """Applies PASSWORD_HASH_METHOD and the hashing pool limits (PASSWORD_HASH_WORKERS / _MAX_PENDING / _WAIT)."""
+    global _hasher
+    _hasher.shutdown()
+    _hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 8),
+        wait_seconds=app.config.get('PASSWORD_HASH_WAIT', 5.0),
+    )
+
+def hash_password(password):
+    return _hasher.hash(password)
+
+def verify_password(password_hash, password):
+    return _hasher.verify(password_hash, password)
+
+def password_needs_rehash(password_hash):
+    return _hasher.needs_rehash(password_hash)
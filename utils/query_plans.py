@@ -0,0 +1,58 @@
+import sys
+from sqlalchemy import select, text, tuple_
+from database import db
+from utils.pagination import prefix_filter
+from models import User, Subject, Chapter, QuizQuestion, UserQuizAttempt, BackgroundJob, QuestionSimilarityBucket, MediaAsset
+
+def hot_queries():
+    """The lookups that run on every dashboard view, import or attempt, keyed by a short name."""
+    return {
+        'chapters_for_class': select(Chapter.id).where(Chapter.for_class == 'Class 9', Chapter.is_active.is_(True)),
+        'chapters_for_subject': select(Chapter.id).where(Chapter.subject_id == 1),
+        'questions_for_chapter': select(QuizQuestion.id).where(QuizQuestion.chapter_id == 1),
+        'question_dedup_lookup': select(QuizQuestion.id).where(QuizQuestion.chapter_id == 1, QuizQuestion.question_fingerprint == 'x' * 64),
+        'attempts_for_user': select(UserQuizAttempt.id).where(UserQuizAttempt.user_id == 1),
+        'attempts_for_user_chapter': select(UserQuizAttempt.id).where(UserQuizAttempt.user_id == 1, UserQuizAttempt.chapter_id == 1),
+        'attempts_for_chapter': select(UserQuizAttempt.id).where(UserQuizAttempt.chapter_id == 1),
+        'admin_users_page': select(User.id).where(User.id > 100).order_by(User.id).limit(51),
+        'admin_users_by_prefix': select(User.id).where(prefix_filter(User.username, 'ab')),
+        'admin_users_by_class_page': select(User.id).where(User.selected_class == 'Class 9', User.id > 100).order_by(User.id).limit(51),
+        'admin_subjects_page': select(Subject.id).where(tuple_(Subject.name, Subject.id) > tuple_('x', 1)).order_by(Subject.name, Subject.id).limit(51),
+        'admin_chapters_page': select(Chapter.id).where(tuple_(Chapter.subject_id, Chapter.name, Chapter.id) > tuple_(1, 'x', 1))
+                               .order_by(Chapter.subject_id, Chapter.name, Chapter.id).limit(51),
+        'near_duplicate_candidates': select(QuestionSimilarityBucket.question_id).where(QuestionSimilarityBucket.bucket.in_([1, 2, 3])),
+        'queued_jobs': select(BackgroundJob.id).where(BackgroundJob.status == 'queued').order_by(BackgroundJob.id).limit(1),
+        'media_asset_by_content': select(MediaAsset.id).where(MediaAsset.backend == 'local', MediaAsset.sha256 == 'x' * 64),
+        'questions_using_media': select(QuizQuestion.media_url).where(QuizQuestion.media_url.in_(['a', 'b'])).distinct(),
+    }
+
+def explain_query_plan(query):
+    """Returns SQLite's EXPLAIN QUERY PLAN detail lines for a SQLAlchemy select."""
+    sql = str(query.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()]
+
+def check_query_plans():
+    """
+    Checks that every hot query is answered through an index on SQLite (no full table SCAN).
+    :return: Dict of query name -> (ok, plan lines).
+    """
+    results = {}
+    for name, query in hot_queries().items():
+        plan = explain_query_plan(query)
+        full_scans = [line for line in plan if line.startswith('SCAN') and 'USING' not in line]
+        results[name] = (not full_scans, plan)
+    return results
+
+def init_query_plans(app):
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """Fails (exit code 1) if a hot query would do a full table scan on SQLite."""
+        if db.engine.dialect.name != 'sqlite':
+            print(f"Query plan check only supports SQLite (current: {db.engine.dialect.name}).")
+            return
+        failures = 0
+        for name, (ok, plan) in check_query_plans().items():
+            print(f"{'OK  ' if ok else 'FAIL'} {name}: {' | '.join(plan)}")
+            failures += not ok
+        if failures:
+            sys.exit(1)
@@ -0,0 +1,214 @@
+import os
+import time
+from sqlalchemy import insert, select, update
+from database import db
+from models import QuizQuestion, fingerprint_question_text
+from utils.job_queue import job_handler, report_progress
+from utils.media_cleanup import MediaCleanup
+from utils.near_duplicates import find_near_duplicates, index_questions
+from utils.class_catalog import invalidate_class_catalog
+from utils.quiz_sets import invalidate_quiz_sets
+from utils.page_cache import bump_content_version
+
+# Columns that an Excel row can change on an existing question (question_text is the match key)
+UPDATABLE_FIELDS = (
+    'option1', 'option2', 'option3', 'option4',
+    'correct_option_number', 'point_value', 'negative_mark', 'media_url',
+)
+
+DEFAULT_BATCH_SIZE = 500
+# Suspected duplicates spelled out in the report (all of them are counted)
+MAX_REPORTED_DUPLICATES = 200
+MAX_MATCHES_PER_ROW = 3
+
+def _batched(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+class QuestionImport:
+    """
+    Set-based import of parsed question rows into one chapter.
+    Existing questions are loaded once into a question_text index; each chunk of rows is then
+    diffed against it and written with batched bulk INSERT/UPDATE statements. Rows can arrive
+    in several chunks (see utils.excel_parser.iter_quiz_file_chunks) so memory stays bounded
+    by the chunk size plus the chapter's own index. The caller owns the transaction.
+    New rows are also checked against the near-duplicate index of the whole bank (and against each
+    other); suspected duplicates are still imported, but listed in the report for review.
+    """
+
+    def __init__(self, chapter_id, batch_size=DEFAULT_BATCH_SIZE):
+        self.chapter_id = chapter_id
+        self.batch_size = batch_size
+        self.timings = {'parse': 0.0, 'load_existing': 0.0, 'diff': 0.0, 'near_duplicates': 0.0, 'write': 0.0}
+        self._inserted_ids = set()
+        self._updated_ids = set()
+        self._seen_ids = set()
+        self._original_media_by_id = {} # media_url as stored before this import, for updated rows
+        self._suspected_duplicates = []
+        self._suspected_duplicate_count = 0
+        self._load_existing()
+
+    def _load_existing(self):
+        # One query for every existing question of the chapter, indexed by text
+        started = time.perf_counter()
+        existing_rows = db.session.execute(
+            select(QuizQuestion.id, QuizQuestion.question_text, *[getattr(QuizQuestion, f) for f in UPDATABLE_FIELDS])
+            .where(QuizQuestion.chapter_id == self.chapter_id)
+        ).all()
+        self._by_text = {row.question_text: row._asdict() for row in existing_rows}
+        self._by_id = {row['id']: row for row in self._by_text.values()}
+        self.timings['load_existing'] += time.perf_counter() - started
+
+    def apply(self, questions_data):
+        """
+        Diffs one chunk of parsed rows against the index and writes the result.
+        :param questions_data: List of dicts as returned by the excel parser.
+        """
+        started = time.perf_counter()
+        pending_inserts = {} # question_text -> row dict (a repeated text in the chunk: last row wins)
+        pending_updates = {} # question id -> row dict
+        quiz_numbers = {} # question_text -> quiz number of the inserted row, for the report
+        for q_data in questions_data:
+            text = q_data['question_text']
+            new_values = {field: q_data.get(field) for field in UPDATABLE_FIELDS}
+            existing = self._by_text.get(text)
+
+            if existing is None:
+                pending_inserts[text] = dict(new_values, chapter_id=self.chapter_id, question_text=text,
+                                             question_fingerprint=fingerprint_question_text(text))
+                quiz_numbers[text] = q_data.get('quiz_number')
+                continue
+
+            self._seen_ids.add(existing['id'])
+            changes = {field: value for field, value in new_values.items() if existing[field] != value}
+            if not changes:
+                continue
+
+            self._original_media_by_id.setdefault(existing['id'], existing['media_url'])
+            existing.update(changes)
+            pending_updates[existing['id']] = dict(new_values, id=existing['id'])
+            if 'media_url' in changes: # Recorded dimensions belong to the old file
+                pending_updates[existing['id']].update(media_width=None, media_height=None)
+        self.timings['diff'] += time.perf_counter() - started
+
+        # Checked before inserting, so the rows don't match themselves
+        started = time.perf_counter()
+        insert_texts = list(pending_inserts)
+        duplicate_matches = find_near_duplicates(insert_texts)
+        self.timings['near_duplicates'] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        for batch in _batched(list(pending_inserts.values()), self.batch_size):
+            # RETURNING the new ids keeps the index complete for rows repeated in a later chunk
+            inserted = db.session.execute(
+                insert(QuizQuestion).returning(QuizQuestion.id, QuizQuestion.question_text), batch
+            ).all()
+            for question_id, text in inserted:
+                row = dict(pending_inserts[text], id=question_id)
+                self._by_text[text] = row
+                self._by_id[question_id] = row
+                self._inserted_ids.add(question_id)
+            index_questions(inserted) # So later chunks (and imports) see these rows too
+        for batch in _batched(list(pending_updates.values()), self.batch_size):
+            db.session.execute(update(QuizQuestion), batch) # ORM bulk UPDATE by primary key
+        self._updated_ids.update(pending_updates)
+        self.timings['write'] += time.perf_counter() - started
+        self._record_duplicates(insert_texts, duplicate_matches, quiz_numbers)
+
+    def _record_duplicates(self, texts, duplicate_matches, quiz_numbers):
+        for text, matches in zip(texts, duplicate_matches):
+            if not matches:
+                continue
+            self._suspected_duplicate_count += 1
+            if len(self._suspected_duplicates) >= MAX_REPORTED_DUPLICATES:
+                continue
+            listed = []
+            for match in matches[:MAX_MATCHES_PER_ROW]:
+                if 'row' in match: # An earlier row of this same upload, inserted above
+                    earlier = self._by_text[texts[match['row']]]
+                    listed.append({'question_id': earlier['id'], 'chapter_id': self.chapter_id, 'chapter_name': None,
+                                   'question_text': earlier['question_text'], 'similarity': match['similarity'], 'same_upload': True})
+                else:
+                    listed.append(dict(match, same_upload=False))
+            self._suspected_duplicates.append({
+                'quiz_number': quiz_numbers.get(text),
+                'question_id': self._by_text[text]['id'],
+                'question_text': text,
+                'matches': listed,
+            })
+
+    def apply_chunks(self, chunks, on_chunk=None):
+        """
+        Consumes an iterator of row chunks, timing how long producing each chunk takes as 'parse'.
+        :param on_chunk: Optional callback(rows_in_chunk) run after each chunk is written (e.g. to commit).
+        """
+        chunks = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            self.timings['parse'] += time.perf_counter() - started
+            if chunk is None:
+                break
+            self.apply(chunk)
+            if on_chunk is not None:
+                on_chunk(len(chunk))
+
+    def report(self):
+        """
+        :return: Report dict with inserted/updated/unchanged counts, stale_media_urls
+                 (old media replaced by this import), suspected_duplicates (new rows with their most
+                 similar existing questions, at most MAX_REPORTED_DUPLICATES; suspected_duplicate_count
+                 counts them all) and per-phase timings in seconds.
+        """
+        updated_ids = self._updated_ids - self._inserted_ids
+        stale_media_urls = []
+        for question_id, old_media_url in self._original_media_by_id.items():
+            if question_id in self._inserted_ids: # Media set earlier in this same import, never committed
+                continue
+            if old_media_url and old_media_url != self._by_id[question_id]['media_url']:
+                stale_media_urls.append(old_media_url)
+        return {
+            'inserted': len(self._inserted_ids),
+            'updated': len(updated_ids),
+            'unchanged': len(self._seen_ids - self._updated_ids - self._inserted_ids),
+            'stale_media_urls': stale_media_urls,
+            'suspected_duplicates': self._suspected_duplicates,
+            'suspected_duplicate_count': self._suspected_duplicate_count,
+            'timings': dict(self.timings),
+        }
+
+@job_handler('question_import')
+def run_question_import_job(job, payload):
+    """
+    Background version of the upload: validates the whole file first (streaming, no writes) so a
+    bad row late in the sheet can't leave a half-imported bank, then imports and commits chunk by
+    chunk so progress is visible to the status endpoint. Re-running an import is safe because
+    rows are matched on question_text.
+    :param payload: {'chapter_id', 'file_path', 'chunk_size'}
+    """
+    # pandas/openpyxl are only loaded by the process that runs imports, not by every web worker
+    from utils.excel_parser import iter_quiz_file_chunks
+
+    file_path = payload['file_path']
+    chunk_size = payload['chunk_size']
+    try:
+        total = sum(len(chunk) for chunk in iter_quiz_file_chunks(file_path, chunk_size))
+        report_progress(job, 0, total)
+        db.session.commit()
+
+        question_import = QuestionImport(payload['chapter_id'])
+        def commit_chunk(rows):
+            report_progress(job, job.progress + rows)
+            db.session.commit()
+        question_import.apply_chunks(iter_quiz_file_chunks(file_path, chunk_size), on_chunk=commit_chunk)
+        report = question_import.report()
+        invalidate_class_catalog() # Question counts changed
+        invalidate_quiz_sets(payload['chapter_id'])
+        bump_content_version()
+
+        # Old media is only removed after the new rows are safely committed
+        report['media_cleanup'] = MediaCleanup().add_urls(report['stale_media_urls']).flush()
+        return report
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
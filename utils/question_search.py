@@ -0,0 +1,74 @@
+import re
+import unicodedata
+import sqlalchemy as sa
+from sqlalchemy import select
+from database import db
+from models import Subject, Chapter, QuizQuestion
+
+# Search terms: runs of letters/digits plus the Bengali vowel signs and marks (and ZWNJ/ZWJ)
+# that str.isalnum() doesn't cover, mirroring the FTS5 tokenizer set up in migration 0006
+_TERM_PATTERN = re.compile(r"(?:[^\W_]|[\u0981-\u0983\u09bc-\u09d7\u09e2\u09e3\u200c\u200d])+")
+MAX_SEARCH_TERMS = 8
+
+# The SQLite FTS5 index (external content over quiz_question, rowid = quiz_question.id)
+_fts = sa.table('quiz_question_fts', sa.column('rowid', sa.Integer))
+
+def search_terms(query_text):
+    """NFC-normalized, lower-cased words of a search box query (at most MAX_SEARCH_TERMS)."""
+    normalized = unicodedata.normalize('NFC', query_text or '').lower()
+    return _TERM_PATTERN.findall(normalized)[:MAX_SEARCH_TERMS]
+
+def _listing_columns():
+    return (QuizQuestion.id, QuizQuestion.chapter_id, QuizQuestion.question_text, QuizQuestion.correct_option_number,
+            QuizQuestion.point_value, QuizQuestion.negative_mark, QuizQuestion.difficulty, QuizQuestion.media_url,
+            Chapter.name.label('chapter_name'), Subject.name.label('subject_name'))
+
+def question_listing_query(query_text=None, chapter_id=None):
+    """
+    Builds the admin question bank listing: every word of query_text must match (as a prefix, so
+    "বাংলাদেশ" finds "বাংলাদেশের") in the question or one of its options.
+    :return: (select, order_columns) ready for utils.pagination.keyset_page.
+    """
+    terms = search_terms(query_text)
+    dialect = db.engine.dialect.name
+
+    if terms and dialect == 'sqlite':
+        # Drive the query from the FTS index and page by its rowid, so FTS5 can stop after one page
+        match = ' '.join(f'"{term}"*' for term in terms)
+        query = (select(_fts.c.rowid, *_listing_columns())
+                 .select_from(_fts)
+                 .join(QuizQuestion, QuizQuestion.id == _fts.c.rowid)
+                 .where(sa.literal_column('quiz_question_fts').op('MATCH')(match)))
+        order_columns = [_fts.c.rowid]
+    else:
+        query = select(*_listing_columns()).select_from(QuizQuestion)
+        order_columns = [QuizQuestion.id]
+        if terms and dialect == 'postgresql':
+            tsquery = ' & '.join(f'{term}:*' for term in terms)
+            query = query.where(sa.literal_column('quiz_question.search_vector').op('@@')(sa.func.to_tsquery('simple', tsquery)))
+        elif terms:
+            # No search index on other databases: substring match on the question text
+            query = query.where(sa.and_(*(QuizQuestion.question_text.contains(term) for term in terms)))
+
+    query = query.join(Chapter, Chapter.id == QuizQuestion.chapter_id).join(Subject, Subject.id == Chapter.subject_id)
+    if chapter_id:
+        query = query.where(QuizQuestion.chapter_id == chapter_id)
+    return query, order_columns
+
+def rebuild_question_search_index():
+    """Re-indexes every question (SQLite FTS5 only; the PostgreSQL column is generated). Returns True if rebuilt."""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    db.session.execute(sa.text("INSERT INTO quiz_question_fts(quiz_question_fts) VALUES ('rebuild')"))
+    db.session.execute(sa.text("INSERT INTO quiz_question_fts(quiz_question_fts) VALUES ('optimize')"))
+    db.session.commit()
+    return True
+
+def init_question_search(app):
+    @app.cli.command('rebuild-question-index')
+    def rebuild_question_index_command():
+        """Rebuilds the question full-text index (e.g. after restoring quiz_question from a dump)."""
+        if rebuild_question_search_index():
+            print("Question search index rebuilt.")
+        else:
+            print(f"Nothing to rebuild on {db.engine.dialect.name} (search_vector is a generated column).")
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import random
+from sqlalchemy import select
+from database import db
+from models import QuizQuestion
+from utils.cache import TTLCache
+from utils.scoring import AnswerKey
+from utils.db_routing import primary_reads
+from utils.media import media_srcset
+
+# chapter_id -> QuizSet
+_quiz_set_cache = TTLCache()
+
+def init_quiz_sets(app):
+    """Applies QUIZ_SET_CACHE_TTL from the app config to the in-process quiz set cache."""
+    _quiz_set_cache.ttl_seconds = app.config.get('QUIZ_SET_CACHE_TTL', 600)
+
+class QuizSet:
+    """
+    A chapter's questions, serialized once per chapter version.
+    Each question is stored as a ready-made JSON fragment (without the correct answer), so a
+    per-attempt shuffle is just a permutation of byte strings joined together, with no DB query
+    and no re-serialization. The answer key stays on the server for scoring.
+    """
+
+    def __init__(self, chapter_id, rows):
+        self.chapter_id = chapter_id
+        self.question_ids = [row.id for row in rows]
+        self.position_by_id = {question_id: position for position, question_id in enumerate(self.question_ids)}
+        self.answer_key = AnswerKey(
+            self.question_ids,
+            [row.correct_option_number for row in rows],
+            [row.point_value or 0.0 for row in rows],
+            [row.negative_mark or 0.0 for row in rows],
+        )
+        self.fragments = [
+            json.dumps({
+                'id': row.id,
+                'question_text': row.question_text,
+                'options': [row.option1, row.option2, row.option3, row.option4],
+                'point_value': row.point_value,
+                'negative_mark': row.negative_mark,
+                'media_url': row.media_url,
+                # width/height let the browser reserve space; srcset lets phones fetch a smaller copy
+                'media_width': row.media_width,
+                'media_height': row.media_height,
+                'media_srcset': media_srcset(row.media_url, row.media_width) if row.media_url else '',
+                'difficulty': row.difficulty,
+            }, ensure_ascii=False).encode('utf-8')
+            for row in rows
+        ]
+        # Content hash: identifies the exact question set an attempt was served
+        digest = hashlib.sha1()
+        for fragment, row in zip(self.fragments, rows):
+            digest.update(fragment)
+            digest.update(repr((row.correct_option_number, row.point_value, row.negative_mark)).encode('utf-8'))
+        self.version = digest.hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def permutation(self, seed):
+        """Deterministic question order for one attempt (same seed -> same order)."""
+        order = list(range(len(self.question_ids)))
+        random.Random(seed).shuffle(order)
+        return order
+
+    def to_json(self, seed):
+        """
+        :param seed: Per-attempt shuffle seed.
+        :return: UTF-8 JSON bytes: {"chapter_id", "version", "questions": [...]} in shuffled order.
+        """
+        header = json.dumps({'chapter_id': self.chapter_id, 'version': self.version}).encode('utf-8')[:-1]
+        questions = b','.join(self.fragments[position] for position in self.permutation(seed))
+        return header + b', "questions": [' + questions + b']}'
+
+    def question(self, question_id):
+        """Decoded question dict including its correct option (used when rendering an answer sheet)."""
+        question = json.loads(self.fragments[self.position_by_id[question_id]])
+        column = int(self.answer_key.positions([question_id])[0])
+        question['correct_option_number'] = int(self.answer_key.correct_options[column])
+        return question
+
+def _build_quiz_set(chapter_id):
+    # From the primary: the cached answer key scores submissions, so it must not come from a lagging replica
+    with primary_reads():
+        rows = db.session.execute(
+            select(QuizQuestion.id, QuizQuestion.question_text,
+                   QuizQuestion.option1, QuizQuestion.option2, QuizQuestion.option3, QuizQuestion.option4,
+                   QuizQuestion.correct_option_number, QuizQuestion.point_value, QuizQuestion.negative_mark,
+                   QuizQuestion.media_url, QuizQuestion.media_width, QuizQuestion.media_height, QuizQuestion.difficulty)
+            .where(QuizQuestion.chapter_id == chapter_id)
+            .order_by(QuizQuestion.id)
+        ).all()
+    return QuizSet(chapter_id, rows)
+
+def get_quiz_set(chapter_id):
+    """Returns the cached QuizSet for a chapter, building it with one query on a miss."""
+    return _quiz_set_cache.get_or_load(chapter_id, lambda: _build_quiz_set(chapter_id))
+
+def invalidate_quiz_sets(chapter_id=None):
+    """Call after committing question changes (one chapter, or every chapter when None)."""
+    _quiz_set_cache.invalidate(chapter_id)
+
+def quiz_set_stats():
+    return _quiz_set_cache.stats()
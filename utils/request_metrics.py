@@ -0,0 +1,250 @@
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from flask import Response, abort, before_render_template, current_app, g, has_request_context, request, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request duration histogram buckets; +Inf is implied
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# How many recent slow queries the admin page lists
+RECENT_SLOW_QUERIES = 50
+# Metric name prefix in the Prometheus output
+METRIC_PREFIX = 'polyquiz'
+
+class EndpointStats:
+    """Aggregates of one (endpoint, method) in this worker."""
+    __slots__ = ('count', 'bucket_counts', 'seconds', 'max_seconds', 'sql_queries', 'sql_seconds', 'template_seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.bucket_counts = [0] * len(DURATION_BUCKETS) # Not cumulative; the Prometheus output sums them
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def add(self, seconds, sql_queries, sql_seconds, template_seconds):
+        self.count += 1
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.sql_queries += sql_queries
+        self.sql_seconds += sql_seconds
+        self.template_seconds += template_seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None past the last bucket)."""
+        needed, seen = q * self.count, 0
+        for bound, count in zip(DURATION_BUCKETS, self.bucket_counts):
+            seen += count
+            if seen >= needed:
+                return bound
+        return None
+
+class RequestTimings:
+    """Per-request counters, kept in g.request_timings."""
+    __slots__ = ('started', 'sql_queries', 'sql_seconds', 'template_seconds', 'template_depth', 'template_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0 # Templates rendered inside a render (cached fragments) count once
+        self.template_started = 0.0
+
+_stats_lock = threading.Lock()
+_endpoints = {} # (endpoint, method) -> EndpointStats
+_slow_queries = deque(maxlen=RECENT_SLOW_QUERIES)
+_slow_query_count = 0
+_slow_query_seconds = 0.2
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _current_timings():
+    return g.get('request_timings') if has_request_context() else None
+
+# --- SQL: engine cursor events ---
+
+def _call_site():
+    """'file.py:line in function' of the innermost project frame that issued the query."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith('<'): # Generated code, e.g. SQLAlchemy's cached method wrappers
+            frame = frame.f_back
+            continue
+        filename = os.path.abspath(filename)
+        if filename.startswith(_project_root) and filename != os.path.abspath(__file__) \
+                and os.sep + 'site-packages' + os.sep not in filename:
+            return f"{os.path.relpath(filename, _project_root)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global _slow_query_count
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    timings = _current_timings()
+    if timings is not None:
+        timings.sql_queries += 1
+        timings.sql_seconds += elapsed
+    if elapsed >= _slow_query_seconds:
+        site = _call_site()
+        logger.warning("Slow query (%.1f ms) at %s: %s", elapsed * 1000, site, ' '.join(statement.split())[:1000])
+        with _stats_lock:
+            _slow_query_count += 1
+            _slow_queries.appendleft({'ms': round(elapsed * 1000, 1), 'call_site': site, 'statement': statement[:1000],
+                                      'endpoint': request.endpoint if has_request_context() else None,
+                                      'at': time.strftime('%Y-%m-%d %H:%M:%S')})
+
+# --- Templates: Flask render signals ---
+
+def _before_render(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None:
+        if timings.template_depth == 0:
+            timings.template_started = time.perf_counter()
+        timings.template_depth += 1
+
+def _after_render(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None and timings.template_depth > 0:
+        timings.template_depth -= 1
+        if timings.template_depth == 0:
+            timings.template_seconds += time.perf_counter() - timings.template_started
+
+# --- Requests ---
+
+def _start_request():
+    g.request_timings = RequestTimings()
+
+def _finish_request(response):
+    timings = g.pop('request_timings', None)
+    if timings is None:
+        return response
+    total = time.perf_counter() - timings.started
+    key = (request.endpoint or 'unmatched', request.method)
+    with _stats_lock:
+        stats = _endpoints.get(key)
+        if stats is None:
+            stats = _endpoints[key] = EndpointStats()
+        stats.add(total, timings.sql_queries, timings.sql_seconds, timings.template_seconds)
+    if current_app.config.get('SERVER_TIMING_HEADER', True):
+        queries = f"{timings.sql_queries} {'query' if timings.sql_queries == 1 else 'queries'}"
+        response.headers['Server-Timing'] = (
+            f'db;dur={timings.sql_seconds * 1000:.1f};desc="{queries}", '
+            f'tpl;dur={timings.template_seconds * 1000:.1f}, total;dur={total * 1000:.1f}'
+        )
+    return response
+
+# --- Reports ---
+
+def endpoint_report():
+    """Per-endpoint summary for the admin page, slowest total time first (milliseconds)."""
+    with _stats_lock:
+        rows = []
+        for (endpoint, method), stats in _endpoints.items():
+            p50, p95 = stats.quantile(0.5), stats.quantile(0.95)
+            rows.append({
+                'endpoint': endpoint, 'method': method, 'count': stats.count,
+                'avg_ms': stats.seconds / stats.count * 1000,
+                'p50_ms': p50 * 1000 if p50 is not None else None,
+                'p95_ms': p95 * 1000 if p95 is not None else None,
+                'max_ms': stats.max_seconds * 1000,
+                'avg_queries': stats.sql_queries / stats.count,
+                'avg_sql_ms': stats.sql_seconds / stats.count * 1000,
+                'avg_template_ms': stats.template_seconds / stats.count * 1000,
+                'total_seconds': stats.seconds,
+            })
+    return sorted(rows, key=lambda row: row['total_seconds'], reverse=True)
+
+def recent_slow_queries():
+    with _stats_lock:
+        return list(_slow_queries)
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text():
+    """This worker's metrics in the Prometheus text exposition format (version 0.0.4)."""
+    name = f"{METRIC_PREFIX}_request_duration_seconds"
+    lines = [f"# HELP {name} Request wall time per endpoint.", f"# TYPE {name} histogram"]
+    counters = {
+        'request_sql_queries_total': ('SQL statements run by requests.', 'sql_queries'),
+        'request_sql_seconds_total': ('Time requests spent in SQL.', 'sql_seconds'),
+        'request_template_seconds_total': ('Time requests spent rendering templates.', 'template_seconds'),
+    }
+    with _stats_lock:
+        endpoints = sorted(_endpoints.items())
+        for (endpoint, method), stats in endpoints:
+            labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, stats.bucket_counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f'{name}_sum{{{labels}}} {stats.seconds:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {stats.count}')
+        for suffix, (help_text, attribute) in counters.items():
+            counter = f"{METRIC_PREFIX}_{suffix}"
+            lines += [f"# HELP {counter} {help_text}", f"# TYPE {counter} counter"]
+            for (endpoint, method), stats in endpoints:
+                lines.append(f'{counter}{{endpoint="{_label(endpoint)}",method="{method}"}} {getattr(stats, attribute)}')
+        slow = f"{METRIC_PREFIX}_slow_queries_total"
+        lines += [f"# HELP {slow} Queries slower than SLOW_QUERY_MS.", f"# TYPE {slow} counter", f"{slow} {_slow_query_count}"]
+    return '\n'.join(lines) + '\n'
+
+def reset_request_metrics():
+    global _slow_query_count
+    with _stats_lock:
+        _endpoints.clear()
+        _slow_queries.clear()
+        _slow_query_count = 0
+
+def init_request_metrics(app):
+    """
+    Times every request (wall, SQL via engine cursor events, template rendering), adds a Server-Timing
+    header, logs queries slower than SLOW_QUERY_MS with their call site, and serves /metrics
+    (Prometheus text format) to admins or with 'Authorization: Bearer <METRICS_TOKEN>'. Figures are
+    per worker process, like the cache stats. Register early, so the timing wraps the other hooks.
+    REQUEST_METRICS=False turns all of it off.
+    """
+    global _slow_query_seconds
+    if not app.config.get('REQUEST_METRICS', True):
+        return
+    _slow_query_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+
+    with app.app_context():
+        for engine in db.engines.values(): # Primary and the optional replica bind
+            if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        # Constant-time comparison, so response timing doesn't reveal how much of a guessed token matched
+        authorized = (token and hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                                                    f"Bearer {token}".encode('utf-8'))) or \
+                     (current_user.is_authenticated and current_user.is_admin)
+        if not authorized:
+            abort(403)
+        return Response(prometheus_text(), mimetype='text/plain; version=0.0.4')
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,123 @@
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import bindparam, func, insert, update
+from database import db
+from models import User, UserQuizAttempt
+from utils.attempt_codec import encode_answer_arrays
+
+class AnswerKey:
+    """
+    A chapter's answer key as compact NumPy arrays, aligned with question_ids (ascending).
+    Answer sheets are encoded as an int8 matrix (one row per sheet, 0 = skipped) and scored
+    with array operations, so scoring many sheets costs a few vector ops instead of a Python loop.
+    """
+
+    def __init__(self, question_ids, correct_options, point_values, negative_marks):
+        order = np.argsort(np.asarray(question_ids, dtype=np.int64), kind='stable')
+        self.question_ids = np.asarray(question_ids, dtype=np.int64)[order]
+        self.correct_options = np.asarray(correct_options, dtype=np.int8)[order]
+        self.point_values = np.asarray(point_values, dtype=np.float64)[order]
+        self.negative_marks = np.asarray(negative_marks, dtype=np.float64)[order]
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def positions(self, question_ids):
+        """Column index of each question id, or -1 for ids not in this chapter."""
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        if not len(self.question_ids):
+            return np.full(len(question_ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.question_ids, question_ids)
+        positions = np.clip(positions, 0, len(self.question_ids) - 1)
+        return np.where(self.question_ids[positions] == question_ids, positions, -1)
+
+    def encode_sheets(self, sheets):
+        """
+        :param sheets: List of {question_id: chosen_option} dicts.
+        :return: int8 matrix of shape (len(sheets), len(self)); 0 = skipped, invalid choices dropped.
+        """
+        choices = np.zeros((len(sheets), len(self)), dtype=np.int8)
+        # Flatten every (sheet, question, option) triple first, then place them with one lookup
+        counts = [len(answers) for answers in sheets]
+        total = sum(counts)
+        if not total:
+            return choices
+        rows = np.repeat(np.arange(len(sheets)), counts)
+        ids = np.fromiter((question_id for answers in sheets for question_id in answers), dtype=np.int64, count=total)
+        chosen = np.fromiter((option for answers in sheets for option in answers.values()), dtype=np.int64, count=total)
+        columns = self.positions(ids)
+        valid = (columns >= 0) & (chosen >= 1) & (chosen <= 4)
+        choices[rows[valid], columns[valid]] = chosen[valid]
+        return choices
+
+    def score(self, choices):
+        """
+        Scores an encoded sheet matrix.
+        :return: Dict of per-sheet arrays: score (float64), correct, wrong, skipped (int64).
+        """
+        answered = choices > 0
+        is_correct = choices == self.correct_options
+        is_wrong = answered & ~is_correct
+        scores = is_correct @ self.point_values - is_wrong @ self.negative_marks
+        correct = is_correct.sum(axis=1)
+        wrong = is_wrong.sum(axis=1)
+        return {
+            'score': np.round(scores, 2),
+            'correct': correct,
+            'wrong': wrong,
+            'skipped': len(self) - correct - wrong,
+        }
+
+    def encode_row(self, choices_row, set_version=None):
+        """Packs the non-skipped answers of one encoded sheet for UserQuizAttempt.answer_sheet."""
+        columns = np.flatnonzero(choices_row)
+        return encode_answer_arrays(self.question_ids[columns], choices_row[columns], set_version)
+
+def record_attempts(chapter_id, version, answer_key, submissions, batch_size=1000):
+    """
+    Scores many answer sheets for one chapter and writes the results in bulk: one executemany
+    INSERT for the attempts and one executemany UPDATE adding each user's total to total_points.
+    The caller commits.
+    :param version: QuizSet.version the sheets were answered against (stored with each attempt).
+    :param submissions: List of (user_id, {question_id: chosen_option}) tuples.
+    :return: List of per-submission result dicts (attempt_id, score, correct, wrong, skipped), in input order.
+    """
+    choices = answer_key.encode_sheets([answers for _, answers in submissions])
+    scored = answer_key.score(choices)
+
+    attempt_rows = []
+    points_by_user = defaultdict(float)
+    results = []
+    for row, (user_id, _) in enumerate(submissions):
+        score = float(scored['score'][row])
+        points_by_user[user_id] += score
+        attempt_rows.append({
+            'user_id': user_id,
+            'chapter_id': chapter_id,
+            'score': score,
+            'total_questions': len(answer_key),
+            'answer_sheet': answer_key.encode_row(choices[row], version),
+        })
+        results.append({
+            'score': score,
+            'correct': int(scored['correct'][row]),
+            'wrong': int(scored['wrong'][row]),
+            'skipped': int(scored['skipped'][row]),
+        })
+
+    insert_attempts = insert(UserQuizAttempt).returning(UserQuizAttempt.id, sort_by_parameter_order=True)
+    for start in range(0, len(attempt_rows), batch_size):
+        attempt_ids = db.session.execute(insert_attempts, attempt_rows[start:start + batch_size]).scalars().all()
+        for offset, attempt_id in enumerate(attempt_ids):
+            results[start + offset]['attempt_id'] = attempt_id
+
+    # Increment in SQL (not read-modify-write) so concurrent submissions can't lose points
+    add_points = (
+        update(User.__table__)
+        .where(User.__table__.c.id == bindparam('user_id_'))
+        .values(total_points=func.coalesce(User.__table__.c.total_points, 0.0) + bindparam('points_'))
+    )
+    db.session.connection().execute(
+        add_points, [{'user_id_': user_id, 'points_': points} for user_id, points in points_by_user.items()]
+    )
+    return results
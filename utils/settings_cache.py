@@ -0,0 +1,46 @@
+import os
+from models import SiteSetting
+from utils.cache import TTLCache
+from utils.db_routing import primary_reads
+
+# Default values used when a key has never been saved from the admin panel
+SETTING_DEFAULTS = {
+    'homepage_notice': '',
+    'default_theme': 'default',
+}
+
+_ALL_SETTINGS_KEY = 'all'
+_settings_cache = TTLCache()
+
+def init_settings_cache(app):
+    """Applies SETTINGS_CACHE_TTL from the app config to the in-process settings cache."""
+    _settings_cache.ttl_seconds = app.config.get('SETTINGS_CACHE_TTL', 60)
+
+def _load_all_settings():
+    # One query for every key instead of one query per key (from the primary, as the result is cached)
+    with primary_reads():
+        rows = SiteSetting.query.with_entities(SiteSetting.setting_key, SiteSetting.setting_value).all()
+    settings = dict(SETTING_DEFAULTS)
+    settings.update({key: value for key, value in rows if value is not None})
+    return settings
+
+def get_site_settings():
+    """
+    Returns all site settings as a dict, served from memory until the TTL expires.
+    :return: Mapping of setting_key to setting_value (defaults filled in).
+    """
+    return _settings_cache.get_or_load(_ALL_SETTINGS_KEY, _load_all_settings)
+
+def get_setting(key, default=None):
+    return get_site_settings().get(key, default)
+
+def invalidate_settings_cache():
+    """Call after committing SiteSetting changes so this worker reloads on the next render."""
+    _settings_cache.invalidate()
+
+def settings_cache_stats():
+    """Hit/miss counters for this worker process (each gunicorn worker has its own)."""
+    stats = _settings_cache.stats()
+    stats['pid'] = os.getpid()
+    stats['ttl_seconds'] = _settings_cache.ttl_seconds
+    return stats